@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from community.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Recount Post and Comment like_count from the likes tables, a batch of rows at a time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Posts or comments recounted per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted counters without fixing them')
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            checked, drifted = self._repair(model, options['batch_size'], options['dry_run'])
+            verb = 'found' if options['dry_run'] else 'fixed'
+            self.stdout.write(self.style.SUCCESS(
+                f"{model._meta.verbose_name_plural.capitalize()}: checked {checked}, {verb} {drifted} drifted like counts"
+            ))
+
+    def _repair(self, model, batch_size, dry_run):
+        fk = model._meta.model_name
+        counts = (
+            model.likes.through.objects
+            .filter(**{fk: OuterRef('pk')})
+            .order_by()
+            .values(fk)
+            .annotate(total=Count('*'))
+            .values('total')
+        )
+        checked = drifted = 0
+        last_pk = 0
+
+        while True:
+            pks = list(model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return checked, drifted
+            last_pk = pks[-1]
+            checked += len(pks)
+
+            # Stored and counted values come from one statement, so they agree on a snapshot
+            rows = list(
+                model.objects
+                .filter(pk__in=pks)
+                .annotate(actual=Coalesce(Subquery(counts), 0))
+                .exclude(like_count=F('actual'))
+                .values_list('pk', 'like_count', 'actual')
+            )
+            drifted += len(rows)
+            if rows and not dry_run:
+                # Shift by the difference rather than overwrite, so likes landing meanwhile still count
+                with transaction.atomic():
+                    model.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(
+                        like_count=F('like_count') + Case(
+                            *[When(pk=pk, then=Value(actual - stored)) for pk, stored, actual in rows],
+                            output_field=IntegerField(),
+                        )
+                    )
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from community.models import TimelineEntry
+from community.pagination import older_than
+
+
+class Command(BaseCommand):
+    help = 'Cap every home timeline at its newest entries, dropping older ones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=settings.TIMELINE_MAX_ENTRIES, help='Entries kept per user')
+
+    def handle(self, *args, **options):
+        keep = options['keep']
+        over_cap = list(
+            TimelineEntry.objects
+            .values('user_id')
+            .annotate(entries=Count('id'))
+            .filter(entries__gt=keep)
+            .values_list('user_id', flat=True)
+        )
+
+        users = deleted = 0
+        for user_id in over_cap:
+            entries = TimelineEntry.objects.filter(user_id=user_id)
+            # The oldest entry to keep; everything after it in newest-first order goes
+            boundary = entries.order_by('-created_at', '-post_id').values_list('created_at', 'post_id')[keep - 1]
+            count, _ = entries.filter(older_than(boundary, pk='post_id')).delete()
+            users += 1
+            deleted += count
+
+        self.stdout.write(self.style.SUCCESS(f"Trimmed {users} timelines to {keep} entries, deleted {deleted}"))
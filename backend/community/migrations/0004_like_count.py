@@ -0,0 +1,41 @@
+# Generated by Django 5.2 on 2026-10-18 13:51
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_existing_likes(apps, schema_editor):
+    for model_name in ('Post', 'Comment'):
+        model = apps.get_model('community', model_name)
+        fk = model._meta.model_name
+        counts = (
+            model.likes.through.objects
+            .filter(**{fk: OuterRef('pk')})
+            .order_by()
+            .values(fk)
+            .annotate(total=Count('*'))
+            .values('total')
+        )
+        model.objects.update(like_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0003_post_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_existing_likes, migrations.RunPython.noop),
+    ]
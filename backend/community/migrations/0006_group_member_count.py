@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 13:59
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_existing_members(apps, schema_editor):
+    Group = apps.get_model('community', 'Group')
+    counts = (
+        Group.members.through.objects
+        .filter(group=OuterRef('pk'))
+        .order_by()
+        .values('group')
+        .annotate(total=Count('*'))
+        .values('total')
+    )
+    Group.objects.update(member_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0005_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_existing_members, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+
+def seed_author_timelines(apps, schema_editor):
+    """
+    Give every author their own newest posts, capped at TIMELINE_MAX_ENTRIES,
+    as fan_out_post does for new posts. Group posts written before timelines
+    existed stay fanned_out=False and are merged in when a timeline is read.
+    """
+    Post = apps.get_model('community', 'Post')
+    TimelineEntry = apps.get_model('community', 'TimelineEntry')
+    newest = Post.objects.annotate(
+        recency=Window(
+            expression=RowNumber(),
+            partition_by=[F('author_id')],
+            order_by=[F('created_at').desc(), F('id').desc()],
+        )
+    ).filter(recency__lte=settings.TIMELINE_MAX_ENTRIES).values_list('author_id', 'id', 'created_at')
+
+    batch = []
+    for author_id, post_id, created_at in newest.iterator(chunk_size=2000):
+        batch.append(TimelineEntry(user_id=author_id, post_id=post_id, created_at=created_at))
+        if len(batch) >= 2000:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0007_comment_thread_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_author_timelines, migrations.RunPython.noop),
+    ]
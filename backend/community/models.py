@@ -9,6 +9,8 @@ class Group(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     creator = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     members = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='group_memberships')
+    # Kept in step with members by community.services
+    member_count = models.PositiveIntegerField(default=0)
     moderators = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='moderated_groups')
     is_private = models.BooleanField(default=False)
 
@@ -19,6 +21,22 @@ class Post(models.Model):
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     group = models.ForeignKey(Group, on_delete=models.CASCADE, null=True, blank=True,related_name='posts_group')
     likes = models.ManyToManyField(settings.AUTH_USER_MODEL,related_name='liked_posts')
+    # Kept in step with likes by community.services; repair_like_counts recounts it
+    like_count = models.PositiveIntegerField(default=0)
+    # Written to every member's timeline; otherwise merged into timelines at read time
+    fanned_out = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the feed walks (created_at, id) newest first
+            models.Index(fields=['-created_at', '-id'], name='community_post_feed_idx'),
+            models.Index(fields=['group', '-created_at', '-id'], name='community_post_group_idx'),
+            models.Index(
+                fields=['group', '-created_at', '-id'],
+                name='community_post_merged_idx',
+                condition=models.Q(fanned_out=False)
+            ),
+        ]
 
 class Comment(models.Model):
     content = models.TextField()
@@ -26,5 +44,25 @@ class Comment(models.Model):
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     likes = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='liked_comments')
+    like_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Comment pages and previews walk one post's comments newest first
+            models.Index(fields=['post', '-created_at', '-id'], name='community_comment_thread_idx'),
+        ]
+
 
+class TimelineEntry(models.Model):
+    """A post in a user's home timeline; created_at is copied from the post so pages are one index range."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='community_timeline_idx'),
+        ]
@@ -0,0 +1,102 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def older_than(position, pk='id'):
+    """Filter for rows after position = (created_at, id) in newest-first order."""
+    created_at, last_pk = position
+    return Q(created_at__lt=created_at) | Q(created_at=created_at, **{f'{pk}__lt': last_pk})
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Newest-first pages keyed on (created_at, id). The cursor is the position
+    of the last item served, so each page is one indexed range query no
+    matter how deep the reader scrolls, and rows inserted meanwhile never
+    shift or repeat entries the way offsets do.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 20
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = queryset.order_by('-created_at', '-id')
+
+        def fetch(position, limit):
+            page = queryset if position is None else queryset.filter(older_than(position))
+            return list(page[:limit])
+
+        return self.paginate_source(fetch, request)
+
+    def paginate_source(self, fetch, request):
+        """
+        Paginate any newest-first source: fetch(position, limit) returns up to
+        limit items after position (None for the first page), each with
+        created_at and id.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        # One extra row tells whether another page follows without a COUNT
+        results = fetch(self.decode_cursor(request), page_size + 1)
+        self.has_next = len(results) > page_size
+        results = results[:page_size]
+        self.next_position = (results[-1].created_at, results[-1].id) if self.has_next else None
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            created_at, pk = urlsafe_b64decode(encoded.encode('ascii')).decode('ascii').split('|')
+            return datetime.fromisoformat(created_at), int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        created_at, pk = position
+        encoded = urlsafe_b64encode(f"{created_at.isoformat()}|{pk}".encode('ascii')).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class MemberCursorPagination(CursorPagination):
+    """Group members and moderators by user id, which is unique, so DRF's cursor needs no offsets."""
+    ordering = 'id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
@@ -13,42 +13,94 @@ class UserProfileSerializer(serializers.ModelSerializer):
 
 
 
+class GroupMemberSerializer(UserProfileSerializer):
+    is_moderator = serializers.BooleanField(read_only=True)
+
+    class Meta(UserProfileSerializer.Meta):
+        fields = UserProfileSerializer.Meta.fields + ['is_moderator']
+
+
 class GroupDetailSerializer(serializers.ModelSerializer):
-    moderators = UserProfileSerializer(many=True, read_only=True)
     creator = UserProfileSerializer(read_only=True)
-    members = UserProfileSerializer(many=True, read_only=True)
+    is_member = serializers.SerializerMethodField()
+    is_moderator = serializers.SerializerMethodField()
 
     class Meta:
         model = Group
-        fields = '__all__'
+        # Members and moderators are paginated sub-resources of the group
+        exclude = ['members', 'moderators']
         extra_kwargs = {
             'creator': {'read_only': True},
-            'members': {'read_only': True},
-            'moderators': {'read_only': True},
+            'member_count': {'read_only': True},
         }
 
+    # GroupViewSet annotates these; the fallbacks cover a group that was just created
+
+    def get_is_member(self, obj):
+        if hasattr(obj, 'is_member'):
+            return obj.is_member
+        return self._has_user(obj.members)
+
+    def get_is_moderator(self, obj):
+        if hasattr(obj, 'is_moderator'):
+            return obj.is_moderator
+        return self._has_user(obj.moderators)
+
+    def _has_user(self, users):
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return False
+        return users.filter(pk=request.user.pk).exists()
+
     def validate_name(self, value):
         if not value.strip():
             raise serializers.ValidationError("Group name cannot be empty")
         return value.strip()
 
 
+def _liked_by_request_user(serializer, obj):
+    # Feed querysets annotate is_liked; this covers objects loaded without it, e.g. right after create
+    if hasattr(obj, 'is_liked'):
+        return obj.is_liked
+    request = serializer.context.get('request')
+    if request is None or not request.user.is_authenticated:
+        return False
+    return obj.likes.filter(pk=request.user.pk).exists()
+
+
 class PostSerializer(serializers.ModelSerializer):
-    like_count = serializers.SerializerMethodField()
+    comment_count = serializers.SerializerMethodField()
+    is_liked = serializers.SerializerMethodField()
     author = UserProfileSerializer(read_only=True)
 
     class Meta:
         model = Post
-        fields = '__all__'
+        # The liker list grows without bound; readers get is_liked and like_count instead
+        exclude = ['likes', 'fanned_out']
         extra_kwargs = {
             'title': {'required': False, 'allow_blank': True},  # Make title optional
             'content': {'required': True},  # Content remains required
             'author': {'read_only': True},
-            'likes': {'read_only': True},
+            'like_count': {'read_only': True},
         }
 
-    def get_like_count(self, obj):
-        return obj.likes.count()
+    # Feed querysets annotate these (see community.services.with_feed_counts);
+    # the fallbacks cover posts loaded without them, e.g. right after create
+
+    def get_comment_count(self, obj):
+        if hasattr(obj, 'comment_count'):
+            return obj.comment_count
+        return obj.comments.count()
+
+    def get_is_liked(self, obj):
+        return _liked_by_request_user(self, obj)
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Only feeds asked for comment previews prefetch them
+        if hasattr(instance, 'latest_comments'):
+            data['latest_comments'] = CommentSerializer(instance.latest_comments, many=True, context=self.context).data
+        return data
 
     def validate(self, data):
         """
@@ -60,19 +112,17 @@ class PostSerializer(serializers.ModelSerializer):
 
 
 class CommentSerializer(serializers.ModelSerializer):
-    like_count = serializers.SerializerMethodField()
+    is_liked = serializers.SerializerMethodField()
     author = UserProfileSerializer(read_only=True)
 
     class Meta:
         model = Comment
-        fields = '__all__'
+        exclude = ['likes']
         extra_kwargs = {
-            'likes': {'read_only': True},  # Make likes read-only
             'author': {'read_only': True},  # Author is set automatically
-            'post': {'read_only': True}  # Post is set via URL
+            'post': {'read_only': True},  # Post is set via URL
+            'like_count': {'read_only': True},
         }
 
-    def get_like_count(self, obj):
-        return obj.likes.count()
-
-
+    def get_is_liked(self, obj):
+        return _liked_by_request_user(self, obj)
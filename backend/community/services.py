@@ -0,0 +1,101 @@
+from django.db import connection, transaction
+from django.db.models import Count, Exists, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from .models import Comment, Post
+
+
+def _row_count(queryset):
+    # A correlated COUNT per post keeps the page query free of joins and GROUP BY
+    counts = queryset.order_by().values('post').annotate(total=Count('*')).values('total')
+    return Coalesce(Subquery(counts), 0)
+
+
+def with_comment_flags(queryset, user):
+    """Load comment authors and annotate is_liked for user in the same query."""
+    return queryset.select_related('author').annotate(
+        is_liked=Exists(Comment.likes.through.objects.filter(comment=OuterRef('pk'), user=user.pk)),
+    )
+
+
+def with_feed_counts(queryset, user, preview_comments=0):
+    """
+    Load authors and annotate comment_count and is_liked for user in the same
+    query. With preview_comments, each post also gets latest_comments: its
+    newest comments, fetched for the whole page in one windowed query.
+    """
+    queryset = queryset.select_related('author').annotate(
+        comment_count=_row_count(Comment.objects.filter(post=OuterRef('pk'))),
+        is_liked=Exists(Post.likes.through.objects.filter(post=OuterRef('pk'), user=user.pk)),
+    )
+    if preview_comments:
+        # Django turns a sliced prefetch into ROW_NUMBER() OVER (PARTITION BY post_id ...)
+        latest = with_comment_flags(Comment.objects.order_by('-created_at', '-id'), user)[:preview_comments]
+        queryset = queryset.prefetch_related(Prefetch('comments', queryset=latest, to_attr='latest_comments'))
+    return queryset
+
+
+def _through(obj, relation):
+    """Return the through model of obj's user relation and the column naming obj's side of it."""
+    through = getattr(type(obj), relation).through
+    return through, through._meta.get_field(type(obj)._meta.model_name).column
+
+
+def _adjust_count(obj, counter, delta):
+    """Add delta to obj's counter column with one UPDATE ... RETURNING and return the new value."""
+    table = connection.ops.quote_name(type(obj)._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET {counter} = {counter} + %s WHERE id = %s RETURNING {counter}",
+            [delta, obj.pk]
+        )
+        return cursor.fetchone()[0]
+
+
+def _stored_count(obj, counter):
+    return type(obj).objects.filter(pk=obj.pk).values_list(counter, flat=True).get()
+
+
+def _add_user(obj, relation, counter, user):
+    """
+    Link user to obj through relation and return obj's counter. The counter
+    only moves when the row is really inserted, so repeated or concurrent
+    requests by the same user count once.
+    """
+    through, column = _through(obj, relation)
+    table = connection.ops.quote_name(through._meta.db_table)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({column}, user_id) VALUES (%s, %s) "
+                f"ON CONFLICT ({column}, user_id) DO NOTHING",
+                [obj.pk, user.pk]
+            )
+            inserted = cursor.rowcount == 1
+        return _adjust_count(obj, counter, 1) if inserted else _stored_count(obj, counter)
+
+
+def _remove_user(obj, relation, counter, user):
+    through, column = _through(obj, relation)
+    with transaction.atomic():
+        deleted, _ = through.objects.filter(**{column: obj.pk, 'user_id': user.pk}).delete()
+        return _adjust_count(obj, counter, -1) if deleted else _stored_count(obj, counter)
+
+
+def add_like(obj, user):
+    """Record user's like on a Post or Comment and return its like count."""
+    return _add_user(obj, 'likes', 'like_count', user)
+
+
+def remove_like(obj, user):
+    """Remove user's like from a Post or Comment and return its like count."""
+    return _remove_user(obj, 'likes', 'like_count', user)
+
+
+def add_member(group, user):
+    """Add user to group and return its member count."""
+    return _add_user(group, 'members', 'member_count', user)
+
+
+def remove_member(group, user):
+    """Remove user from group and return its member count."""
+    return _remove_user(group, 'members', 'member_count', user)
@@ -0,0 +1,10 @@
+from django.dispatch import receiver
+from django.db.models.signals import post_save
+from .models import Post
+from .timeline import fan_out_post
+
+
+@receiver(post_save, sender=Post)
+def write_post_to_timelines(sender, instance, created, **kwargs):
+    if created:
+        fan_out_post(instance)
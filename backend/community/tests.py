@@ -1,3 +1,310 @@
-from django.test import TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from io import StringIO
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import User
+from .models import Comment, Group, Post, TimelineEntry
+from .services import add_like, add_member, remove_like
 
-# Create your tests here.
+
+class FeedTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='feed@example.com', username='feed', password='pass')
+        self.authors = [
+            User.objects.create_user(email=f'author{n}@example.com', username=f'author{n}', password='pass')
+            for n in range(5)
+        ]
+        for n in range(30):
+            post = Post.objects.create(title=f'Post {n}', content='Hello', author=self.authors[n % 5])
+            for author in self.authors[:n % 4]:
+                add_like(post, author)
+            for author in self.authors[:n % 3]:
+                Comment.objects.create(content='Nice', author=author, post=post)
+        self.liked = Post.objects.get(title='Post 29')
+        add_like(self.liked, self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        # Authentication, then the page itself
+        for page_size in (1, 10, 30):
+            with self.assertNumQueries(2):
+                response = self.client.get(f'/api/posts/?page_size={page_size}')
+            self.assertEqual(len(response.data['results']), page_size)
+
+    def test_counts_are_annotated(self):
+        post = self.client.get('/api/posts/?page_size=1').data['results'][0]
+        self.assertEqual(post['title'], 'Post 29')
+        self.assertEqual(post['like_count'], 2)
+        self.assertEqual(post['comment_count'], 2)
+        self.assertTrue(post['is_liked'])
+        self.assertEqual(post['author']['username'], 'author4')
+
+    def test_cursor_walks_every_post_once(self):
+        titles = []
+        url = '/api/posts/?page_size=7'
+        while url:
+            response = self.client.get(url)
+            titles += [post['title'] for post in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(titles, [f'Post {n}' for n in reversed(range(30))])
+
+    def test_cursor_ties_on_created_at_are_ordered_by_id(self):
+        Post.objects.update(created_at=self.liked.created_at)
+        first = self.client.get('/api/posts/?page_size=15').data
+        second = self.client.get(first['next']).data
+        ids = [post['id'] for post in first['results'] + second['results']]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertIsNone(second['next'])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/posts/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+
+class LikeCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='liker@example.com', username='liker', password='pass')
+        self.other = User.objects.create_user(email='liker2@example.com', username='liker2', password='pass')
+        self.post = Post.objects.create(title='Post', content='Hello', author=self.other)
+        self.comment = Comment.objects.create(content='Nice', author=self.other, post=self.post)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_repeated_like_counts_once(self):
+        for _ in range(3):
+            response = self.client.post(f'/api/posts/{self.post.id}/like/')
+            self.assertEqual(response.data, {'status': 'liked', 'like_count': 1})
+        self.assertEqual(add_like(self.post, self.other), 2)
+        self.assertEqual(self.post.likes.count(), 2)
+
+    def test_unlike_only_counts_existing_likes(self):
+        add_like(self.post, self.user)
+        self.assertEqual(self.client.post(f'/api/posts/{self.post.id}/unlike/').data['like_count'], 0)
+        self.assertEqual(self.client.post(f'/api/posts/{self.post.id}/unlike/').data['like_count'], 0)
+        self.assertEqual(remove_like(self.post, self.other), 0)
+
+    def test_comment_likes(self):
+        response = self.client.post(f'/api/comments/{self.comment.id}/like/')
+        self.assertEqual(response.data['like_count'], 1)
+        self.assertEqual(self.client.get(f'/api/posts/{self.post.id}/comments/').data['results'][0]['like_count'], 1)
+        self.assertEqual(self.client.post(f'/api/comments/{self.comment.id}/unlike/').data['like_count'], 0)
+
+    def test_repair_recounts_drifted_counters(self):
+        add_like(self.post, self.user)
+        self.post.likes.add(self.other)
+        Comment.objects.filter(pk=self.comment.pk).update(like_count=5)
+        out = StringIO()
+        call_command('repair_like_counts', batch_size=1, stdout=out)
+        self.assertIn('Posts: checked 1, fixed 1', out.getvalue())
+        self.post.refresh_from_db()
+        self.comment.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.comment.like_count), (2, 0))
+
+
+@override_settings(TIMELINE_FANOUT_MAX_MEMBERS=3)
+class TimelineTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='home@example.com', username='home', password='pass')
+        self.others = [
+            User.objects.create_user(email=f'member{n}@example.com', username=f'member{n}', password='pass')
+            for n in range(4)
+        ]
+        self.small = Group.objects.create(name='Small', description='', creator=self.others[0])
+        self.small.members.add(self.user, self.others[0])
+        self.large = Group.objects.create(name='Large', description='', creator=self.others[0])
+        self.large.members.add(self.user, *self.others)
+        self.elsewhere = Group.objects.create(name='Elsewhere', description='', creator=self.others[0])
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def post(self, title, group=None, author=None):
+        return Post.objects.create(title=title, content='Hello', group=group, author=author or self.others[0])
+
+    def titles(self, url='/api/posts/timeline/'):
+        titles = []
+        while url:
+            response = self.client.get(url)
+            titles += [post['title'] for post in response.data['results']]
+            url = response.data['next']
+        return titles
+
+    def test_small_groups_fan_out_and_large_groups_merge(self):
+        self.post('small 1', self.small)
+        self.post('large 1', self.large)
+        self.post('own', author=self.user)
+        self.post('not mine', self.elsewhere)
+        self.post('large 2', self.large, author=self.user)
+        self.post('small 2', self.small)
+
+        self.assertTrue(Post.objects.get(title='small 1').fanned_out)
+        self.assertFalse(Post.objects.get(title='large 1').fanned_out)
+        self.assertEqual(TimelineEntry.objects.filter(post__title='small 1').count(), 2)
+        self.assertEqual(self.titles('/api/posts/timeline/?page_size=2'), ['small 2', 'large 2', 'own', 'large 1', 'small 1'])
+
+    def test_page_query_count(self):
+        for n in range(10):
+            self.post(f'small {n}', self.small)
+            self.post(f'large {n}', self.large)
+        # Authentication, timeline entries, merged posts, then the page's posts
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/posts/timeline/?page_size=15')
+        self.assertEqual(len(response.data['results']), 15)
+
+    def test_joining_and_leaving_a_group(self):
+        self.post('before join', self.elsewhere)
+        self.post('own in group', self.elsewhere, author=self.user)
+        self.client.post(f'/api/groups/{self.elsewhere.id}/join/')
+        self.assertEqual(self.titles(), ['own in group', 'before join'])
+        self.client.post(f'/api/groups/{self.elsewhere.id}/leave/')
+        self.assertEqual(self.titles(), ['own in group'])
+
+    def test_trim_keeps_newest_entries(self):
+        for n in range(5):
+            self.post(f'small {n}', self.small)
+        out = StringIO()
+        call_command('trim_timelines', keep=2, stdout=out)
+        self.assertIn('Trimmed 2 timelines to 2 entries, deleted 6', out.getvalue())
+        self.assertEqual(self.titles(), ['small 4', 'small 3'])
+
+    def test_group_posts_are_paginated(self):
+        for n in range(3):
+            self.post(f'small {n}', self.small)
+        self.assertEqual(self.titles(f'/api/groups/{self.small.id}/posts/?page_size=2'), ['small 2', 'small 1', 'small 0'])
+
+
+class GroupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='groups@example.com', username='groups', password='pass')
+        self.others = [
+            User.objects.create_user(email=f'joiner{n}@example.com', username=f'joiner{n}', password='pass')
+            for n in range(6)
+        ]
+        self.group = Group.objects.create(name='Cyclists', description='', creator=self.others[0])
+        for other in self.others:
+            add_member(self.group, other)
+        self.group.moderators.add(self.others[1], self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_list_query_count_does_not_depend_on_membership(self):
+        for n in range(5):
+            group = Group.objects.create(name=f'Group {n}', description='', creator=self.others[n])
+            for other in self.others[:n]:
+                add_member(group, other)
+        # Authentication, then the groups with their flags and creators
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/groups/')
+        self.assertEqual(len(response.data), 6)
+        group = next(group for group in response.data if group['name'] == 'Cyclists')
+        self.assertEqual(group['member_count'], 6)
+        self.assertEqual(group['creator']['username'], 'joiner0')
+        self.assertFalse(group['is_member'])
+        self.assertTrue(group['is_moderator'])
+        self.assertNotIn('members', group)
+
+    def test_join_and_leave_keep_member_count(self):
+        for _ in range(2):
+            response = self.client.post(f'/api/groups/{self.group.id}/join/')
+            self.assertEqual(response.data, {'status': 'joined', 'member_count': 7})
+        self.assertTrue(self.client.get(f'/api/groups/{self.group.id}/').data['is_member'])
+        for _ in range(2):
+            response = self.client.post(f'/api/groups/{self.group.id}/leave/')
+            self.assertEqual(response.data, {'status': 'left', 'member_count': 6})
+
+    def test_members_are_paginated(self):
+        usernames = []
+        moderators = []
+        url = f'/api/groups/{self.group.id}/members/?page_size=4'
+        while url:
+            with self.assertNumQueries(3):
+                response = self.client.get(url)
+            usernames += [member['username'] for member in response.data['results']]
+            moderators += [member['username'] for member in response.data['results'] if member['is_moderator']]
+            url = response.data['next']
+        self.assertEqual(usernames, [f'joiner{n}' for n in range(6)])
+        self.assertEqual(moderators, ['joiner1'])
+
+        response = self.client.get(f'/api/groups/{self.group.id}/moderators/')
+        self.assertEqual([user['username'] for user in response.data['results']], ['groups', 'joiner1'])
+
+
+class CommentThreadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='thread@example.com', username='thread', password='pass')
+        self.posts = [Post.objects.create(title=f'Post {n}', content='Hello', author=self.user) for n in range(6)]
+        for post in self.posts:
+            for n in range(4):
+                Comment.objects.create(content=f'{post.title} comment {n}', author=self.user, post=post)
+        add_like(Comment.objects.get(content='Post 5 comment 3'), self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_comments_are_paginated_newest_first(self):
+        contents = []
+        url = f'/api/posts/{self.posts[0].id}/comments/?page_size=3'
+        while url:
+            # Authentication, the post, then the page
+            with self.assertNumQueries(3):
+                response = self.client.get(url)
+            contents += [comment['content'] for comment in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(contents, [f'Post 0 comment {n}' for n in reversed(range(4))])
+
+    def test_feed_embeds_latest_comments_in_one_query(self):
+        for page_size in (2, 6):
+            # Authentication, the posts, then one windowed query for every post's comments
+            with self.assertNumQueries(3):
+                response = self.client.get(f'/api/posts/?page_size={page_size}&preview_comments=2')
+            self.assertEqual(len(response.data['results']), page_size)
+
+        post = response.data['results'][0]
+        self.assertEqual([comment['content'] for comment in post['latest_comments']], ['Post 5 comment 3', 'Post 5 comment 2'])
+        self.assertTrue(post['latest_comments'][0]['is_liked'])
+        self.assertFalse(post['latest_comments'][1]['is_liked'])
+        self.assertEqual(post['comment_count'], 4)
+
+    def test_previews_are_opt_in(self):
+        response = self.client.get('/api/posts/?page_size=2')
+        self.assertNotIn('latest_comments', response.data['results'][0])
+
+
+class SeedAuthorTimelinesMigrationTests(TransactionTestCase):
+    migrate_from = [('community', '0007_comment_thread_index')]
+    migrate_to = [('community', '0008_seed_author_timelines')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    @override_settings(TIMELINE_MAX_ENTRIES=2)
+    def test_authors_get_their_newest_posts(self):
+        apps = self.migrate(self.migrate_from)
+        User = apps.get_model('users', 'User')
+        OldGroup = apps.get_model('community', 'Group')
+        OldPost = apps.get_model('community', 'Post')
+        prolific = User.objects.create(email='prolific@example.com', username='prolific')
+        occasional = User.objects.create(email='occasional@example.com', username='occasional')
+        group = OldGroup.objects.create(name='Legacy', creator=prolific)
+        posts = [
+            OldPost.objects.create(title=f'Post {n}', content='...', author=prolific, group=group if n % 2 else None)
+            for n in range(4)
+        ]
+        single = OldPost.objects.create(title='Only one', content='...', author=occasional)
+
+        apps = self.migrate(self.migrate_to)
+        TimelineEntry = apps.get_model('community', 'TimelineEntry')
+        self.assertEqual(
+            set(TimelineEntry.objects.values_list('user_id', 'post_id')),
+            {(prolific.id, posts[3].id), (prolific.id, posts[2].id), (occasional.id, single.id)}
+        )
+        entry = TimelineEntry.objects.get(post_id=single.id)
+        self.assertEqual(entry.created_at, OldPost.objects.get(id=single.id).created_at)
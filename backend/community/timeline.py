@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.db import transaction
+from .models import Group, Post, TimelineEntry
+from .pagination import older_than
+from .services import with_feed_counts
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def fan_out_post(post):
+    """
+    Add a new post to its author's timeline and, for groups of at most
+    TIMELINE_FANOUT_MAX_MEMBERS members, to every member's. Posts in larger
+    groups stay fanned_out=False and home_timeline merges them in at read
+    time, so one post never costs more than the threshold in writes.
+    """
+    recipients = {post.author_id}
+    fanned_out = True
+    if post.group_id:
+        limit = settings.TIMELINE_FANOUT_MAX_MEMBERS
+        members = list(
+            Group.members.through.objects
+            .filter(group_id=post.group_id)
+            .values_list('user_id', flat=True)[:limit + 1]
+        )
+        if len(members) > limit:
+            fanned_out = False
+        else:
+            recipients.update(members)
+
+    with transaction.atomic():
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=user_id, post_id=post.id, created_at=post.created_at) for user_id in recipients],
+            ignore_conflicts=True,
+            batch_size=1000
+        )
+        if fanned_out:
+            Post.objects.filter(pk=post.pk).update(fanned_out=True)
+            post.fanned_out = True
+    logger.info(f"Post {post.id} written to {len(recipients)} timelines")
+
+
+def add_group_history(user, group):
+    """Give a new member the group's recent fanned-out posts."""
+    posts = (
+        Post.objects
+        .filter(group=group, fanned_out=True)
+        .order_by('-created_at', '-id')
+        .values_list('id', 'created_at')[:settings.TIMELINE_MAX_ENTRIES]
+    )
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user.pk, post_id=post_id, created_at=created_at) for post_id, created_at in posts],
+        ignore_conflicts=True,
+        batch_size=1000
+    )
+
+
+def remove_group_history(user, group):
+    """Drop a leaving member's entries for the group's posts, keeping their own."""
+    TimelineEntry.objects.filter(user=user, post__group=group).exclude(post__author=user).delete()
+
+
+def home_timeline(user, position, limit, preview_comments=0):
+    """
+    Return up to limit posts after position (see community.pagination) for
+    user's home timeline, newest first: their timeline entries merged with
+    the not-fanned-out posts of groups they belong to.
+    """
+    entries = TimelineEntry.objects.filter(user=user)
+    merged = Post.objects.filter(fanned_out=False, group__in=user.group_memberships.values('id'))
+    if position is not None:
+        entries = entries.filter(older_than(position, pk='post_id'))
+        merged = merged.filter(older_than(position))
+
+    keys = set(entries.order_by('-created_at', '-post_id').values_list('created_at', 'post_id')[:limit])
+    keys.update(merged.order_by('-created_at', '-id').values_list('created_at', 'id')[:limit])
+    post_ids = [post_id for _, post_id in sorted(keys, reverse=True)[:limit]]
+
+    posts = with_feed_counts(Post.objects.filter(id__in=post_ids), user, preview_comments).in_bulk()
+    return [posts[post_id] for post_id in post_ids if post_id in posts]
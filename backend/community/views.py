@@ -4,15 +4,29 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
+from users.mixins import RateLimitHeadersMixin
+from users.throttling import PostCreationThrottle
 from .models import Group, Post, Comment
+from .pagination import KeysetCursorPagination, MemberCursorPagination
+from .services import add_like, add_member, remove_like, remove_member, with_comment_flags, with_feed_counts
+from .timeline import add_group_history, home_timeline, remove_group_history
 from .serializers import (
-    UserProfileSerializer, GroupDetailSerializer,
+    UserProfileSerializer, GroupDetailSerializer, GroupMemberSerializer,
     PostSerializer, CommentSerializer
 )
 User = get_user_model()
 
+MAX_PREVIEW_COMMENTS = 5
 
 
+def _preview_comments(request):
+    """How many of each post's latest comments to embed, from ?preview_comments=N (default none)."""
+    try:
+        return min(max(int(request.query_params.get('preview_comments', 0)), 0), MAX_PREVIEW_COMMENTS)
+    except ValueError:
+        return 0
+
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
@@ -25,6 +39,13 @@ class GroupViewSet(viewsets.ModelViewSet):
     serializer_class = GroupDetailSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        user = self.request.user.pk
+        return super().get_queryset().select_related('creator').annotate(
+            is_member=Exists(Group.members.through.objects.filter(group=OuterRef('pk'), user=user)),
+            is_moderator=Exists(Group.moderators.through.objects.filter(group=OuterRef('pk'), user=user)),
+        )
+
     def perform_create(self, serializer):
         # Automatically set the creator to the current user
         serializer.save(creator=self.request.user)
@@ -32,14 +53,16 @@ class GroupViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def join(self, request, pk=None):
         group = self.get_object()
-        group.members.add(request.user)
-        return Response({'status': 'joined'})
+        member_count = add_member(group, request.user)
+        add_group_history(request.user, group)
+        return Response({'status': 'joined', 'member_count': member_count})
 
     @action(detail=True, methods=['post'])
     def leave(self, request, pk=None):
         group = self.get_object()
-        group.members.remove(request.user)
-        return Response({'status': 'left'})
+        member_count = remove_member(group, request.user)
+        remove_group_history(request.user, group)
+        return Response({'status': 'left', 'member_count': member_count})
 
     @action(detail=True, methods=['post'])
     def add_moderator(self, request, pk=None):
@@ -53,18 +76,50 @@ class GroupViewSet(viewsets.ModelViewSet):
 
         return Response({'status': 'moderator added'})
 
+    @action(detail=True, methods=['get'])
+    def members(self, request, pk=None):
+        group = self.get_object()
+        members = User.objects.filter(group_memberships=group).annotate(
+            is_moderator=Exists(Group.moderators.through.objects.filter(group=group, user=OuterRef('pk')))
+        )
+        return self._user_page(members, GroupMemberSerializer)
+
+    @action(detail=True, methods=['get'])
+    def moderators(self, request, pk=None):
+        group = self.get_object()
+        return self._user_page(User.objects.filter(moderated_groups=group), UserProfileSerializer)
+
+    def _user_page(self, users, serializer_class):
+        paginator = MemberCursorPagination()
+        page = paginator.paginate_queryset(users, self.request, view=self)
+        return paginator.get_paginated_response(serializer_class(page, many=True).data)
+
     @action(detail=True, methods=['get'])
     def posts(self, request, pk=None):
         group = self.get_object()
-        posts = group.posts_group.all().order_by('-created_at')
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data)
+        paginator = KeysetCursorPagination()
+        posts = paginator.paginate_queryset(
+            with_feed_counts(group.posts_group.all(), request.user, _preview_comments(request)),
+            request
+        )
+        serializer = PostSerializer(posts, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(RateLimitHeadersMixin, viewsets.ModelViewSet):
     queryset = Post.objects.all().order_by('-created_at')
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]  # Ensure user is authenticated
+    pagination_class = KeysetCursorPagination
+
+    def get_queryset(self):
+        return with_feed_counts(super().get_queryset(), self.request.user, _preview_comments(self.request))
+
+    def get_throttles(self):
+        # Only creating posts is rate limited
+        if self.action == 'create':
+            return [PostCreationThrottle()]
+        return super().get_throttles()
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -85,22 +140,31 @@ class PostViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def like(self, request, pk=None):
         post = self.get_object()
-        post.likes.add(request.user)
-
-        return Response({'status': 'liked'})
+        return Response({'status': 'liked', 'like_count': add_like(post, request.user)})
 
     @action(detail=True, methods=['post'])
     def unlike(self, request, pk=None):
         post = self.get_object()
-        post.likes.remove(request.user)
-        return Response({'status': 'unliked'})
+        return Response({'status': 'unliked', 'like_count': remove_like(post, request.user)})
+
+    @action(detail=False, methods=['get'])
+    def timeline(self, request):
+        """The requesting user's home timeline: their own posts and their groups' posts."""
+        paginator = self.paginator
+        posts = paginator.paginate_source(
+            lambda position, limit: home_timeline(request.user, position, limit, _preview_comments(request)),
+            request
+        )
+        serializer = self.get_serializer(posts, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['get'])
     def comments(self, request, pk=None):
         post = self.get_object()
-        comments = post.comments.all().order_by('-created_at')
-        serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data)
+        paginator = KeysetCursorPagination()
+        comments = paginator.paginate_queryset(with_comment_flags(post.comments.all(), request.user), request)
+        serializer = CommentSerializer(comments, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['get'])
     def group_name(self, request, pk=None):
@@ -119,7 +183,7 @@ class PostViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['get'])
     def author_posts(self, request, pk=None):
-        queryset = Post.objects.filter(author=pk)
+        queryset = with_feed_counts(Post.objects.filter(author=pk), request.user).order_by('-created_at')
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
@@ -129,6 +193,9 @@ class CommentViewSet(viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated]  # Require authentication
 
+    def get_queryset(self):
+        return with_comment_flags(super().get_queryset(), self.request.user)
+
     def perform_create(self, serializer):
         # Automatically set the author and post
         post_id = self.request.data.get('post')
@@ -139,15 +206,11 @@ class CommentViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def like(self, request, pk=None):
         comment = self.get_object()
-        comment.likes.add(request.user)
-
-
-        return Response({'status': 'liked'})
+        return Response({'status': 'liked', 'like_count': add_like(comment, request.user)})
 
     @action(detail=True, methods=['post'])
     def unlike(self, request, pk=None):
         comment = self.get_object()
-        comment.likes.remove(request.user)
-        return Response({'status': 'unliked'})
+        return Response({'status': 'unliked', 'like_count': remove_like(comment, request.user)})
 
 
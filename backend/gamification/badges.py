@@ -0,0 +1,160 @@
+from bisect import bisect_right
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Badge, Notification, UserBadge, UserPoints
+from .push import push_to_user
+from .unread import adjust_unread
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+BADGES_VERSION_KEY = 'gamification:badges_version'
+# Upper bound on how long a process serves a stale list when the version
+# bump cannot reach it, e.g. with a local-memory cache per process
+BADGE_INDEX_TTL = 60
+
+
+class BadgeIndex:
+    """
+    Process-local list of badges sorted by points_required. Credits only
+    ever raise a balance, so the badges a credit earns are exactly those
+    with old_total < points_required <= new_total, found by bisecting the
+    thresholds. The list is reloaded when the badges version in the cache
+    changes, which reaches other processes only through a shared cache
+    (REDIS_URL), and in any case once it is BADGE_INDEX_TTL seconds old.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._loaded_at = None
+        self._thresholds = []
+        self._badges = []
+
+    def invalidate(self):
+        """Force a reload on the next lookup in every process sharing the cache."""
+        cache.set(BADGES_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+    def _loaded(self):
+        version = cache.get(BADGES_VERSION_KEY)
+        if version is None:
+            # A fresh token after a cache flush, so no process keeps a list it loaded earlier
+            cache.add(BADGES_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+            version = cache.get(BADGES_VERSION_KEY)
+        now = time.monotonic()
+        with self._lock:
+            if self._version != version or now - self._loaded_at >= BADGE_INDEX_TTL:
+                self._badges = list(
+                    Badge.objects.order_by('points_required').values_list('points_required', 'id', 'name')
+                )
+                self._thresholds = [points_required for points_required, _, _ in self._badges]
+                self._version = version
+                self._loaded_at = now
+            return self._thresholds, self._badges
+
+    def crossed(self, old_total, new_total):
+        """Return (badge id, name) for every badge whose threshold lies in (old_total, new_total]."""
+        thresholds, badges = self._loaded()
+        start = bisect_right(thresholds, old_total)
+        end = bisect_right(thresholds, new_total)
+        return [(badge_id, name) for _, badge_id, name in badges[start:end]]
+
+
+badge_index = BadgeIndex()
+
+
+def _insert_new_badges(pairs):
+    """
+    Insert a UserBadge for each (user_id, badge_id) pair and return the
+    pairs that were really inserted. ON CONFLICT ... RETURNING only reports
+    new rows, so a badge awarded twice, even concurrently, is reported once.
+    """
+    meta = UserBadge._meta
+    fields = [meta.pk, meta.get_field('user'), meta.get_field('badge'), meta.get_field('awarded_at')]
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    table = connection.ops.quote_name(meta.db_table)
+    awarded_at = timezone.now()
+
+    inserted = set()
+    with connection.cursor() as cursor:
+        for start in range(0, len(pairs), 500):
+            chunk = pairs[start:start + 500]
+            params = [
+                field.get_db_prep_value(value, connection)
+                for user_id, badge_id in chunk
+                for field, value in zip(fields, (uuid.uuid4(), user_id, badge_id, awarded_at))
+            ]
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) VALUES {', '.join(['(%s, %s, %s, %s)'] * len(chunk))} "
+                f"ON CONFLICT (user_id, badge_id) DO NOTHING RETURNING user_id, badge_id",
+                params
+            )
+            inserted.update(
+                (user_id, fields[2].to_python(badge_id)) for user_id, badge_id in cursor.fetchall()
+            )
+    return inserted
+
+
+def award_badges(awards):
+    """
+    Award each (user_id, badge_id, name) and write its Notification, unread
+    count and pushes. Users who already hold the badge are skipped, so
+    replays never notify twice. bulk_create does not fire post_save, so the
+    notifications are written here.
+    """
+    names = {(user_id, badge_id): name for user_id, badge_id, name in awards}
+    if not names:
+        return
+    with transaction.atomic():
+        new_pairs = _insert_new_badges(list(names))
+        awards = [
+            (user_id, badge_id, name)
+            for (user_id, badge_id), name in names.items()
+            if (user_id, badge_id) in new_pairs
+        ]
+        if not awards:
+            return
+        notifications = Notification.objects.bulk_create(
+            [
+                Notification(
+                    user_id=user_id,
+                    badge_id=badge_id,
+                    message=f"Congratulations! You've earned the '{name}' badge."
+                )
+                for user_id, badge_id, name in awards
+            ],
+            batch_size=1000
+        )
+        # bulk_create skips post_save, so count the new unread notifications here
+        per_user = {}
+        for user_id, _, _ in awards:
+            per_user[user_id] = per_user.get(user_id, 0) + 1
+        for user_id, count in per_user.items():
+            adjust_unread(user_id, count)
+
+        for (user_id, badge_id, name), notification in zip(awards, notifications):
+            badge = {'id': str(badge_id), 'name': name}
+            push_to_user(user_id, 'badge', badge)
+            push_to_user(user_id, 'notification', {
+                'id': notification.id,
+                'message': notification.message,
+                'is_read': False,
+                'created_at': notification.created_at.isoformat(),
+                'badge': badge,
+            })
+    logger.info(f"Awarded {len(awards)} badges")
+
+
+def award_badge_to_qualified_users(badge):
+    """Give a new or lowered badge to users whose balance already passed it."""
+    user_ids = (
+        UserPoints.objects
+        .filter(total_points__gte=badge.points_required)
+        .exclude(user__badges__badge=badge)
+        .values_list('user_id', flat=True)
+    )
+    award_badges([(user_id, badge.id, badge.name) for user_id in user_ids])
@@ -0,0 +1,30 @@
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from .push import user_group
+
+
+class GamificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes points, badge and notification events to the signed-in user
+    ws://<host>/ws/gamification/?token=<JWT access token>
+    """
+    group_name = None
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        self.group_name = user_group(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        # Server-to-client only
+        pass
+
+    async def gamification_event(self, event):
+        await self.send_json({'type': event['event'], 'data': event['data']})
@@ -0,0 +1,246 @@
+from bisect import bisect_left, insort
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from .models import UserPoints
+import logging
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class InMemorySortedSet:
+    """
+    Thread-safe stand-in for the handful of Redis sorted set commands the
+    leaderboard uses. Tests only: each process would hold its own copy.
+    As in Redis, members are kept in (score, member) order, so the rev
+    commands return equal scores in descending member order.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sets = {}
+
+    def _get(self, key):
+        # Per key: member -> score, plus (score, member) pairs kept sorted
+        return self._sets.setdefault(key, ({}, []))
+
+    def zadd(self, key, mapping):
+        with self._lock:
+            scores, ordered = self._get(key)
+            for member, score in mapping.items():
+                member = str(member)
+                if member in scores:
+                    ordered.pop(bisect_left(ordered, (scores[member], member)))
+                scores[member] = score
+                insort(ordered, (score, member))
+
+    def zrem(self, key, *members):
+        with self._lock:
+            scores, ordered = self._get(key)
+            for member in map(str, members):
+                if member in scores:
+                    ordered.pop(bisect_left(ordered, (scores.pop(member), member)))
+
+    def zscore(self, key, member):
+        with self._lock:
+            return self._get(key)[0].get(str(member))
+
+    def zrevrank(self, key, member):
+        with self._lock:
+            scores, ordered = self._get(key)
+            member = str(member)
+            if member not in scores:
+                return None
+            return len(ordered) - 1 - bisect_left(ordered, (scores[member], member))
+
+    def zrevrange(self, key, start, end, withscores=False):
+        with self._lock:
+            ordered = self._get(key)[1][::-1]
+            # Redis ranges are inclusive and accept negative indexes
+            end = len(ordered) + end if end < 0 else end
+            items = ordered[max(start, 0):end + 1]
+            if withscores:
+                return [(member, score) for score, member in items]
+            return [member for _, member in items]
+
+    def zcard(self, key):
+        with self._lock:
+            return len(self._get(key)[0])
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._sets.pop(key, None)
+
+    def rename(self, src, dst):
+        with self._lock:
+            self._sets[dst] = self._sets.pop(src)
+
+
+class UserPointsRanking:
+    """
+    The sorted set commands answered from UserPoints, for deployments
+    without REDIS_URL. Balances already live there, so writes are no-ops
+    and every process sees the same ranking. Ranges walk the
+    (-total_points, user) index; a rank is an index count, O(rank) rather
+    than Redis' O(log n). Equal scores are ordered by user id.
+    """
+
+    def _ranked(self):
+        return UserPoints.objects.order_by('-total_points', 'user_id')
+
+    def zadd(self, key, mapping):
+        pass
+
+    def zrem(self, key, *members):
+        pass
+
+    def zscore(self, key, member):
+        return UserPoints.objects.filter(user_id=int(member)).values_list('total_points', flat=True).first()
+
+    def zrevrank(self, key, member):
+        score = self.zscore(key, member)
+        if score is None:
+            return None
+        return UserPoints.objects.filter(
+            Q(total_points__gt=score) | Q(total_points=score, user_id__lt=int(member))
+        ).count()
+
+    def zrevrange(self, key, start, end, withscores=False):
+        ranked = self._ranked()
+        items = ranked[start:] if end < 0 else ranked[start:end + 1]
+        rows = list(items.values_list('user_id', 'total_points'))
+        if withscores:
+            return [(str(user_id), points) for user_id, points in rows]
+        return [str(user_id) for user_id, _ in rows]
+
+    def zcard(self, key):
+        return UserPoints.objects.count()
+
+    def delete(self, *keys):
+        pass
+
+    def rename(self, src, dst):
+        pass
+
+
+class Leaderboard:
+    """
+    Points ranking kept in a sorted set keyed by user id. Balances are
+    written as absolute scores, so replaying an update is harmless. Rank
+    and range lookups are O(log n) in Redis; ranks are 1-based.
+    """
+
+    def __init__(self, key='leaderboard:points', store=None):
+        self.key = key
+        self._store = store
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        with self._lock:
+            if self._store is None:
+                if settings.REDIS_URL:
+                    import redis
+                    self._store = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+                else:
+                    self._store = UserPointsRanking()
+            return self._store
+
+    def record(self, user_id, total_points):
+        self.store.zadd(self.key, {str(user_id): total_points})
+
+    def remove(self, user_id):
+        self.store.zrem(self.key, str(user_id))
+
+    def record_on_commit(self, *user_ids):
+        """
+        Record the users' balances once the surrounding transaction commits;
+        failures are only logged. Balances are read in the callback, so a
+        late callback cannot overwrite a newer commit with an older balance.
+        """
+        if isinstance(self.store, UserPointsRanking):
+            return
+
+        def write():
+            # The database stays the source of truth; rebuild_leaderboard repairs missed writes
+            try:
+                balances = dict(UserPoints.objects.filter(user_id__in=user_ids).values_list('user_id', 'total_points'))
+                if balances:
+                    self.store.zadd(self.key, {str(user_id): points for user_id, points in balances.items()})
+                removed = [str(user_id) for user_id in user_ids if user_id not in balances]
+                if removed:
+                    self.store.zrem(self.key, *removed)
+            except Exception as e:
+                logger.warning(f"Could not update leaderboard for users {list(user_ids)}: {str(e)}")
+        transaction.on_commit(write)
+
+    def size(self):
+        return self.store.zcard(self.key)
+
+    def top(self, limit):
+        """Return [(rank, user_id, points)] for the first limit users."""
+        return self._range(0, limit - 1)
+
+    def around(self, user_id, radius):
+        """
+        Return (rank, points, neighbours) for user_id, where neighbours holds
+        up to radius entries on each side including the user; None if unranked.
+        """
+        position = self.store.zrevrank(self.key, str(user_id))
+        if position is None:
+            return None
+        neighbours = self._range(max(position - radius, 0), position + radius)
+        points = next(points for rank, member, points in neighbours if member == user_id)
+        return position + 1, points, neighbours
+
+    def _range(self, start, end):
+        entries = self.store.zrevrange(self.key, start, end, withscores=True)
+        return [
+            (start + offset + 1, int(member), int(score))
+            for offset, (member, score) in enumerate(entries)
+        ]
+
+    def rebuild(self, rows, chunk_size=1000):
+        """
+        Replace the ranking with (user_id, total_points) rows. The new set is
+        filled under a temporary key and swapped in, so readers never see a
+        half-built leaderboard. Returns the number of users written.
+        """
+        temp_key = f"{self.key}:rebuild:{uuid.uuid4().hex}"
+        store = self.store
+
+        count = 0
+        chunk = {}
+        for user_id, total_points in rows:
+            chunk[str(user_id)] = total_points
+            if len(chunk) >= chunk_size:
+                store.zadd(temp_key, chunk)
+                count += len(chunk)
+                chunk = {}
+        if chunk:
+            store.zadd(temp_key, chunk)
+            count += len(chunk)
+
+        if count:
+            store.rename(temp_key, self.key)
+        else:
+            store.delete(self.key)
+        logger.info(f"Rebuilt leaderboard with {count} users")
+        return count
+
+    def rebuild_from_db(self, chunk_size=1000):
+        if isinstance(self.store, UserPointsRanking):
+            return self.size()
+        rows = UserPoints.objects.values_list('user_id', 'total_points').iterator(chunk_size=chunk_size)
+        return self.rebuild(rows, chunk_size=chunk_size)
+
+    def seed_if_empty(self):
+        """Fill an empty ranking from UserPoints, e.g. after Redis lost its data."""
+        if not isinstance(self.store, UserPointsRanking) and self.size() == 0:
+            self.rebuild_from_db()
+
+
+leaderboard = Leaderboard()
@@ -0,0 +1,51 @@
+from datetime import date, datetime, time, timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from gamification.models import DailyPointsRollup, PointsTransaction
+
+
+def _midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class Command(BaseCommand):
+    help = 'Rebuild daily points rollups from PointsTransaction history, a few days at a time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-days', type=int, default=7, help='Days of transactions aggregated per batch')
+        parser.add_argument('--since', type=date.fromisoformat, help='First day to rebuild (YYYY-MM-DD); defaults to the first transaction')
+
+    def handle(self, *args, **options):
+        first = PointsTransaction.objects.aggregate(first=Min('timestamp'))['first']
+        if first is None:
+            self.stdout.write("No points transactions to roll up")
+            return
+
+        day = options['since'] or timezone.localtime(first).date()
+        stop = timezone.localdate() + timedelta(days=1)
+        rows_written = 0
+
+        while day < stop:
+            end = min(day + timedelta(days=options['chunk_days']), stop)
+            totals = (
+                PointsTransaction.objects
+                .filter(timestamp__gte=_midnight(day), timestamp__lt=_midnight(end))
+                .annotate(day=TruncDate('timestamp'))
+                .values('user_id', 'day')
+                .annotate(points=Sum('amount'))
+            )
+            # Rows in the window are recomputed, not added to, so the command can be re-run
+            with transaction.atomic():
+                DailyPointsRollup.objects.filter(day__gte=day, day__lt=end).delete()
+                created = DailyPointsRollup.objects.bulk_create(
+                    [DailyPointsRollup(user_id=row['user_id'], day=row['day'], points=row['points']) for row in totals],
+                    batch_size=1000
+                )
+            rows_written += len(created)
+            self.stdout.write(f"Rolled up {day} to {end - timedelta(days=1)}: {len(created)} rows")
+            day = end
+
+        self.stdout.write(self.style.SUCCESS(f"Backfill done: {rows_written} daily rollup rows"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from gamification.outbox import missing_shared_backends, process_outbox
+import time
+
+
+class Command(BaseCommand):
+    help = 'Apply queued gamification events (points, badges, notifications) in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Events applied per transaction')
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for new events')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to wait when the outbox is empty')
+
+    def handle(self, *args, **options):
+        missing = missing_shared_backends()
+        if missing:
+            raise CommandError(
+                f"No shared {' or '.join(missing)} configured: set REDIS_URL so the web processes "
+                f"see the worker's badges, counters and pushes, or turn GAMIFICATION_OUTBOX off"
+            )
+
+        total = 0
+        while True:
+            applied = process_outbox(batch_size=options['batch_size'])
+            total += applied
+            if applied:
+                self.stdout.write(f"Applied {applied} events ({total} so far)")
+                continue
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"Outbox drained: {total} events applied"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from gamification.leaderboard import leaderboard
+import time
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the ranked leaderboard from UserPoints.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Users written to the sorted set per call')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = leaderboard.rebuild_from_db(chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Leaderboard rebuilt: {count} users in {elapsed:.2f}s"))
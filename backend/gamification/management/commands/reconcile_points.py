@@ -0,0 +1,81 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Max, Min
+from gamification.reconcile import reconcile_shard
+import django
+import os
+import time
+
+
+def _init_worker(settings_module):
+    # Spawned workers (macOS, Windows) start without Django configured
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Check UserPoints balances against the PointsTransaction ledger, one user-id shard per worker process.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shard-size', type=int, default=50000, help='User ids per shard')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes; 1 runs shards in this process')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Balances repaired per UPDATE')
+        parser.add_argument('--fix', action='store_true', help='Repair mismatched balances instead of only reporting them')
+        parser.add_argument('--show', type=int, default=20, help='Mismatches to list in the report')
+
+    def handle(self, *args, **options):
+        bounds = get_user_model().objects.aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            self.stdout.write("No users to reconcile")
+            return
+
+        shard_size = options['shard_size']
+        shards = [
+            (low, low + shard_size)
+            for low in range(bounds['low'], bounds['high'] + 1, shard_size)
+        ]
+        args = (options['fix'], options['batch_size'])
+        started = time.perf_counter()
+
+        if options['workers'] > 1 and len(shards) > 1:
+            # Forked workers must not share this process's database connections
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=min(options['workers'], len(shards)),
+                initializer=_init_worker,
+                initargs=(os.environ['DJANGO_SETTINGS_MODULE'],)
+            ) as pool:
+                futures = {pool.submit(reconcile_shard, low, high, *args): (low, high) for low, high in shards}
+                results = [(futures[future], future.result()) for future in as_completed(futures)]
+        else:
+            results = [((low, high), reconcile_shard(low, high, *args)) for low, high in shards]
+
+        elapsed = time.perf_counter() - started
+        checked = 0
+        mismatched = []
+        missing = []
+        for (low, high), (shard_checked, shard_mismatched, shard_missing) in sorted(results):
+            checked += shard_checked
+            mismatched += shard_mismatched
+            missing += shard_missing
+            if options['verbosity'] > 1:
+                self.stdout.write(f"Users {low}-{high - 1}: {shard_checked} checked, {len(shard_mismatched) + len(shard_missing)} off")
+
+        for user_id, stored, expected in mismatched[:options['show']]:
+            self.stdout.write(f"User {user_id}: balance {stored}, ledger {expected} ({expected - stored:+d})")
+        for user_id, expected in missing[:options['show']]:
+            self.stdout.write(f"User {user_id}: no points account, ledger {expected}")
+
+        rate = checked / elapsed if elapsed else 0
+        summary = (
+            f"Checked {checked} users in {len(shards)} shards in {elapsed:.2f}s ({rate:.0f} users/s): "
+            f"{len(mismatched)} mismatched balances, {len(missing)} missing accounts"
+        )
+        if options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"{summary}, all repaired"))
+        elif mismatched or missing:
+            self.stdout.write(self.style.WARNING(f"{summary}; re-run with --fix to repair"))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
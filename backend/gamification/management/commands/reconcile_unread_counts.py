@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from gamification.models import Notification
+from gamification.unread import UNREAD_TTL, cache_is_shared, unread_key
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Compare cached unread-notification counters with the database and fix any that drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users checked per cache round trip')
+
+    def handle(self, *args, **options):
+        if not cache_is_shared():
+            self.stdout.write("No shared cache configured: unread counts are read from the database, nothing to reconcile")
+            return
+
+        batch_size = options['batch_size']
+        checked = fixed = 0
+        last_id = 0
+
+        while True:
+            user_ids = list(
+                User.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not user_ids:
+                break
+            last_id = user_ids[-1]
+
+            actual = dict(
+                Notification.objects.filter(user_id__in=user_ids, is_read=False)
+                .values('user_id')
+                .annotate(unread=Count('id'))
+                .values_list('user_id', 'unread')
+            )
+            cached = cache.get_many([unread_key(user_id) for user_id in user_ids])
+
+            # Only counters that are cached can be wrong; missing ones are recounted on read
+            drifted = {}
+            for user_id in user_ids:
+                key = unread_key(user_id)
+                if key in cached and cached[key] != actual.get(user_id, 0):
+                    drifted[key] = actual.get(user_id, 0)
+            if drifted:
+                cache.set_many(drifted, UNREAD_TTL)
+
+            checked += len(user_ids)
+            fixed += len(drifted)
+
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} users, fixed {fixed} unread counters"))
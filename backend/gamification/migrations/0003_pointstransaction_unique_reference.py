@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-18 13:21
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Min, Sum
+
+
+def drop_duplicate_credits(apps, schema_editor):
+    """Keep the first transaction per (source, reference_id) and take the double-credited points back."""
+    PointsTransaction = apps.get_model('gamification', 'PointsTransaction')
+    UserPoints = apps.get_model('gamification', 'UserPoints')
+
+    duplicates = (
+        PointsTransaction.objects
+        .values('source', 'reference_id')
+        .annotate(first_id=Min('id'), copies=Count('id'))
+        .filter(copies__gt=1)
+    )
+    for duplicate in duplicates:
+        extra = PointsTransaction.objects.filter(
+            source=duplicate['source'],
+            reference_id=duplicate['reference_id']
+        ).exclude(id=duplicate['first_id'])
+        for row in extra.values('user_id').annotate(excess=Sum('amount')):
+            UserPoints.objects.filter(user_id=row['user_id'], total_points__gte=row['excess']).update(
+                total_points=F('total_points') - row['excess']
+            )
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_credits, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='pointstransaction',
+            constraint=models.UniqueConstraint(fields=('source', 'reference_id'), name='unique_points_transaction_reference'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-18 13:41
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0005_notification_user_is_read_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('task', 'Task Completion'), ('sustainability', 'Sustainability Action'), ('bonus', 'Bonus')], max_length=20)),
+                ('reference_id', models.UUIDField()),
+                ('amount', models.IntegerField(validators=[django.core.validators.MinValueValidator(0)])),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source', 'reference_id'), name='unique_outbox_event_reference')],
+            },
+        ),
+    ]
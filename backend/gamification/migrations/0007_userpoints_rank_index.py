@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 14:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0006_outboxevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userpoints',
+            index=models.Index(fields=['-total_points', 'user'], name='gamification_points_rank_idx'),
+        ),
+    ]
@@ -32,17 +32,68 @@ class UserPoints(models.Model):
     total_points = models.IntegerField(default=0, validators=[MinValueValidator(0)])
     last_updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Serves the leaderboard when it is read from the database
+            models.Index(fields=['-total_points', 'user'], name='gamification_points_rank_idx'),
+        ]
+
+POINTS_SOURCES = [
+    ('task', 'Task Completion'),
+    ('sustainability', 'Sustainability Action'),
+    ('bonus', 'Bonus'),
+]
+
 class PointsTransaction(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='points_transactions')
     amount = models.IntegerField(validators=[MinValueValidator(0)])
-    source = models.CharField(max_length=20, choices=[
-        ('task', 'Task Completion'),
-        ('sustainability', 'Sustainability Action'),
-        ('bonus', 'Bonus'),
-    ])
+    source = models.CharField(max_length=20, choices=POINTS_SOURCES)
     reference_id = models.UUIDField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # One credit per source object, so replayed saves cannot pay out twice
+            models.UniqueConstraint(
+                fields=['source', 'reference_id'],
+                name='unique_points_transaction_reference',
+            ),
+        ]
+
+
+class OutboxEvent(models.Model):
+    """
+    Points waiting to be credited, written in the same transaction as the
+    Task or SustainabilityAction that earned them and applied in batches
+    by the process_gamification_outbox command.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    source = models.CharField(max_length=20, choices=POINTS_SOURCES)
+    reference_id = models.UUIDField()
+    amount = models.IntegerField(validators=[MinValueValidator(0)])
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # Saving the same object twice before a drain queues it once
+            models.UniqueConstraint(fields=['source', 'reference_id'], name='unique_outbox_event_reference'),
+        ]
+
+
+class DailyPointsRollup(models.Model):
+    """Points a user earned on one day, kept up to date by the points ledger."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_points')
+    day = models.DateField()
+    points = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day'], name='unique_daily_points_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+
 
 class Notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='gamification_notifications')
@@ -57,6 +108,11 @@ class Notification(models.Model):
         related_name='notifications'
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'is_read']),
+        ]
+
     def __str__(self):
         return f"Notification for {self.user.username}: {self.message}"
 
@@ -0,0 +1,77 @@
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from django.db import transaction
+from sustainability.models import SustainabilityAction
+from tasks.models import Task
+from .badges import award_badges, badge_index
+from .models import OutboxEvent
+from .services import credit_many
+from .unread import cache_is_shared
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_points(events):
+    """
+    Queue (user_id, source, reference_id, amount) credits in the caller's
+    transaction, so they commit or roll back with the save that earned them.
+    """
+    OutboxEvent.objects.bulk_create(
+        [
+            OutboxEvent(user_id=user_id, source=source, reference_id=reference_id, amount=amount)
+            for user_id, source, reference_id, amount in events
+        ],
+        ignore_conflicts=True
+    )
+
+
+def missing_shared_backends():
+    """
+    Name the backends the outbox worker would only reach in its own
+    memory: the cache holds the badge index version and unread counters,
+    the channel layer carries socket pushes. Both must be shared (Redis)
+    for the web processes to see what the worker does.
+    """
+    missing = []
+    if not cache_is_shared():
+        missing.append('cache')
+    layer = get_channel_layer()
+    if layer is None or isinstance(layer, InMemoryChannelLayer):
+        missing.append('channel layer')
+    return missing
+
+
+def process_outbox(batch_size=500):
+    """
+    Apply up to batch_size queued events: one ledger credit per user, one
+    badge evaluation per user and one bulk insert of badges and
+    notifications for the whole batch. Returns the number of events applied.
+    Rows are locked with SKIP LOCKED, so several workers can drain at once.
+    """
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True).order_by('id')[:batch_size]
+        )
+        if not events:
+            return 0
+
+        balances = credit_many(
+            (event.user_id, event.amount, event.source, event.reference_id)
+            for event in events
+        )
+        award_badges([
+            (user_id, badge_id, name)
+            for user_id, (old_total, new_total) in balances.items()
+            for badge_id, name in badge_index.crossed(old_total, new_total)
+        ])
+
+        references = {'task': [], 'sustainability': []}
+        for event in events:
+            references.setdefault(event.source, []).append(event.reference_id)
+        Task.objects.filter(id__in=references['task']).update(points_processed=True)
+        SustainabilityAction.objects.filter(id__in=references['sustainability']).update(points_processed=True)
+
+        OutboxEvent.objects.filter(id__in=[event.id for event in events]).delete()
+
+    logger.info(f"Applied {len(events)} outbox events for {len(balances)} users")
+    return len(events)
@@ -0,0 +1,32 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def user_group(user_id):
+    """Channel layer group holding every open gamification socket of a user."""
+    return f"user.{user_id}"
+
+
+def push_to_user(user_id, event, data):
+    """
+    Send {'type': event, 'data': data} to the user's open sockets once the
+    surrounding transaction commits. data must be JSON-serializable. Push is
+    best effort: clients refetch over HTTP when they reconnect.
+    """
+    def send():
+        layer = get_channel_layer()
+        if layer is None:
+            return
+        try:
+            async_to_sync(layer.group_send)(user_group(user_id), {
+                'type': 'gamification.event',
+                'event': event,
+                'data': data,
+            })
+        except Exception as e:
+            logger.warning(f"Could not push {event} event to user {user_id}: {str(e)}")
+    transaction.on_commit(send)
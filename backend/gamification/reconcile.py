@@ -0,0 +1,62 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Sum, Value, When
+from users.models import User
+from .leaderboard import leaderboard
+from .models import UserPoints
+
+
+def reconcile_shard(low, high, fix=False, batch_size=1000):
+    """
+    Compare UserPoints.total_points with the sum of PointsTransaction.amount
+    for users with low <= user_id < high. One grouped query returns each
+    user's balance (null without an account) and ledger sum (null without
+    transactions), so everything is read from the same snapshot in a
+    single scan. With fix=True drifted balances are shifted by their
+    difference (not overwritten), so credits that land while the job runs
+    are kept.
+
+    Returns (users checked, [(user_id, stored, expected)], [(user_id, expected)]
+    for users with transactions but no points account).
+    """
+    rows = (
+        User.objects
+        .filter(id__gte=low, id__lt=high)
+        .values('id')
+        .annotate(
+            stored=Max('points_account__total_points'),
+            expected=Sum('points_transactions__amount'),
+        )
+        .order_by()
+        .values_list('id', 'stored', 'expected')
+    )
+    checked = 0
+    mismatched = []
+    missing = []
+    for user_id, stored, expected in rows.iterator(chunk_size=batch_size):
+        if stored is None:
+            if expected is not None:
+                missing.append((user_id, expected))
+            continue
+        checked += 1
+        if stored != (expected or 0):
+            mismatched.append((user_id, stored, expected or 0))
+
+    if fix:
+        with transaction.atomic():
+            for start in range(0, len(mismatched), batch_size):
+                chunk = mismatched[start:start + batch_size]
+                UserPoints.objects.filter(user_id__in=[user_id for user_id, _, _ in chunk]).update(
+                    total_points=F('total_points') + Case(
+                        *[When(user_id=user_id, then=Value(expected - stored)) for user_id, stored, expected in chunk],
+                        output_field=IntegerField(),
+                    )
+                )
+            UserPoints.objects.bulk_create(
+                [UserPoints(user_id=user_id, total_points=expected) for user_id, expected in missing],
+                ignore_conflicts=True,
+                batch_size=batch_size
+            )
+            repaired = [user_id for user_id, _, _ in mismatched] + [user_id for user_id, _ in missing]
+            leaderboard.record_on_commit(*repaired)
+
+    return checked, mismatched, missing
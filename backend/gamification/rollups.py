@@ -0,0 +1,64 @@
+from datetime import timedelta
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+from .models import DailyPointsRollup
+
+PERIODS = ('week', 'month')
+
+
+def add_to_daily_rollups(rows):
+    """
+    Add points to each (user_id, day, points) rollup row, creating missing
+    rows, with one INSERT ... ON CONFLICT DO UPDATE statement.
+    """
+    if not rows:
+        return
+    table = connection.ops.quote_name(DailyPointsRollup._meta.db_table)
+    values = ', '.join(['(%s, %s, %s)'] * len(rows))
+    params = []
+    for user_id, day, points in rows:
+        params += [user_id, connection.ops.adapt_datefield_value(day), points]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (user_id, day, points) VALUES {values} "
+            f"ON CONFLICT (user_id, day) DO UPDATE SET points = {table}.points + EXCLUDED.points",
+            params
+        )
+
+
+def period_start(period, today=None):
+    """First day of the current calendar week (Monday) or month."""
+    today = today or timezone.localdate()
+    if period == 'week':
+        return today - timedelta(days=today.weekday())
+    if period == 'month':
+        return today.replace(day=1)
+    raise ValueError(f"Unknown leaderboard period: {period}")
+
+
+def period_leaderboard(period, limit):
+    """Return [(rank, user_id, points)] for the top users of the current week or month."""
+    rows = (
+        DailyPointsRollup.objects
+        .filter(day__gte=period_start(period))
+        .values('user_id')
+        .annotate(points=Sum('points'))
+        .order_by('-points', 'user_id')[:limit]
+    )
+    return [(rank, row['user_id'], row['points']) for rank, row in enumerate(rows, start=1)]
+
+
+def points_trend(user_id, days):
+    """Return [{'day', 'points'}] for the last days days, with zeros for days without points."""
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    earned = dict(
+        DailyPointsRollup.objects
+        .filter(user_id=user_id, day__gte=start)
+        .values_list('day', 'points')
+    )
+    return [
+        {'day': day, 'points': earned.get(day, 0)}
+        for day in (start + timedelta(days=offset) for offset in range(days))
+    ]
@@ -0,0 +1,6 @@
+from django.urls import path
+from .consumers import GamificationConsumer
+
+websocket_urlpatterns = [
+    path('ws/gamification/', GamificationConsumer.as_asgi()),
+]
@@ -0,0 +1,107 @@
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from .leaderboard import leaderboard
+from .models import PointsTransaction, UserPoints
+from .push import push_to_user
+from .rollups import add_to_daily_rollups
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _increment_balance(user_id, amount):
+    """Add amount to the user's balance with one UPDATE ... RETURNING and return the new total."""
+    table = connection.ops.quote_name(UserPoints._meta.db_table)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET total_points = total_points + %s, last_updated = %s "
+            f"WHERE user_id = %s RETURNING total_points",
+            [amount, now, user_id]
+        )
+        row = cursor.fetchone()
+
+    if row is None:
+        # Accounts are created alongside the user; older users may not have one yet
+        UserPoints.objects.get_or_create(user_id=user_id)
+        return _increment_balance(user_id, amount)
+
+    balance = row[0]
+    leaderboard.record_on_commit(user_id)
+    push_to_user(user_id, 'points', {'total_points': balance})
+    return balance
+
+
+def credit_points(user_id, amount, source, reference_id):
+    """
+    Credit amount points to a user once per (source, reference_id).
+    Returns the new balance, or None if that reference was already credited.
+    """
+    with transaction.atomic():
+        try:
+            # The unique (source, reference_id) constraint rejects replays
+            with transaction.atomic():
+                PointsTransaction.objects.create(
+                    user_id=user_id,
+                    amount=amount,
+                    source=source,
+                    reference_id=reference_id
+                )
+        except IntegrityError:
+            logger.info(f"Skipping duplicate {source} credit for reference {reference_id}")
+            return None
+        add_to_daily_rollups([(user_id, timezone.localdate(), amount)])
+        return _increment_balance(user_id, amount)
+
+
+def credit_many(entries):
+    """
+    Credit a batch of (user_id, amount, source, reference_id) entries with one
+    transaction insert and one balance update per user. References that were
+    already credited are skipped. Returns {user_id: (old balance, new balance)}
+    for every user whose balance changed.
+    """
+    entries = list(entries)
+    if not entries:
+        return {}
+
+    with transaction.atomic():
+        known = set(
+            PointsTransaction.objects.filter(
+                reference_id__in={entry[3] for entry in entries}
+            ).values_list('source', 'reference_id')
+        )
+        new_entries = []
+        for user_id, amount, source, reference_id in entries:
+            if (source, reference_id) not in known:
+                known.add((source, reference_id))
+                new_entries.append((user_id, amount, source, reference_id))
+
+        try:
+            with transaction.atomic():
+                PointsTransaction.objects.bulk_create([
+                    PointsTransaction(user_id=user_id, amount=amount, source=source, reference_id=reference_id)
+                    for user_id, amount, source, reference_id in new_entries
+                ])
+        except IntegrityError:
+            # Another writer credited one of these references since the check above
+            logger.info(f"Concurrent credit detected, crediting {len(new_entries)} entries one by one")
+            balances = {}
+            for user_id, amount, source, reference_id in new_entries:
+                balance = credit_points(user_id, amount, source, reference_id)
+                if balance is not None:
+                    old_balance = balances.get(user_id, (balance - amount,))[0]
+                    balances[user_id] = (old_balance, balance)
+            return balances
+
+        totals = {}
+        for user_id, amount, _, _ in new_entries:
+            totals[user_id] = totals.get(user_id, 0) + amount
+        # A fixed lock order keeps concurrent batches from deadlocking
+        today = timezone.localdate()
+        add_to_daily_rollups([(user_id, today, totals[user_id]) for user_id in sorted(totals)])
+        balances = {}
+        for user_id in sorted(totals):
+            balance = _increment_balance(user_id, totals[user_id])
+            balances[user_id] = (balance - totals[user_id], balance)
+        return balances
@@ -1,91 +1,111 @@
+from django.conf import settings
+from django.db import transaction
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from users.models import User
-from .models import UserPoints, PointsTransaction, UserBadge, Badge, Notification
+from .badges import award_badge_to_qualified_users, award_badges, badge_index
+from .leaderboard import leaderboard
+from .models import UserPoints, Badge, Notification
+from .outbox import enqueue_points
+from .services import credit_points, credit_many
+from .unread import adjust_unread
 from tasks.models import Task
 from sustainability.models import SustainabilityAction
 
 @receiver(post_save, sender=Task)
 def update_points_from_task(sender, instance, created, **kwargs):
     if instance.is_completed and not getattr(instance, 'points_processed', False):
-        # update user points
-        user = instance.user
-        points_to_add = instance.points_rewarded
-        user_points, created = UserPoints.objects.get_or_create(user=user)
-        user_points.total_points += points_to_add
-        user_points.save()
-
-        # create points transaction
-        PointsTransaction.objects.create(
-            user=user,
-            amount=points_to_add,
-            source='task',
-            reference_id=instance.id
-        )
-
-        check_and_award_badges(user)
+        if settings.GAMIFICATION_OUTBOX:
+            enqueue_points([(instance.user_id, 'task', instance.id, instance.points_rewarded)])
+            return
+
+        balance = credit_points(instance.user_id, instance.points_rewarded, 'task', instance.id)
+        if balance is not None:
+            check_and_award_badges(instance.user_id, balance - instance.points_rewarded, balance)
+
+        # update() rather than save() so post_save does not fire again
+        Task.objects.filter(pk=instance.pk).update(points_processed=True)
         instance.points_processed = True
-        instance.save()
 
 @receiver(post_save, sender=SustainabilityAction)
 def update_points_from_sustainability(sender, instance, created, **kwargs):
     if created and not getattr(instance, 'points_processed', False):
-        user = instance.user
-        points_to_add = instance.points_rewarded
-        user_points, created = UserPoints.objects.get_or_create(user=user)
-        user_points.total_points += points_to_add
-        user_points.save()
-
-        # create points transaction
-        PointsTransaction.objects.create(
-            user=user,
-            amount=points_to_add,
-            source='sustainability',
-            reference_id=instance.id
-        )
-
-        check_and_award_badges(user)
-        instance.points_processed = True
-        instance.save()
+        if settings.GAMIFICATION_OUTBOX:
+            enqueue_points([(instance.user_id, 'sustainability', instance.id, instance.points_earned)])
+            return
 
-def check_and_award_badges(user):
-    user_points = UserPoints.objects.get(user=user)
-    badges = Badge.objects.filter(points_required__lte=user_points.total_points).exclude(
-        id__in=user.badges.values_list('badge', flat=True)
-    )
+        balance = credit_points(instance.user_id, instance.points_earned, 'sustainability', instance.id)
+        if balance is not None:
+            check_and_award_badges(instance.user_id, balance - instance.points_earned, balance)
 
-    for badge in badges:
-        UserBadge.objects.create(user=user, badge=badge)
+        SustainabilityAction.objects.filter(pk=instance.pk).update(points_processed=True)
+        instance.points_processed = True
 
-@receiver(post_save, sender=UserBadge)
-def notify_user_about_new_badge(sender, instance, created, **kwargs):
+def update_points_from_tasks(tasks):
     """
-    Notify the user when they earn a new badge.
+    Batch counterpart of update_points_from_task for tasks written with
+    bulk_create/update, which do not fire post_save. Each user gets one
+    balance update, one batch of transactions and one badge check, or the
+    tasks are queued for the outbox worker when GAMIFICATION_OUTBOX is on.
     """
-    if created:
-        user = instance.user
-        badge = instance.badge
-        message = f"Congratulations! You've earned the '{badge.name}' badge."
-
-        # Create a new notification for the user
-        Notification.objects.create(
-            user=user,
-            message=message,
-            badge=badge
-        )
+    pending = [task for task in tasks if task.is_completed and not task.points_processed]
+    if not pending:
+        return
+    if settings.GAMIFICATION_OUTBOX:
+        enqueue_points((task.user_id, 'task', task.id, task.points_rewarded) for task in pending)
+        return
+
+    balances = credit_many(
+        (task.user_id, task.points_rewarded, 'task', task.id)
+        for task in pending
+    )
+    award_badges([
+        (user_id, badge_id, name)
+        for user_id, (old_total, new_total) in balances.items()
+        for badge_id, name in badge_index.crossed(old_total, new_total)
+    ])
+
+    Task.objects.filter(id__in=[task.id for task in pending]).update(points_processed=True)
+    for task in pending:
+        task.points_processed = True
+
+def check_and_award_badges(user_id, old_total, new_total):
+    """Award the badges whose thresholds a credit from old_total to new_total crossed."""
+    award_badges([
+        (user_id, badge_id, name)
+        for badge_id, name in badge_index.crossed(old_total, new_total)
+    ])
+
+@receiver(post_save, sender=Badge)
+def refresh_badge_index(sender, instance, created, **kwargs):
+    # Again on commit, so processes that reloaded mid-transaction do not keep the old list
+    badge_index.invalidate()
+    transaction.on_commit(badge_index.invalidate)
+    # Balances only move up, so users already past the threshold would never cross it
+    award_badge_to_qualified_users(instance)
+
+@receiver(post_delete, sender=Badge)
+def drop_badge_from_index(sender, instance, **kwargs):
+    badge_index.invalidate()
+    transaction.on_commit(badge_index.invalidate)
 
 @receiver(post_save, sender=User)
-def notify_user_about_new_badge(sender, instance, created, **kwargs):
+def create_points_account(sender, instance, created, **kwargs):
 
     if created:
         UserPoints.objects.create(user = instance)
+        leaderboard.record_on_commit(instance.id)
 
+@receiver(post_delete, sender=UserPoints)
+def drop_from_leaderboard(sender, instance, **kwargs):
+    transaction.on_commit(lambda: leaderboard.remove(instance.user_id))
 
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        adjust_unread(instance.user_id, 1)
 
-
-
-
-
-
-
-
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_unread(instance.user_id, -1)
@@ -1,3 +1,550 @@
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connection, connections
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from datetime import timedelta
+from io import StringIO
+from green_living_hub.asgi import application
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from unittest import mock
+from tasks.models import Task
+from users.models import User
+from .badges import award_badges, badge_index
+from .leaderboard import InMemorySortedSet, UserPointsRanking, leaderboard
+from .models import Badge, DailyPointsRollup, Notification, OutboxEvent, PointsTransaction, UserBadge, UserPoints
+from .outbox import missing_shared_backends, process_outbox
+from .reconcile import reconcile_shard
+from .rollups import period_leaderboard, points_trend
+from .services import credit_many, credit_points
+from .signals import check_and_award_badges
+from .unread import unread_count, unread_key
+import multiprocessing
+import os
+import tempfile
+import uuid
 
-# Create your tests here.
+
+class PointsLedgerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='ledger@example.com', username='ledger', password='pass')
+
+    def test_credit_returns_new_balance(self):
+        self.assertEqual(credit_points(self.user.id, 10, 'bonus', uuid.uuid4()), 10)
+        self.assertEqual(credit_points(self.user.id, 5, 'bonus', uuid.uuid4()), 15)
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, 15)
+
+    def test_replayed_reference_is_credited_once(self):
+        reference_id = uuid.uuid4()
+        self.assertEqual(credit_points(self.user.id, 10, 'task', reference_id), 10)
+        self.assertIsNone(credit_points(self.user.id, 10, 'task', reference_id))
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, 10)
+        self.assertEqual(PointsTransaction.objects.filter(reference_id=reference_id).count(), 1)
+
+    def test_credit_creates_missing_account(self):
+        UserPoints.objects.filter(user=self.user).delete()
+        self.assertEqual(credit_points(self.user.id, 7, 'bonus', uuid.uuid4()), 7)
+
+    def test_credit_many_skips_known_references(self):
+        other = User.objects.create_user(email='other@example.com', username='other', password='pass')
+        known = uuid.uuid4()
+        credit_points(self.user.id, 10, 'task', known)
+
+        balances = credit_many([
+            (self.user.id, 10, 'task', known),
+            (self.user.id, 3, 'task', uuid.uuid4()),
+            (other.id, 4, 'task', uuid.uuid4()),
+            (other.id, 6, 'task', uuid.uuid4()),
+        ])
+        self.assertEqual(balances, {self.user.id: (10, 13), other.id: (0, 10)})
+        self.assertEqual(PointsTransaction.objects.count(), 4)
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        other = User.objects.create_user(email='other@example.com', username='other', password='pass')
+        credit_points(self.user.id, 10, 'bonus', uuid.uuid4())
+        credit_points(other.id, 4, 'bonus', uuid.uuid4())
+        UserPoints.objects.filter(user=self.user).update(total_points=25)
+        UserPoints.objects.filter(user=other).delete()
+
+        out = StringIO()
+        call_command('reconcile_points', workers=1, shard_size=1, stdout=out)
+        self.assertIn('1 mismatched balances, 1 missing accounts', out.getvalue())
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, 25)
+
+        call_command('reconcile_points', workers=1, fix=True, stdout=StringIO())
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, 10)
+        self.assertEqual(UserPoints.objects.get(user=other).total_points, 4)
+
+    def test_reconcile_reads_a_shard_in_one_query(self):
+        other = User.objects.create_user(email='other@example.com', username='other', password='pass')
+        idle = User.objects.create_user(email='idle@example.com', username='idle', password='pass')
+        for amount in (10, 5):
+            credit_points(self.user.id, amount, 'bonus', uuid.uuid4())
+        credit_points(other.id, 4, 'bonus', uuid.uuid4())
+        UserPoints.objects.filter(user=self.user).update(total_points=25)
+        UserPoints.objects.filter(user=other).delete()
+
+        with self.assertNumQueries(1):
+            result = reconcile_shard(0, idle.id + 1)
+        self.assertEqual(result, (2, [(self.user.id, 25, 15)], [(other.id, 4)]))
+
+
+class BadgeAwardTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='badges@example.com', username='badges', password='pass')
+        self.bronze = Badge.objects.create(name='Bronze', description='', icon='https://example.com/b.png', points_required=100)
+        self.silver = Badge.objects.create(name='Silver', description='', icon='https://example.com/s.png', points_required=250)
+        self.gold = Badge.objects.create(name='Gold', description='', icon='https://example.com/g.png', points_required=500)
+
+    def test_awards_only_crossed_thresholds(self):
+        check_and_award_badges(self.user.id, 90, 260)
+        self.assertEqual(
+            set(UserBadge.objects.filter(user=self.user).values_list('badge__name', flat=True)),
+            {'Bronze', 'Silver'}
+        )
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 2)
+
+    def test_repeated_award_notifies_once(self):
+        UserBadge.objects.create(user=self.user, badge=self.bronze)
+        with mock.patch('gamification.badges.push_to_user') as push:
+            award_badges([
+                (self.user.id, self.bronze.id, 'Bronze'),
+                (self.user.id, self.silver.id, 'Silver'),
+                (self.user.id, self.silver.id, 'Silver'),
+            ])
+        self.assertEqual(UserBadge.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(list(Notification.objects.filter(user=self.user).values_list('badge__name', flat=True)), ['Silver'])
+        self.assertEqual([call.args[1] for call in push.call_args_list], ['badge', 'notification'])
+
+        with mock.patch('gamification.badges.push_to_user') as push:
+            award_badges([(self.user.id, self.silver.id, 'Silver')])
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 1)
+        push.assert_not_called()
+
+    def test_threshold_is_inclusive(self):
+        check_and_award_badges(self.user.id, 499, 500)
+        self.assertEqual(list(UserBadge.objects.filter(user=self.user).values_list('badge__name', flat=True)), ['Gold'])
+
+    def test_credit_crossing_nothing_runs_no_queries(self):
+        check_and_award_badges(self.user.id, 0, 10)
+        with self.assertNumQueries(0):
+            check_and_award_badges(self.user.id, 110, 240)
+
+    def test_new_badge_goes_to_users_already_past_it(self):
+        UserPoints.objects.filter(user=self.user).update(total_points=80)
+        Badge.objects.create(name='Starter', description='', icon='https://example.com/st.png', points_required=50)
+        self.assertTrue(UserBadge.objects.filter(user=self.user, badge__name='Starter').exists())
+
+    @override_settings(GAMIFICATION_OUTBOX=False)
+    def test_completing_task_awards_badge(self):
+        credit_points(self.user.id, 90, 'bonus', uuid.uuid4())
+        task = Task.objects.create(user=self.user, title='Run', category='exercise', due_date='2026-01-01', points_rewarded=20)
+        task.is_completed = True
+        task.save()
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, 110)
+        self.assertTrue(UserBadge.objects.filter(user=self.user, badge=self.bronze).exists())
+
+
+class LeaderboardTests(TestCase):
+    store_class = InMemorySortedSet
+
+    def setUp(self):
+        patcher = mock.patch.object(leaderboard, '_store', self.store_class())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.users = [
+            User.objects.create_user(email=f'rank{n}@example.com', username=f'rank{n}', password='pass')
+            for n in range(6)
+        ]
+        for n, user in enumerate(self.users):
+            UserPoints.objects.filter(user=user).update(total_points=n * 10)
+        leaderboard.rebuild_from_db()
+        self.client = APIClient()
+
+    def test_top_is_ordered_by_points(self):
+        self.client.force_authenticate(self.users[0])
+        response = self.client.get('/api/leaderboard/?limit=3')
+        self.assertEqual(
+            [(entry['rank'], entry['user']['username'], entry['total_points']) for entry in response.data],
+            [(1, 'rank5', 50), (2, 'rank4', 40), (3, 'rank3', 30)]
+        )
+
+    def test_my_rank_with_neighbours(self):
+        self.client.force_authenticate(self.users[2])
+        response = self.client.get('/api/leaderboard/me/?radius=1')
+        self.assertEqual(response.data['rank'], 4)
+        self.assertEqual(response.data['total_points'], 20)
+        self.assertEqual([entry['rank'] for entry in response.data['neighbours']], [3, 4, 5])
+
+    def test_credit_moves_user_up_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            credit_points(self.users[0].id, 100, 'bonus', uuid.uuid4())
+        self.assertEqual(leaderboard.top(1), [(1, self.users[0].id, 100)])
+
+    def test_empty_leaderboard_is_seeded_from_points(self):
+        leaderboard.store.delete(leaderboard.key)
+        self.client.force_authenticate(self.users[0])
+        response = self.client.get('/api/leaderboard/')
+        self.assertEqual(len(response.data), 6)
+
+    def test_late_commit_callback_keeps_the_newer_balance(self):
+        with self.captureOnCommitCallbacks() as first:
+            credit_points(self.users[0].id, 100, 'bonus', uuid.uuid4())
+        with self.captureOnCommitCallbacks() as second:
+            credit_points(self.users[0].id, 50, 'bonus', uuid.uuid4())
+        # The first transaction's callback runs last
+        for callback in second + first:
+            callback()
+        self.assertEqual(leaderboard.top(1), [(1, self.users[0].id, 150)])
+
+    def test_equal_scores(self):
+        # Redis orders equal scores by member, descending, in ZREVRANGE and ZREVRANK
+        UserPoints.objects.filter(user__in=self.users[1:3]).update(total_points=40)
+        leaderboard.rebuild_from_db()
+        tied = sorted((self.users[1].id, self.users[2].id, self.users[4].id), key=str, reverse=True)
+        self.assertEqual([user_id for _, user_id, _ in leaderboard.top(4)], [self.users[5].id] + tied)
+        self.assertEqual(leaderboard.around(tied[1], 0)[0], 3)
+
+
+class DatabaseLeaderboardTests(LeaderboardTests):
+    # The ranking used without REDIS_URL
+    store_class = UserPointsRanking
+
+    def test_equal_scores(self):
+        # Ordered by user id instead, which the rank index covers
+        UserPoints.objects.filter(user__in=self.users[1:3]).update(total_points=40)
+        self.assertEqual(
+            [user_id for _, user_id, _ in leaderboard.top(4)],
+            [self.users[5].id, self.users[1].id, self.users[2].id, self.users[4].id]
+        )
+        self.assertEqual(leaderboard.around(self.users[2].id, 0)[0], 3)
+
+
+class DailyRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='daily@example.com', username='daily', password='pass')
+        self.other = User.objects.create_user(email='daily2@example.com', username='daily2', password='pass')
+
+    def test_credits_accumulate_in_todays_rollup(self):
+        credit_points(self.user.id, 10, 'bonus', uuid.uuid4())
+        credit_many([(self.user.id, 5, 'task', uuid.uuid4()), (self.other.id, 7, 'task', uuid.uuid4())])
+        today = timezone.localdate()
+        self.assertEqual(DailyPointsRollup.objects.get(user=self.user, day=today).points, 15)
+        self.assertEqual(DailyPointsRollup.objects.get(user=self.other, day=today).points, 7)
+
+    def test_period_leaderboard_ignores_older_days(self):
+        today = timezone.localdate()
+        DailyPointsRollup.objects.create(user=self.user, day=today - timedelta(days=40), points=500)
+        DailyPointsRollup.objects.create(user=self.user, day=today, points=10)
+        DailyPointsRollup.objects.create(user=self.other, day=today, points=20)
+        self.assertEqual(period_leaderboard('month', 10), [(1, self.other.id, 20), (2, self.user.id, 10)])
+
+    def test_trend_fills_missing_days(self):
+        today = timezone.localdate()
+        DailyPointsRollup.objects.create(user=self.user, day=today - timedelta(days=1), points=12)
+        trend = points_trend(self.user.id, 3)
+        self.assertEqual([entry['points'] for entry in trend], [0, 12, 0])
+        self.assertEqual(trend[-1]['day'], today)
+
+    def test_backfill_rebuilds_from_transactions(self):
+        credit_points(self.user.id, 10, 'bonus', uuid.uuid4())
+        credit_points(self.user.id, 4, 'bonus', uuid.uuid4())
+        DailyPointsRollup.objects.all().delete()
+        call_command('backfill_points_rollups', stdout=StringIO())
+        call_command('backfill_points_rollups', stdout=StringIO())
+        self.assertEqual(DailyPointsRollup.objects.get(user=self.user).points, 14)
+
+
+class PointsLedgerConcurrencyTests(TransactionTestCase):
+    threads = 16
+    credits_per_thread = 25
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('In-memory SQLite fails concurrent writers instead of making them wait')
+        self.user = User.objects.create_user(email='stress@example.com', username='stress', password='pass')
+
+    def test_concurrent_credits_are_not_lost(self):
+        shared_reference = uuid.uuid4()
+
+        def worker(_):
+            try:
+                for _ in range(self.credits_per_thread):
+                    credit_points(self.user.id, 3, 'bonus', uuid.uuid4())
+                # Every thread replays the same reference; only one may pay out
+                credit_points(self.user.id, 100, 'task', shared_reference)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            list(pool.map(worker, range(self.threads)))
+
+        credits = self.threads * self.credits_per_thread
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, credits * 3 + 100)
+        self.assertEqual(PointsTransaction.objects.filter(user=self.user).count(), credits + 1)
+
+
+class DashboardTests(TestCase):
+    store_class = InMemorySortedSet
+    # Authentication, then one query per section
+    query_budget = 6
+
+    def setUp(self):
+        patcher = mock.patch.object(leaderboard, '_store', self.store_class())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(email='dash@example.com', username='dash', password='pass')
+        for n in range(5):
+            Badge.objects.create(name=f'Level {n}', description='', icon='https://example.com/l.png', points_required=(n + 1) * 10)
+        for n in range(15):
+            task = Task.objects.create(user=self.user, title=f'Task {n}', category='exercise', due_date='2026-01-01', points_rewarded=10)
+            task.is_completed = True
+            task.save()
+        process_outbox()
+        leaderboard.rebuild_from_db()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_all_sections_within_query_budget(self):
+        with self.assertNumQueries(self.query_budget):
+            response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['points']['total_points'], 150)
+        self.assertEqual(len(response.data['badges']), 5)
+        self.assertEqual(response.data['leaderboard'][0]['user']['username'], 'dash')
+        self.assertEqual(len(response.data['transactions']), 10)
+        self.assertEqual(len(response.data['notifications']), 5)
+        self.assertEqual(response.data['notifications'][0]['badge']['name'][:6], 'Level ')
+
+    def test_sections_subset(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/dashboard/?sections=points')
+        self.assertEqual(list(response.data), ['points'])
+
+    def test_unknown_section_is_rejected(self):
+        response = self.client.get('/api/dashboard/?sections=points,friends')
+        self.assertEqual(response.status_code, 400)
+
+
+class DatabaseDashboardTests(DashboardTests):
+    # The ranking used without REDIS_URL reads the leaderboard with one more query
+    store_class = UserPointsRanking
+    query_budget = 7
+
+
+# A cache every process can see, standing in for Redis
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'green-living-hub-test-cache'),
+    }
+}
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class UnreadCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='unread@example.com', username='unread', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def unread(self):
+        return self.client.get('/api/notifications/unread-count/').data['unread']
+
+    def notify(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(user=self.user, message='Hello')
+
+    def test_counter_follows_create_read_and_read_all(self):
+        self.assertEqual(self.unread(), 0)
+        first = self.notify()
+        self.notify()
+        self.notify()
+        self.assertEqual(self.unread(), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/notifications/{first.id}/mark-as-read/')
+            self.client.patch(f'/api/notifications/{first.id}/mark-as-read/')
+        self.assertEqual(self.unread(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/notifications/mark-all-read/')
+        self.assertEqual(self.unread(), 0)
+
+    def test_badge_awards_count_as_unread(self):
+        self.unread()
+        Badge.objects.create(name='One', description='', icon='https://example.com/1.png', points_required=5)
+        Badge.objects.create(name='Two', description='', icon='https://example.com/2.png', points_required=8)
+        with self.captureOnCommitCallbacks(execute=True):
+            check_and_award_badges(self.user.id, 0, 10)
+        self.assertEqual(self.unread(), 2)
+
+    def test_count_is_served_from_cache(self):
+        self.unread()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.unread(), 0)
+
+    def test_reconcile_fixes_drift(self):
+        self.notify()
+        cache.set(unread_key(self.user.id), 7)
+        call_command('reconcile_unread_counts', stdout=StringIO())
+        self.assertEqual(cache.get(unread_key(self.user.id)), 1)
+
+
+class UnsharedUnreadCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='local@example.com', username='local', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_counts_come_from_the_database(self):
+        Notification.objects.create(user=self.user, message='Hello')
+        with self.assertNumQueries(1):
+            self.assertEqual(unread_count(self.user.id), 1)
+        self.assertIsNone(cache.get(unread_key(self.user.id)))
+
+        self.client.post('/api/notifications/mark-all-read/')
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').data['unread'], 0)
+
+    def test_reconcile_has_nothing_to_do(self):
+        out = StringIO()
+        call_command('reconcile_unread_counts', stdout=out)
+        self.assertIn('nothing to reconcile', out.getvalue())
+
+
+@override_settings(GAMIFICATION_OUTBOX=True)
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='outbox@example.com', username='outbox', password='pass')
+        Badge.objects.create(name='Fifty', description='', icon='https://example.com/50.png', points_required=50)
+
+    def complete(self, count):
+        tasks = []
+        for n in range(count):
+            task = Task.objects.create(user=self.user, title=f'Task {n}', category='exercise', due_date='2026-01-01', points_rewarded=10)
+            task.is_completed = True
+            task.save()
+            tasks.append(task)
+        return tasks
+
+    def test_completion_is_queued_not_credited(self):
+        task = self.complete(1)[0]
+        task.save()
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, 0)
+
+    def test_drain_credits_awards_and_marks_processed(self):
+        tasks = self.complete(6)
+        self.assertEqual(process_outbox(), 6)
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, 60)
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 1)
+        self.assertFalse(Task.objects.filter(id__in=[task.id for task in tasks], points_processed=False).exists())
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertEqual(process_outbox(), 0)
+
+    def test_drain_cost_does_not_grow_with_events_per_user(self):
+        Badge.objects.all().delete()
+        badge_index.crossed(0, 0)
+        self.complete(3)
+        with CaptureQueriesContext(connection) as small:
+            process_outbox()
+        self.complete(30)
+        with CaptureQueriesContext(connection) as large:
+            process_outbox()
+        self.assertEqual(len(small), len(large))
+
+    def test_worker_refuses_per_process_backends(self):
+        with self.assertRaisesMessage(CommandError, 'No shared cache or channel layer configured'):
+            call_command('process_gamification_outbox', stdout=StringIO())
+
+
+def drain_outbox_and_exit():
+    try:
+        call_command('process_gamification_outbox', stdout=StringIO())
+    except BaseException:
+        os._exit(1)
+    os._exit(0)
+
+
+@override_settings(GAMIFICATION_OUTBOX=True)
+class OutboxWorkerProcessTests(TransactionTestCase):
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('A worker process cannot open an in-memory test database')
+        missing = missing_shared_backends()
+        if missing:
+            self.skipTest(f"No shared {' or '.join(missing)} for the worker process to write to")
+        cache.clear()
+        self.user = User.objects.create_user(email='worker@example.com', username='worker', password='pass')
+        Badge.objects.create(name='Ten', description='', icon='https://example.com/10.png', points_required=10)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_effects_of_a_separate_worker_reach_the_web_process(self):
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').data['unread'], 0)
+        task = Task.objects.create(user=self.user, title='Run', category='exercise', due_date='2026-01-01', points_rewarded=15)
+        task.is_completed = True
+        task.save()
+
+        connections.close_all()
+        worker = multiprocessing.get_context('fork').Process(target=drain_outbox_and_exit)
+        worker.start()
+        worker.join(timeout=60)
+        self.assertEqual(worker.exitcode, 0)
+
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, 15)
+        self.assertEqual(cache.get(unread_key(self.user.id)), 1)
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').data['unread'], 1)
+        rank, points, _ = leaderboard.around(self.user.id, 0)
+        self.assertEqual((rank, points), (1, 15))
+
+
+def complete_task(task):
+    task.is_completed = True
+    task.save()
+    process_outbox()
+    connection.close()
+
+
+@override_settings(GAMIFICATION_OUTBOX=True)
+class GamificationSocketTests(TransactionTestCase):
+    origin = (b'origin', b'http://localhost:5173')
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='socket@example.com', username='socket', password='pass')
+        Badge.objects.create(name='First Steps', description='', icon='https://example.com/f.png', points_required=10)
+        self.task = Task.objects.create(user=self.user, title='Run', category='exercise', due_date='2026-01-01', points_rewarded=15)
+        self.token = str(AccessToken.for_user(self.user))
+
+    def connect(self, token):
+        return WebsocketCommunicator(application, f'/ws/gamification/?token={token}', headers=[self.origin])
+
+    async def test_rejects_missing_or_bad_token(self):
+        communicator = self.connect('not-a-token')
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+
+    async def test_pushes_points_badge_and_notification(self):
+        communicator = self.connect(self.token)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        # Credit from a worker thread, as a sync view would, so the push reaches this loop
+        await sync_to_async(complete_task, thread_sensitive=False)(self.task)
+        events = {}
+        for _ in range(3):
+            message = await communicator.receive_json_from(timeout=2)
+            events[message['type']] = message['data']
+
+        self.assertEqual(events['points'], {'total_points': 15})
+        self.assertEqual(events['badge']['name'], 'First Steps')
+        self.assertEqual(events['notification']['badge']['name'], 'First Steps')
+        await communicator.disconnect()
@@ -0,0 +1,59 @@
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from .models import Notification
+
+UNREAD_KEY = 'notifications:unread:%s'
+# Bounds how long a drifted counter can survive without the reconcile command
+UNREAD_TTL = 24 * 60 * 60
+
+
+def cache_is_shared():
+    """
+    Whether the default cache is one store for every process (Redis). A
+    local-memory cache is per process, so counters kept there would drift
+    apart between workers; without a shared cache counts come from the
+    (user, is_read) index instead.
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def unread_key(user_id):
+    return UNREAD_KEY % user_id
+
+
+def unread_count(user_id):
+    """Return the cached unread count, counting in the database on a miss."""
+    if not cache_is_shared():
+        return Notification.objects.filter(user_id=user_id, is_read=False).count()
+    key = unread_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.set(key, count, UNREAD_TTL)
+    return count
+
+
+def adjust_unread(user_id, delta):
+    """
+    Add delta to a cached counter once the transaction commits. A counter
+    that is not cached is left alone; the next read counts it afresh.
+    """
+    if not cache_is_shared():
+        return
+
+    def apply():
+        key = unread_key(user_id)
+        try:
+            value = cache.incr(key, delta)
+        except ValueError:
+            return
+        if value < 0:
+            cache.delete(key)
+    transaction.on_commit(apply)
+
+
+def reset_unread(user_id):
+    if cache_is_shared():
+        transaction.on_commit(lambda: cache.set(unread_key(user_id), 0, UNREAD_TTL))
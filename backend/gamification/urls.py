@@ -4,26 +4,38 @@ from .views import (
     UserBadgeListView,
     UserPointsDetailView,
     LeaderboardView,
+    MyRankView,
+    PointsTrendView,
     PointsTransactionListView,
     NotificationListView,
     NotificationMarkAsReadView,
-    NotificationMarkAllAsReadView
+    NotificationMarkAllAsReadView,
+    UnreadNotificationCountView,
+    DashboardView
 )
 
 urlpatterns = [
+    # Dashboard
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
+
     # Badges
     path('badges/', BadgeListView.as_view(), name='badge-list'),
     path('my-badges/', UserBadgeListView.as_view(), name='user-badge-list'),
 
     # Points
     path('points/', UserPointsDetailView.as_view(), name='user-points'),
+    path('points/trend/', PointsTrendView.as_view(), name='points-trend'),
     path('leaderboard/', LeaderboardView.as_view(), name='leaderboard'),
+    path('leaderboard/me/', MyRankView.as_view(), name='leaderboard-me'),
 
     # Transactions
     path('transactions/', PointsTransactionListView.as_view(), name='transactions'),
 
     # Notifications
     path('notifications/', NotificationListView.as_view(), name='notification-list'),
+    path('notifications/unread-count/',
+         UnreadNotificationCountView.as_view(),
+         name='notification-unread-count'),
     path('notifications/<int:pk>/mark-as-read/',
          NotificationMarkAsReadView.as_view(),
          name='notification-mark-read'),
@@ -5,6 +5,7 @@ from rest_framework.generics import (
     UpdateAPIView
 )
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .serializers import (
@@ -14,6 +15,10 @@ from .serializers import (
     PointsTransactionSerializer,
     NotificationSerializer
 )
+from users.models import User
+from .leaderboard import leaderboard
+from .rollups import PERIODS, period_leaderboard, points_trend
+from .unread import adjust_unread, reset_unread, unread_count
 from .models import (
     Badge,
     UserBadge,
@@ -44,7 +49,7 @@ class UserBadgeListView(ListAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return UserBadge.objects.filter(user=self.request.user)
+        return UserBadge.objects.filter(user=self.request.user).select_related('badge')
 
 
 class UserPointsDetailView(RetrieveAPIView):
@@ -59,21 +64,78 @@ class UserPointsDetailView(RetrieveAPIView):
         return UserPoints.objects.get(user=self.request.user)
 
 
-class LeaderboardView(ListAPIView):
+def _leaderboard_entries(ranked):
+    """Attach usernames to (rank, user_id, points) rows with one query."""
+    usernames = dict(
+        User.objects.filter(id__in=[user_id for _, user_id, _ in ranked]).values_list('id', 'username')
+    )
+    return [
+        {'rank': rank, 'user': {'id': user_id, 'username': usernames[user_id]}, 'total_points': points}
+        for rank, user_id, points in ranked
+        if user_id in usernames
+    ]
+
+
+def _int_param(request, name, default, maximum):
+    try:
+        return min(max(int(request.query_params.get(name, default)), 1), maximum)
+    except ValueError:
+        return default
+
+
+class LeaderboardView(APIView):
     """
-    Get top 10 users by points
-    GET /api/gamification/leaderboard/
+    Get the top users by points, all time or for the current week or month
+    GET /api/leaderboard/?period=all|week|month&limit=10
     """
-    serializer_class = UserPointsSerializer
     permission_classes = [IsAuthenticated]
 
-    def get_queryset(self):
-        return UserPoints.objects.order_by('-total_points')[:10]
+    def get(self, request):
+        period = request.query_params.get('period', 'all')
+        limit = _int_param(request, 'limit', 10, 100)
+        if period == 'all':
+            leaderboard.seed_if_empty()
+            ranked = leaderboard.top(limit)
+        elif period in PERIODS:
+            ranked = period_leaderboard(period, limit)
+        else:
+            return Response({'error': f"Unknown period '{period}'"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(_leaderboard_entries(ranked))
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+
+class MyRankView(APIView):
+    """
+    Get the current user's rank and the users just above and below them
+    GET /api/leaderboard/me/?radius=2
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        leaderboard.seed_if_empty()
+        radius = _int_param(request, 'radius', 2, 25)
+        placement = leaderboard.around(request.user.id, radius)
+        if placement is None:
+            return Response({'error': 'No points recorded yet'}, status=status.HTTP_404_NOT_FOUND)
+
+        rank, points, neighbours = placement
+        return Response({
+            'rank': rank,
+            'total_points': points,
+            'total_users': leaderboard.size(),
+            'neighbours': _leaderboard_entries(neighbours),
+        })
+
+
+class PointsTrendView(APIView):
+    """
+    Get the current user's points per day, oldest first
+    GET /api/points/trend/?days=30
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        days = _int_param(request, 'days', 30, 365)
+        return Response(points_trend(request.user.id, days))
 
 
 class PointsTransactionListView(ListAPIView):
@@ -101,7 +163,7 @@ class NotificationListView(ListAPIView):
     def get_queryset(self):
         return Notification.objects.filter(
             user=self.request.user
-        ).order_by('-created_at')
+        ).select_related('badge').order_by('-created_at')
 
 
 class NotificationMarkAsReadView(UpdateAPIView):
@@ -117,8 +179,11 @@ class NotificationMarkAsReadView(UpdateAPIView):
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
+        # Only the request that actually flips the flag lowers the counter
+        flipped = Notification.objects.filter(pk=instance.pk, is_read=False).update(is_read=True)
+        if flipped:
+            adjust_unread(request.user.id, -1)
         instance.is_read = True
-        instance.save()
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
@@ -135,7 +200,61 @@ class NotificationMarkAllAsReadView(CreateAPIView):
             user=request.user,
             is_read=False
         ).update(is_read=True)
+        reset_unread(request.user.id)
         return Response(
             {'status': 'All notifications marked as read'},
             status=status.HTTP_200_OK
-        )
\ No newline at end of file
+        )
+
+
+class UnreadNotificationCountView(APIView):
+    """
+    Get the number of unread notifications, served from cache
+    GET /api/notifications/unread-count/
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread': unread_count(request.user.id)})
+
+
+DASHBOARD_SECTIONS = ('points', 'badges', 'leaderboard', 'transactions', 'notifications')
+DASHBOARD_ITEM_LIMIT = 10
+
+
+class DashboardView(APIView):
+    """
+    Everything the dashboard shows in one response, one query per section
+    GET /api/dashboard/?sections=points,badges,leaderboard,transactions,notifications
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        requested = request.query_params.get('sections')
+        sections = requested.split(',') if requested else DASHBOARD_SECTIONS
+        unknown = [section for section in sections if section not in DASHBOARD_SECTIONS]
+        if unknown:
+            return Response({'error': f"Unknown sections: {', '.join(unknown)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request.user
+        data = {}
+        if 'points' in sections:
+            points = UserPoints.objects.filter(user=user).first()
+            data['points'] = UserPointsSerializer(points).data if points else {'total_points': 0, 'last_updated': None}
+        if 'badges' in sections:
+            badges = UserBadge.objects.filter(user=user).select_related('badge').order_by('-awarded_at')
+            data['badges'] = UserBadgeSerializer(badges, many=True).data
+        if 'leaderboard' in sections:
+            leaderboard.seed_if_empty()
+            data['leaderboard'] = _leaderboard_entries(leaderboard.top(10))
+        if 'transactions' in sections:
+            transactions = PointsTransaction.objects.filter(user=user).order_by('-timestamp')[:DASHBOARD_ITEM_LIMIT]
+            data['transactions'] = PointsTransactionSerializer(transactions, many=True).data
+        if 'notifications' in sections:
+            notifications = (
+                Notification.objects.filter(user=user)
+                .select_related('badge')
+                .order_by('-created_at')[:DASHBOARD_ITEM_LIMIT]
+            )
+            data['notifications'] = NotificationSerializer(notifications, many=True).data
+        return Response(data)
@@ -114,8 +114,30 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Token buckets used by users.throttling: <burst size>/<time to refill it>
+    'DEFAULT_THROTTLE_RATES': {
+        'plan_generation': os.getenv('THROTTLE_PLAN_GENERATION', '1/min'),
+        'wearable_sync': os.getenv('THROTTLE_WEARABLE_SYNC', '10/hour'),
+        'post_creation': os.getenv('THROTTLE_POST_CREATION', '20/hour'),
+    },
 }
 
+# Cache (local memory unless REDIS_URL is set)
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Djoser Settings
 DJOSER = {
     'PASSWORD_RESET_CONFIRM_URL': 'password/reset/confirm/{uid}/{token}',
@@ -192,6 +214,35 @@ HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
+# Gemini client
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '20'))
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+LLM_BREAKER_THRESHOLD = int(os.getenv('LLM_BREAKER_THRESHOLD', '5'))
+LLM_BREAKER_RESET = float(os.getenv('LLM_BREAKER_RESET', '30'))
+LLM_USE_FAKE_MODEL = os.environ.get('LLM_USE_FAKE_MODEL', 'false').lower() in ('1', 'true')
+LLM_FAKE_LATENCY = float(os.getenv('LLM_FAKE_LATENCY', '0'))
+
+# Fitness plan generation jobs
+PLAN_JOB_WORKERS = int(os.getenv('PLAN_JOB_WORKERS', '4'))
+PLAN_JOB_QUEUE_SIZE = int(os.getenv('PLAN_JOB_QUEUE_SIZE', '32'))
+# Pending or running jobs older than this (seconds) are reported as failed
+PLAN_JOB_STALE_AFTER = int(os.getenv('PLAN_JOB_STALE_AFTER', '600'))
+PLAN_BATCH_WINDOW = float(os.getenv('PLAN_BATCH_WINDOW', '0.25'))
+PLAN_BATCH_MAX_SIZE = int(os.getenv('PLAN_BATCH_MAX_SIZE', '8'))
+PLAN_STREAM_BATCH_SIZE = int(os.getenv('PLAN_STREAM_BATCH_SIZE', '5'))
+PLAN_CACHE_SIZE = int(os.getenv('PLAN_CACHE_SIZE', '256'))
+PLAN_CACHE_TTL = int(os.getenv('PLAN_CACHE_TTL', str(24 * 60 * 60)))
+
+# Gamification: queue points in the outbox for process_gamification_outbox instead of crediting in the request.
+# The worker runs in its own process, so it needs REDIS_URL to reach the web processes' cache and sockets
+GAMIFICATION_OUTBOX = os.environ.get('GAMIFICATION_OUTBOX', 'true' if REDIS_URL else 'false').lower() in ('1', 'true')
+
+# Community home timelines: posts in groups up to this many members are written to each member's
+# timeline, larger groups are merged in when the timeline is read; trim_timelines keeps this many entries
+TIMELINE_FANOUT_MAX_MEMBERS = int(os.getenv('TIMELINE_FANOUT_MAX_MEMBERS', '1000'))
+TIMELINE_MAX_ENTRIES = int(os.getenv('TIMELINE_MAX_ENTRIES', '800'))
+
 # Google OAuth2 Settings
 BASE_FRONTEND_URL = os.environ.get('DJANGO_BASE_FRONTEND_URL', default='http://localhost:3000')
 GOOGLE_OAUTH2_CLIENT_ID = os.environ.get('GOOGLE_OAUTH2_CLIENT_ID')
@@ -202,13 +253,20 @@ GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
 GOOGLE_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET')
 GOOGLE_REDIRECT_URI = os.getenv('GOOGLE_REDIRECT_URI')
 
-# Channels
-ASGI_APPLICATION = 'community_platform.routing.application'
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels_redis.core.RedisChannelLayer',
-        'CONFIG': {
-            'hosts': [('127.0.0.1', 6379)],
+# Channels (in-memory layer unless REDIS_URL is set; it only reaches sockets in the same process)
+ASGI_APPLICATION = 'green_living_hub.asgi.application'
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [REDIS_URL],
+            },
         },
-    },
-}
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
\ No newline at end of file
@@ -1,6 +1,9 @@
 from django.contrib import admin
-from .models import Task
+from .models import Task, PlanJob, PlanGeneration, ScoringRule
 
 admin.site.register(Task)
+admin.site.register(PlanJob)
+admin.site.register(PlanGeneration)
+admin.site.register(ScoringRule)
 
 # Register your models here.
@@ -0,0 +1,148 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from django.conf import settings
+from .llm import get_llm_client
+import json
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def build_batch_plan_prompt(entries, start_date):
+    """Build one Gemini prompt asking for a plan per profile, keyed by id."""
+    profiles = [
+        {
+            'id': key,
+            'sex': fitness_input.sex,
+            'age': fitness_input.age,
+            'weight_kg': fitness_input.weight,
+            'height_cm': fitness_input.height,
+            'goal': fitness_input.goal,
+        }
+        for key, fitness_input in entries
+    ]
+    return f"""
+        Create a separate 5-day fitness plan for each profile below, with 5 daily tasks each day.
+        Include daily tasks categorized as 'exercise', 'nutrition', or 'sustainability'.
+        Each day should have exactly 5 tasks with a mix of categories.
+
+        Each task should have:
+        - title (max 150 characters)
+        - category (must be 'exercise', 'nutrition', or 'sustainability')
+        - due_date (YYYY-MM-DD format, 5 consecutive dates starting from {start_date})
+
+        Profiles: {json.dumps(profiles)}
+
+        Return a JSON object keyed by profile id whose values are JSON arrays of objects
+        with keys: title, category, due_date.
+        """
+
+
+def parse_batch_response(text):
+    """Parse the batched response into {profile id: raw task list}."""
+    text = text.strip()
+    if text.startswith('```json'):
+        text = text[7:-3].strip()
+    plans = json.loads(text)
+    if not isinstance(plans, dict):
+        raise ValueError("Batch response must be a JSON object keyed by profile id")
+    return plans
+
+
+class _Request:
+    def __init__(self, fitness_input, start_date):
+        self.fitness_input = fitness_input
+        self.start_date = start_date
+        self.future = Future()
+
+
+class PlanBatcher:
+    """
+    Collects plan requests for up to window seconds (or max_batch requests)
+    and asks the LLM for all of them in one call. Each caller gets its own
+    raw task list back, or an exception if its part of the response is
+    missing, so fallbacks stay per user.
+    """
+
+    def __init__(self, window, max_batch, dispatch_workers=4, client=None):
+        self.window = window
+        self.max_batch = max_batch
+        self._client = client
+        # Batches are sent concurrently; the LLM client still caps in-flight calls
+        self._dispatcher = ThreadPoolExecutor(max_workers=dispatch_workers, thread_name_prefix='plan-batch')
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+
+    @property
+    def client(self):
+        return self._client or get_llm_client()
+
+    def request(self, fitness_input, start_date, timeout=None):
+        """Block until the batch holding this request is answered; returns the raw task list."""
+        return self.submit(fitness_input, start_date).result(timeout=timeout)
+
+    def submit(self, fitness_input, start_date):
+        self._ensure_worker()
+        req = _Request(fitness_input, start_date)
+        self._queue.put(req)
+        return req.future
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='plan-batcher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # A prompt has a single start date, so split the batch on it
+            by_date = {}
+            for req in batch:
+                by_date.setdefault(req.start_date, []).append(req)
+            for start_date, reqs in by_date.items():
+                self._dispatcher.submit(self._dispatch, reqs, start_date)
+
+    def _dispatch(self, reqs, start_date):
+        keyed = {f"p{n}": req for n, req in enumerate(reqs)}
+        with self._lock:
+            self.batches += 1
+        try:
+            prompt = build_batch_plan_prompt(
+                [(key, req.fitness_input) for key, req in keyed.items()],
+                start_date.strftime('%Y-%m-%d')
+            )
+            plans = parse_batch_response(self.client.generate(prompt))
+        except Exception as e:
+            logger.warning(f"Batched plan call for {len(reqs)} users failed: {str(e)}")
+            for req in reqs:
+                req.future.set_exception(e)
+            return
+
+        logger.info(f"Batched plan call answered {len(reqs)} users")
+        for key, req in keyed.items():
+            if key in plans:
+                req.future.set_result(plans[key])
+            else:
+                req.future.set_exception(ValueError(f"No plan returned for profile {key}"))
+
+
+plan_batcher = PlanBatcher(
+    window=settings.PLAN_BATCH_WINDOW,
+    max_batch=settings.PLAN_BATCH_MAX_SIZE,
+    dispatch_workers=settings.LLM_MAX_CONCURRENCY,
+)
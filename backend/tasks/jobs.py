@@ -0,0 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from .models import PlanJob
+from .services import generate_fitness_plan
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(settings.PLAN_JOB_WORKERS + settings.PLAN_JOB_QUEUE_SIZE)
+
+
+class PlanQueueFull(Exception):
+    """Raised when every worker is busy and the pending queue is full."""
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PLAN_JOB_WORKERS,
+                thread_name_prefix='plan-job',
+            )
+        return _executor
+
+
+def submit_plan_job(fitness_input, premium=False):
+    """
+    Queue plan generation for fitness_input.user and return the PlanJob.
+    The caller gets the job back immediately; a worker thread runs the
+    plan generation and task creation.
+    """
+    if not _slots.acquire(blocking=False):
+        raise PlanQueueFull('Plan generation queue is full')
+
+    try:
+        job = PlanJob.objects.create(user=fitness_input.user, premium=premium)
+        # Only hand the job to a worker once the row is visible to its connection
+        transaction.on_commit(lambda: _dispatch(job.id))
+    except Exception:
+        _slots.release()
+        raise
+    return job
+
+
+def _dispatch(job_id):
+    # Runs after the commit, so a failure here must release the slot itself
+    try:
+        _get_executor().submit(_run_plan_job, job_id)
+    except Exception as e:
+        logger.error(f"Could not queue plan job {job_id}: {str(e)}")
+        _slots.release()
+        PlanJob.objects.filter(id=job_id).update(
+            status=PlanJob.STATUS_FAILED,
+            error=str(e),
+            finished_at=timezone.now(),
+        )
+
+
+def fail_if_stale(job):
+    """
+    Mark job failed if it has been pending or running for longer than
+    PLAN_JOB_STALE_AFTER seconds, as happens when a restart loses the
+    worker thread that owned it. Returns the job with its current status.
+    """
+    if job.status not in (PlanJob.STATUS_PENDING, PlanJob.STATUS_RUNNING):
+        return job
+    if timezone.now() - job.created_at < timedelta(seconds=settings.PLAN_JOB_STALE_AFTER):
+        return job
+
+    # Conditional on the status read, so a worker finishing meanwhile wins
+    PlanJob.objects.filter(id=job.id, status=job.status).update(
+        status=PlanJob.STATUS_FAILED,
+        error='Plan generation did not finish in time',
+        finished_at=timezone.now(),
+    )
+    logger.warning(f"Plan job {job.id} was stale and has been failed")
+    job.refresh_from_db()
+    return job
+
+
+def _run_plan_job(job_id):
+    close_old_connections()
+    try:
+        # Claim the job, unless it was failed as stale while it sat in the queue
+        claimed = PlanJob.objects.filter(id=job_id, status=PlanJob.STATUS_PENDING).update(
+            status=PlanJob.STATUS_RUNNING
+        )
+        if not claimed:
+            logger.warning(f"Plan job {job_id} is no longer pending, skipping it")
+            return
+        job = PlanJob.objects.select_related('user').get(id=job_id)
+
+        fitness_input = job.user.fitness_input
+        # generate_fitness_plan falls back to the synthesizer on any Gemini error
+        tasks = generate_fitness_plan(fitness_input, job=job, premium=job.premium)
+
+        job.status = PlanJob.STATUS_DONE
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+        logger.info(f"Plan job {job_id} finished with {len(tasks)} tasks")
+    except Exception as e:
+        logger.error(f"Plan job {job_id} failed: {str(e)}")
+        PlanJob.objects.filter(id=job_id).update(
+            status=PlanJob.STATUS_FAILED,
+            error=str(e),
+            finished_at=timezone.now(),
+        )
+    finally:
+        _slots.release()
+        close_old_connections()
@@ -0,0 +1,207 @@
+from django.conf import settings
+from datetime import datetime, timedelta
+import google.generativeai as genai
+import json
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUnavailable(Exception):
+    """Raised without touching the network when the circuit is open or the client is saturated."""
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures. While open every call
+    is rejected until reset_timeout has passed, then a single trial call is
+    let through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class LLMClient:
+    """
+    Process-wide wrapper around a Gemini GenerativeModel. The model (and its
+    gRPC channel) is built once and reused, every request carries a deadline,
+    a semaphore caps in-flight calls and a circuit breaker short-circuits
+    calls while upstream is failing. Pass model to run against a fake.
+    """
+
+    def __init__(self, model=None, timeout=20, max_concurrency=8, failure_threshold=5, reset_timeout=30):
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._model = model
+        self._model_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    @property
+    def model(self):
+        with self._model_lock:
+            if self._model is None:
+                genai.configure(api_key=settings.GEMINI_API_KEY)
+                self._model = genai.GenerativeModel(settings.GEMINI_MODEL)
+            return self._model
+
+    def generate(self, prompt):
+        """Return the response text for prompt."""
+        self._acquire()
+        try:
+            response = self.model.generate_content(prompt, request_options={'timeout': self.timeout})
+            text = response.text
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        finally:
+            self._slots.release()
+        self.breaker.record_success()
+        return text
+
+    def stream(self, prompt):
+        """Yield response text chunks for prompt; the concurrency slot is held until the stream ends."""
+        self._acquire()
+        try:
+            response = self.model.generate_content(
+                prompt,
+                stream=True,
+                request_options={'timeout': self.timeout}
+            )
+            for chunk in response:
+                yield chunk.text
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        finally:
+            self._slots.release()
+        self.breaker.record_success()
+
+    def _acquire(self):
+        if not self.breaker.allow():
+            raise LLMUnavailable('Circuit open: skipping Gemini call')
+        # Waiting for a slot counts against the same deadline as the call itself.
+        # Local saturation says nothing about Gemini's health, so the breaker is left alone
+        if not self._slots.acquire(timeout=self.timeout):
+            raise LLMUnavailable('Too many concurrent Gemini calls')
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """
+    Local stand-in for GenerativeModel. Answers plan prompts with a valid
+    25-task plan (one per profile for batched prompts) after latency
+    seconds; set fail=True to simulate outages.
+    """
+
+    def __init__(self, latency=0.0, fail=False, chunk_size=64):
+        self.latency = latency
+        self.fail = fail
+        self.chunk_size = chunk_size
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError('Fake model failure')
+
+        profiles = re.search(r'Profiles: (\[.*\])', prompt)
+        if profiles:
+            plan = self.plan_for(prompt)
+            text = json.dumps({profile['id']: plan for profile in json.loads(profiles.group(1))})
+        else:
+            text = json.dumps(self.plan_for(prompt))
+        if stream:
+            return [FakeResponse(text[i:i + self.chunk_size]) for i in range(0, len(text), self.chunk_size)]
+        return FakeResponse(text)
+
+    def plan_for(self, prompt):
+        match = re.search(r'starting from (\d{4}-\d{2}-\d{2})', prompt)
+        start_date = datetime.strptime(match.group(1), '%Y-%m-%d') if match else datetime.now()
+        categories = ['exercise', 'nutrition', 'sustainability', 'exercise', 'nutrition']
+        return [
+            {
+                'title': f'Fake {category} task {day + 1}.{n + 1}',
+                'category': category,
+                'due_date': (start_date + timedelta(days=day)).strftime('%Y-%m-%d'),
+            }
+            for day in range(5)
+            for n, category in enumerate(categories)
+        ]
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """Return the shared LLMClient, building it from settings on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            model = FakeModel(latency=settings.LLM_FAKE_LATENCY) if settings.LLM_USE_FAKE_MODEL else None
+            _client = LLMClient(
+                model=model,
+                timeout=settings.LLM_TIMEOUT,
+                max_concurrency=settings.LLM_MAX_CONCURRENCY,
+                failure_threshold=settings.LLM_BREAKER_THRESHOLD,
+                reset_timeout=settings.LLM_BREAKER_RESET,
+            )
+        return _client
+
+
+def set_llm_client(client):
+    """Replace the shared client, e.g. with one wrapping a FakeModel in tests. Pass None to reset."""
+    global _client
+    with _client_lock:
+        _client = client
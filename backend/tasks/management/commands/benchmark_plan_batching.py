@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from django.core.management.base import BaseCommand
+from users.models import FitnessInput
+from tasks.batching import PlanBatcher
+from tasks.llm import FakeModel, LLMClient
+from tasks.services import build_plan_prompt, validate_plan
+import json
+
+
+class Command(BaseCommand):
+    help = 'Compare plan throughput with and without request batching against a local FakeModel.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=64, help='Concurrent plan requests')
+        parser.add_argument('--latency', type=float, default=0.5, help='Fake model latency per call (s)')
+        parser.add_argument('--upstream-concurrency', type=int, default=4, help='In-flight calls allowed upstream')
+        parser.add_argument('--window', type=float, default=0.05, help='Batch window (s)')
+        parser.add_argument('--max-batch', type=int, default=8, help='Max users per batched call')
+
+    def handle(self, *args, **options):
+        users = options['users']
+        start_date = date.today()
+        profiles = [
+            FitnessInput(sex=('male', 'female')[n % 2], age=20 + n % 40, weight=60 + n % 30,
+                         height=160 + n % 30, goal=('bulking', 'dieting')[n % 3 == 0])
+            for n in range(users)
+        ]
+
+        def make_client(model):
+            # A long timeout so queueing for the upstream cap never counts as a failure here
+            return LLMClient(model=model, timeout=600, max_concurrency=options['upstream_concurrency'])
+
+        model = FakeModel(latency=options['latency'])
+        client = make_client(model)
+
+        def single(fitness_input):
+            text = client.generate(build_plan_prompt(fitness_input, start_date.strftime('%Y-%m-%d')))
+            return validate_plan(json.loads(text))
+
+        self._report('unbatched', single, profiles, model)
+
+        model = FakeModel(latency=options['latency'])
+        batcher = PlanBatcher(
+            window=options['window'],
+            max_batch=options['max_batch'],
+            dispatch_workers=options['upstream_concurrency'],
+            client=make_client(model)
+        )
+
+        def batched(fitness_input):
+            return validate_plan(batcher.request(fitness_input, start_date))
+
+        self._report('batched', batched, profiles, model)
+
+    def _report(self, label, generate, profiles, model):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(profiles)) as pool:
+            plans = list(pool.map(generate, profiles))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{label:>10}: {len(plans)} plans in {elapsed:.2f}s "
+            f"({len(plans) / elapsed:.1f} plans/s, {model.calls} upstream calls)"
+        )
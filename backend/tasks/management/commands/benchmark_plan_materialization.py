@@ -0,0 +1,69 @@
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from users.models import User
+from tasks.models import Task
+from tasks.services import calculate_points, materialize_plan
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare queries and time per plan for per-row saves vs materialize_plan (rolled back).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plans', type=int, default=20, help='Number of plans to write per strategy')
+
+    def handle(self, *args, **options):
+        plans = options['plans']
+        start = date.today()
+        tasks_data = [
+            {'title': f'Task {n}', 'category': category, 'due_date': (start + timedelta(days=day)).isoformat()}
+            for day in range(5)
+            for n, category in enumerate(['exercise', 'nutrition', 'sustainability', 'exercise', 'nutrition'])
+        ]
+
+        def legacy(user):
+            for task_data in tasks_data:
+                Task(
+                    user=user,
+                    title=task_data['title'],
+                    category=task_data['category'],
+                    due_date=task_data['due_date'],
+                    is_completed=False,
+                    points_rewarded=calculate_points(task_data['category'], task_data['title'])
+                ).save()
+
+        def bulk(user):
+            materialize_plan(user, tasks_data)
+
+        for label, write_plan in (('per-row save', legacy), ('materialize_plan', bulk)):
+            queries, elapsed = self._measure(write_plan, plans)
+            self.stdout.write(
+                f"{label:>18}: {queries / plans:.1f} queries/plan, "
+                f"{elapsed / plans * 1000:.2f} ms/plan over {plans} plans of {len(tasks_data)} tasks"
+            )
+
+    def _measure(self, write_plan, plans):
+        result = {}
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    email='plan-benchmark@example.com',
+                    username='plan-benchmark',
+                    password=None
+                )
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    for _ in range(plans):
+                        write_plan(user)
+                    result['elapsed'] = time.perf_counter() - started
+                result['queries'] = len(ctx.captured_queries)
+                raise _Rollback
+        except _Rollback:
+            pass
+        return result['queries'], result['elapsed']
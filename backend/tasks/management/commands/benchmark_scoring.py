@@ -0,0 +1,66 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from tasks.scoring import scoring_engine
+from tasks.synthesizer import TEMPLATES
+
+
+def legacy_calculate_points(category, title):
+    """The per-title scorer that predates ScoringEngine, kept here as the baseline."""
+    base_points = {
+        'exercise': random.randint(40, 100),
+        'sustainability': random.randint(30, 80),
+        'nutrition': random.randint(20, 60)
+    }
+    bonus_triggers = {
+        'intense': 20,
+        'training': 15,
+        'cardio': 10,
+        'organic': 15,
+        'recycle': 10,
+        'meal prep': 10
+    }
+    points = base_points[category]
+    for trigger, bonus in bonus_triggers.items():
+        if trigger in title.lower():
+            points += bonus
+    return min(max(points, 10), 100)
+
+
+class Command(BaseCommand):
+    help = 'Time the legacy per-title scorer against ScoringEngine.score_many.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=100_000)
+        parser.add_argument(
+            '--distinct', action='store_true',
+            help='Make every title unique, so score_many cannot reuse a memoized score.'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        if options['distinct']:
+            pairs = []
+            for i in range(options['titles']):
+                title, category, *_ = rng.choice(TEMPLATES)
+                pairs.append((f"{title.format(n=rng.randint(1, 60))} (#{i})", category))
+        else:
+            # Plan titles repeat across users, which is what the memo in score_many is for
+            samples = [(title.format(n=rng.randint(1, 60)), category) for title, category, *_ in TEMPLATES]
+            pairs = [rng.choice(samples) for _ in range(options['titles'])]
+        titles = [title for title, _ in pairs]
+        categories = [category for _, category in pairs]
+
+        started = time.perf_counter()
+        for title, category in pairs:
+            legacy_calculate_points(category, title)
+        legacy = time.perf_counter() - started
+
+        scoring_engine.score_many(titles[:1], categories[:1])  # compile outside the timing
+        started = time.perf_counter()
+        scores = scoring_engine.score_many(titles, categories)
+        engine = time.perf_counter() - started
+
+        distinct = len(set(pairs))
+        self.stdout.write(f"legacy calculate_points: {legacy:.3f}s for {len(pairs)} titles ({distinct} distinct)")
+        self.stdout.write(f"ScoringEngine.score_many: {engine:.3f}s for {len(scores)} titles ({legacy / engine:.1f}x)")
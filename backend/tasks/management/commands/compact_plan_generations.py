@@ -0,0 +1,46 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from tasks.models import PlanGeneration
+
+
+class Command(BaseCommand):
+    help = 'Delete old inactive plan generations (and their tasks) in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=2, help='Inactive generations to keep per user')
+        parser.add_argument('--older-than-days', type=int, default=30, help='Only prune generations older than this')
+        parser.add_argument('--batch-size', type=int, default=500, help='Generations deleted per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many would be deleted')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        # Rank every inactive generation, then apply the age cutoff outside the
+        # window: filtering on created_at first would leave recent generations
+        # out of the ranking and keep --keep old ones on top of them
+        ranked = PlanGeneration.objects.filter(is_active=False).annotate(
+            recency=Window(
+                expression=RowNumber(),
+                partition_by=[F('user_id')],
+                order_by=F('created_at').desc(),
+            )
+        ).filter(recency__gt=options['keep'])
+        candidates = PlanGeneration.objects.filter(id__in=ranked.values('id'), created_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f"{candidates.count()} plan generations would be deleted")
+            return
+
+        generations = tasks = 0
+        while True:
+            ids = list(candidates.values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted, per_model = PlanGeneration.objects.filter(id__in=ids).delete()
+            generations += per_model.get('tasks.PlanGeneration', 0)
+            tasks += per_model.get('tasks.Task', 0)
+            self.stdout.write(f"Deleted {generations} generations, {tasks} tasks so far")
+
+        self.stdout.write(self.style.SUCCESS(f"Compaction done: {generations} generations, {tasks} tasks deleted"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 13:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_planjob_task_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='planjob',
+            name='premium',
+            field=models.BooleanField(default=False),
+        ),
+    ]
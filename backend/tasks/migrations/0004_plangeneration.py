@@ -0,0 +1,69 @@
+# Generated by Django 5.2 on 2026-10-18 13:16
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+def group_existing_tasks(apps, schema_editor):
+    """Put each user's existing tasks into one active generation linked to their latest job."""
+    Task = apps.get_model('tasks', 'Task')
+    PlanJob = apps.get_model('tasks', 'PlanJob')
+    PlanGeneration = apps.get_model('tasks', 'PlanGeneration')
+
+    user_ids = Task.objects.values_list('user_id', flat=True).distinct()
+    for user_id in user_ids:
+        generation = PlanGeneration.objects.create(user_id=user_id, is_active=True)
+        Task.objects.filter(user_id=user_id).update(generation=generation)
+        latest_job = PlanJob.objects.filter(user_id=user_id, tasks__isnull=False).order_by('-created_at').first()
+        if latest_job is not None:
+            latest_job.generation = generation
+            latest_job.save(update_fields=['generation'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_planjob_premium'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanGeneration',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('is_active', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='plan_generations', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='planjob',
+            name='generation',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='job', to='tasks.plangeneration'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='generation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to='tasks.plangeneration'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['generation', 'due_date'], name='tasks_task_generat_47dbe1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plangeneration',
+            index=models.Index(fields=['user', 'is_active', 'created_at'], name='tasks_plang_user_id_412638_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='plangeneration',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('user',), name='unique_active_plan_generation'),
+        ),
+        migrations.RunPython(group_existing_tasks, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='task',
+            name='job',
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2 on 2026-10-18 13:18
+
+from django.db import migrations, models
+
+
+# The bonus triggers previously hard-coded in tasks.services.calculate_points
+DEFAULT_RULES = {
+    'intense': 20,
+    'training': 15,
+    'cardio': 10,
+    'organic': 15,
+    'recycle': 10,
+    'meal prep': 10,
+}
+
+
+def seed_rules(apps, schema_editor):
+    ScoringRule = apps.get_model('tasks', 'ScoringRule')
+    ScoringRule.objects.bulk_create(
+        [ScoringRule(keyword=keyword, bonus=bonus) for keyword, bonus in DEFAULT_RULES.items()],
+        ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_plangeneration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoringRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('keyword', models.CharField(max_length=50, unique=True)),
+                ('bonus', models.IntegerField()),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.RunPython(seed_rules, migrations.RunPython.noop),
+    ]
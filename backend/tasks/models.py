@@ -3,9 +3,61 @@ import uuid
 from users.models import User
 from django.core.validators import MinValueValidator
 
+class PlanGeneration(models.Model):
+    """One generated plan. A user's tasks are read from their single active generation."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='plan_generations')
+    is_active = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=models.Q(is_active=True),
+                name='unique_active_plan_generation',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'is_active', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Plan generation {self.id} for {self.user.email}"
+
+class PlanJob(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='plan_jobs')
+    status = models.CharField(max_length=10, default=STATUS_PENDING, choices=[
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ])
+    premium = models.BooleanField(default=False)
+    generation = models.OneToOneField(
+        PlanGeneration,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='job'
+    )
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Plan job {self.id} ({self.status})"
+
 class Task(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    generation = models.ForeignKey(PlanGeneration, on_delete=models.CASCADE, null=True, blank=True, related_name='tasks')
     title = models.CharField(max_length=150)
     category = models.CharField(max_length=20, choices=[
         ('exercise', 'Exercise'),
@@ -18,5 +70,20 @@ class Task(models.Model):
     points_rewarded = models.IntegerField(default=10, validators=[MinValueValidator(0)])
     points_processed = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['generation', 'due_date']),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class ScoringRule(models.Model):
+    """Keyword bonus applied by the scoring engine when it appears in a task title."""
+    keyword = models.CharField(max_length=50, unique=True)
+    bonus = models.IntegerField()
+    is_active = models.BooleanField(default=True)
+
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f"{self.keyword} (+{self.bonus})"
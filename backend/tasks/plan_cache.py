@@ -0,0 +1,90 @@
+from django.conf import settings
+from datetime import datetime, timedelta
+from cachetools import TTLCache
+import threading
+import time
+
+AGE_BANDS = [(18, 'under_18'), (30, '18_29'), (45, '30_44'), (60, '45_59')]
+BMI_BANDS = [(18.5, 'underweight'), (25, 'normal'), (30, 'overweight')]
+
+
+def _band(value, bands, last):
+    for upper, label in bands:
+        if value < upper:
+            return label
+    return last
+
+
+def profile_bucket(fitness_input):
+    """Normalize a FitnessInput into the coarse profile a cached plan is shared by."""
+    height_m = fitness_input.height / 100
+    bmi = fitness_input.weight / (height_m * height_m) if height_m > 0 else 0
+    return (
+        fitness_input.sex,
+        fitness_input.goal,
+        _band(fitness_input.age, AGE_BANDS, '60_plus'),
+        _band(bmi, BMI_BANDS, 'obese'),
+    )
+
+
+class PlanCache:
+    """
+    Process-local LRU cache of validated plan templates keyed by profile_bucket.
+    Templates store a day offset instead of a date so a hit can be re-dated to
+    any start date.
+    """
+
+    def __init__(self, maxsize, ttl, timer=time.monotonic):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, timer=timer)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, fitness_input, start_date):
+        """Return tasks_data for start_date, or None on a miss."""
+        key = profile_bucket(fitness_input)
+        with self._lock:
+            templates = self._cache.get(key)
+            if templates is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        return [
+            {
+                'title': template['title'],
+                'category': template['category'],
+                'due_date': (start_date + timedelta(days=template['day'])).strftime('%Y-%m-%d'),
+            }
+            for template in templates
+        ]
+
+    def put(self, fitness_input, tasks_data, start_date):
+        """Store validated tasks_data generated for start_date as templates."""
+        templates = [
+            {
+                'title': task['title'],
+                'category': task['category'],
+                'day': (datetime.strptime(task['due_date'], '%Y-%m-%d').date() - start_date).days,
+            }
+            for task in tasks_data
+        ]
+        with self._lock:
+            self._cache[profile_bucket(fitness_input)] = templates
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._cache),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+plan_cache = PlanCache(maxsize=settings.PLAN_CACHE_SIZE, ttl=settings.PLAN_CACHE_TTL)
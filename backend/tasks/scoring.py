@@ -0,0 +1,99 @@
+from django.core.cache import cache
+from .models import ScoringRule
+import re
+import threading
+import uuid
+import zlib
+
+# Inclusive base point range per category; the value inside it is derived from the title
+BASE_POINTS = {
+    'exercise': (40, 100),  # Highest points for exercise
+    'sustainability': (30, 80),
+    'nutrition': (20, 60),
+}
+MIN_POINTS = 10
+MAX_POINTS = 100
+
+RULES_VERSION_KEY = 'tasks:scoring_rules_version'
+
+
+class ScoringEngine:
+    """
+    Scores tasks from the active ScoringRule table. The rules are compiled
+    once into a single alternation regex and recompiled only when the rules
+    version in the cache changes, so other processes pick up edits too.
+    Base points are seeded by category and title, so a title always scores
+    the same. Every keyword contained in the title adds its bonus once, even
+    when keywords overlap ('meal prep' also earns 'prep').
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._pattern = None
+        self._bonuses = {}
+        self._contained = {}
+
+    def invalidate(self):
+        """Force a recompile in every process on its next score."""
+        cache.set(RULES_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+    def _compiled(self):
+        version = cache.get(RULES_VERSION_KEY)
+        if version is None:
+            # A fresh token after a cache flush, so no process keeps a list it loaded earlier
+            cache.add(RULES_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+            version = cache.get(RULES_VERSION_KEY)
+        with self._lock:
+            if self._version != version:
+                bonuses = dict(
+                    ScoringRule.objects.filter(is_active=True).values_list('keyword', 'bonus')
+                )
+                bonuses = {keyword.lower(): bonus for keyword, bonus in bonuses.items()}
+                # A lookahead matches at every position, longest keyword first. A
+                # shorter keyword starting at the same position is a substring of
+                # the one matched there, so it is added back through _contained
+                keywords = sorted(bonuses, key=len, reverse=True)
+                self._pattern = re.compile(f"(?=({'|'.join(map(re.escape, keywords))}))") if keywords else None
+                self._contained = {
+                    keyword: {other for other in keywords if other in keyword}
+                    for keyword in keywords
+                }
+                self._bonuses = bonuses
+                self._version = version
+            return self._pattern, self._bonuses, self._contained
+
+    @staticmethod
+    def base_points(category, title):
+        low, high = BASE_POINTS[category]
+        return low + zlib.crc32(f"{category}:{title}".encode()) % (high - low + 1)
+
+    def score(self, title, category):
+        return self.score_many([title], [category])[0]
+
+    def score_many(self, titles, categories):
+        """Return the points for each (title, category) pair, in order."""
+        pattern, bonuses, contained = self._compiled()
+        findall = pattern.findall if pattern is not None else None
+        crc32 = zlib.crc32
+        # Scores are deterministic, so repeated titles in a batch are scored once
+        memo = {}
+        scores = []
+        for title, category in zip(titles, categories):
+            key = (category, title)
+            points = memo.get(key)
+            if points is None:
+                low, high = BASE_POINTS[category]
+                points = low + crc32(f"{category}:{title}".encode()) % (high - low + 1)
+                if findall is not None:
+                    # Each keyword counts once, however often it appears
+                    found = set()
+                    for keyword in set(findall(title.lower())):
+                        found |= contained[keyword]
+                    points += sum(bonuses[keyword] for keyword in found)
+                points = memo[key] = min(max(points, MIN_POINTS), MAX_POINTS)
+            scores.append(points)
+        return scores
+
+
+scoring_engine = ScoringEngine()
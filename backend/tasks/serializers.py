@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Task
+from .models import Task, PlanJob
 from users.models import FitnessInput
 
 class TaskSerializer(serializers.ModelSerializer):
@@ -10,4 +10,12 @@ class TaskSerializer(serializers.ModelSerializer):
 class FitnessInputSerializer(serializers.ModelSerializer):
     class Meta:
         model = FitnessInput
-        fields = ['id', 'weight', 'height', 'sex', 'age', 'goal', 'created_at']
\ No newline at end of file
+        fields = ['id', 'weight', 'height', 'sex', 'age', 'goal', 'created_at']
+
+class PlanJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PlanJob
+        fields = ['id', 'status', 'premium', 'error', 'created_at', 'finished_at']
+
+class TaskBulkCompleteSerializer(serializers.Serializer):
+    task_ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=100)
\ No newline at end of file
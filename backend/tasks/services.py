@@ -1,52 +1,28 @@
 from django.conf import settings
-from datetime import datetime, timedelta
-from .models import Task
-import google.generativeai as genai
+from django.db import transaction
+from datetime import datetime
+from gamification.signals import update_points_from_tasks
+from users.models import User
+from .batching import plan_batcher
+from .llm import get_llm_client
+from .models import PlanGeneration, Task
+from .plan_cache import plan_cache
+from .scoring import scoring_engine
+from .synthesizer import synthesize_plan
 import logging
 import json
-import random  # Add this import
 
 logger = logging.getLogger(__name__)
 
+VALID_CATEGORIES = {'exercise', 'nutrition', 'sustainability'}
+
 def calculate_points(category, title):
     """Calculate points based on category and task complexity"""
-    base_points = {
-        'exercise': random.randint(40, 100),  # Highest points for exercise
-        'sustainability': random.randint(30, 80),
-        'nutrition': random.randint(20, 60)
-    }
-    
-    # Add bonus points for specific keywords
-    bonus_triggers = {
-        'intense': 20,
-        'training': 15,
-        'cardio': 10,
-        'organic': 15,
-        'recycle': 10,
-        'meal prep': 10
-    }
-    
-    points = base_points[category]
-    
-    for trigger, bonus in bonus_triggers.items():
-        if trigger in title.lower():
-            points += bonus
-    
-    return min(max(points, 10), 100)  # Ensure between 10-100
+    return scoring_engine.score(title, category)
 
-def generate_fitness_plan(fitness_input):
-    """
-    Generate a fitness plan using Gemini API based on FitnessInput.
-    Returns a list of Task objects.
-    """
-    try:
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-1.5-flash')
-
-        # Get current date in YYYY-MM-DD format
-        start_date = datetime.now().strftime('%Y-%m-%d')
-        
-        prompt = f"""
+def build_plan_prompt(fitness_input, start_date):
+    """Build the Gemini prompt for a plan starting on start_date (YYYY-MM-DD)."""
+    return f"""
         Create a 5-day fitness plan with 5 daily tasks each day for a {fitness_input.sex} 
         aged {fitness_input.age}, weight {fitness_input.weight}kg, height {fitness_input.height}cm, 
         with the goal of {fitness_input.goal}. Include daily tasks categorized as 'exercise', 
@@ -66,92 +42,175 @@ def generate_fitness_plan(fitness_input):
             ...
         ]
         """
-        
-        response = model.generate_content(prompt)
+
+def request_llm_plan(fitness_input, start_date):
+    """
+    Ask Gemini for a plan and return the raw, unvalidated task list. When
+    PLAN_BATCH_WINDOW is set the request is merged with other users' by the
+    plan batcher; a missing or failed share raises, so fallback stays per user.
+    """
+    if settings.PLAN_BATCH_WINDOW > 0:
+        return plan_batcher.request(
+            fitness_input,
+            start_date,
+            timeout=settings.LLM_TIMEOUT + settings.PLAN_BATCH_WINDOW
+        )
+
+    text = get_llm_client().generate(build_plan_prompt(fitness_input, start_date.strftime('%Y-%m-%d')))
+    # Strip markdown and parse JSON
+    text = text.strip()
+    if text.startswith('```json'):
+        text = text[7:-3].strip()
+    return json.loads(text)
+
+def _record_fallback(job, error):
+    # A done job with an error tells the client it got synthesized tasks instead of Gemini's
+    if job is not None:
+        job.error = str(error)
+
+def generate_fitness_plan(fitness_input, job=None, premium=False):
+    """
+    Generate a fitness plan based on FitnessInput. Plans come from the local
+    synthesizer unless premium is set, in which case Gemini is asked and the
+    synthesizer is the fallback.
+    The plan becomes the user's active generation and is linked to job when
+    it is generated by a PlanJob.
+    Returns a list of Task objects.
+    """
+    today = datetime.now().date()
+    if not premium:
+        tasks = materialize_plan(fitness_input.user, synthesize_plan(fitness_input, today), job=job)
+        logger.info(f"Synthesized {len(tasks)} tasks for user {fitness_input.user.email}")
+        return tasks
+
+    try:
+        cached_tasks = plan_cache.get(fitness_input, today)
+        if cached_tasks is not None:
+            tasks = materialize_plan(fitness_input.user, cached_tasks, job=job)
+            logger.info(f"Served cached plan of {len(tasks)} tasks for user {fitness_input.user.email}")
+            return tasks
+
+        # Raises LLMUnavailable straight away while the circuit is open
+        raw_tasks = request_llm_plan(fitness_input, today)
         
         try:
-            # Strip markdown and parse JSON
-            text = response.text.strip()
-            if text.startswith('```json'):
-                text = text[7:-3].strip()
-            tasks_data = json.loads(text)
-            
-            # Validate tasks
-            valid_categories = {'exercise', 'nutrition', 'sustainability'}
-            for task in tasks_data:
-                if task['category'] not in valid_categories:
-                    raise ValueError(f"Invalid category: {task['category']}")
-                try:
-                    datetime.strptime(task['due_date'], '%Y-%m-%d')
-                except ValueError:
-                    raise ValueError(f"Invalid due_date format: {task['due_date']}")
+            tasks_data = validate_plan(raw_tasks)
+            plan_cache.put(fitness_input, tasks_data, today)
         except (json.JSONDecodeError, ValueError) as e:
-            logger.warning(f"Gemini API error: {str(e)}. Falling back to default tasks")
-            tasks_data = []
-            start_date = datetime.now()
-            for day in range(5):
-                due_date = (start_date + timedelta(days=day)).strftime('%Y-%m-%d')
-                tasks_data.extend([
-                    {"title": "Walk 30 minutes", "category": "exercise", "due_date": due_date},
-                    {"title": "High-protein meal", "category": "nutrition", "due_date": due_date},
-                    {"title": "Use reusable bottle", "category": "sustainability", "due_date": due_date},
-                    {"title": "Strength training", "category": "exercise", "due_date": due_date},
-                    {"title": "Vegetable intake", "category": "nutrition", "due_date": due_date}
-                ])
-
-        tasks = []
-        for task_data in tasks_data:
-            try:
-                task = Task(
-                    user=fitness_input.user,
-                    title=task_data['title'][:150],
-                    category=task_data['category'],
-                    due_date=task_data['due_date'],
-                    is_completed=False,
-                    points_rewarded=calculate_points(
-                        task_data['category'],
-                        task_data['title']
-                    )
-                )
-                task.save()
-                tasks.append(task)
-            except Exception as e:
-                logger.error(f"Error creating task: {str(e)}")
-                continue
+            logger.warning(f"Gemini API error: {str(e)}. Falling back to synthesized tasks")
+            _record_fallback(job, e)
+            tasks_data = synthesize_plan(fitness_input, today)
 
+        tasks = materialize_plan(fitness_input.user, tasks_data, job=job)
         logger.info(f"Generated {len(tasks)} tasks for user {fitness_input.user.email}")
         return tasks
     
     except Exception as e:
         logger.error(f"Error generating fitness plan: {str(e)}")
-        # Fallback default tasks with points
-        tasks = []
-        start_date = datetime.now()
-        for day in range(5):
-            due_date = start_date + timedelta(days=day)
-            default_tasks = [
-                ("Walk 30 minutes", "exercise", 40),
-                ("High-protein meal", "nutrition", 30),
-                ("Use public transport", "sustainability", 35),
-                ("Strength training", "exercise", 60),
-                ("Vegetable intake", "nutrition", 25)
-            ]
-            
-            for title, category, points in default_tasks:
-                task = Task(
-                    user=fitness_input.user,
-                    title=title,
-                    category=category,
-                    due_date=due_date,
-                    is_completed=False,
-                    points_rewarded=points
-                )
-                try:
-                    task.save()
-                    tasks.append(task)
-                except Exception as e:
-                    logger.error(f"Error saving fallback task: {str(e)}")
-                    continue
-
-        logger.info(f"Fallback: Generated {len(tasks)} default tasks")
-        return [task for task in tasks if task.id is not None]
\ No newline at end of file
+        _record_fallback(job, e)
+        try:
+            tasks = materialize_plan(fitness_input.user, synthesize_plan(fitness_input, today), job=job)
+        except Exception as e:
+            logger.error(f"Error saving fallback tasks: {str(e)}")
+            tasks = []
+
+        logger.info(f"Fallback: Synthesized {len(tasks)} tasks")
+        return tasks
+
+def validate_plan(tasks_data):
+    """
+    Validate a whole plan before anything is written.
+    Returns the cleaned task dicts or raises ValueError on the first bad entry.
+    """
+    if not isinstance(tasks_data, list) or not tasks_data:
+        raise ValueError("Plan must be a non-empty list of tasks")
+
+    cleaned = []
+    for task in tasks_data:
+        try:
+            title = str(task['title']).strip()[:150]
+            category = task['category']
+            due_date = task['due_date']
+        except (KeyError, TypeError):
+            raise ValueError(f"Malformed task: {task}")
+        if not title:
+            raise ValueError("Task title cannot be empty")
+        if category not in VALID_CATEGORIES:
+            raise ValueError(f"Invalid category: {category}")
+        try:
+            datetime.strptime(due_date, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid due_date format: {due_date}")
+
+        # Points always come from the scoring engine, never from the model's output
+        cleaned.append({'title': title, 'category': category, 'due_date': due_date})
+    return cleaned
+
+def build_plan_tasks(user, tasks_data, generation=None):
+    """Validate tasks_data and build unsaved Task objects for user."""
+    tasks_data = validate_plan(tasks_data)
+    scores = scoring_engine.score_many(
+        [task_data['title'] for task_data in tasks_data],
+        [task_data['category'] for task_data in tasks_data]
+    )
+    return [
+        Task(
+            user=user,
+            generation=generation,
+            title=task_data['title'],
+            category=task_data['category'],
+            due_date=task_data['due_date'],
+            is_completed=False,
+            points_rewarded=points
+        )
+        for task_data, points in zip(tasks_data, scores)
+    ]
+
+def save_plan_tasks(tasks):
+    """
+    Write tasks with one batched INSERT in a single transaction. bulk_create
+    skips post_save, so the gamification work for the batch runs once
+    afterwards instead of once per row.
+    """
+    with transaction.atomic():
+        Task.objects.bulk_create(tasks)
+        update_points_from_tasks(tasks)
+    return tasks
+
+def activate_generation(generation):
+    """Atomically make generation the user's only active plan generation."""
+    with transaction.atomic():
+        # Lock the user row so concurrent flips for the same user serialize
+        User.objects.select_for_update().only('id').get(id=generation.user_id)
+        PlanGeneration.objects.filter(
+            user_id=generation.user_id,
+            is_active=True
+        ).exclude(id=generation.id).update(is_active=False)
+        PlanGeneration.objects.filter(id=generation.id).update(is_active=True)
+    generation.is_active = True
+    return generation
+
+def get_active_generation(user):
+    """Return the user's active plan generation, starting an empty one if there is none."""
+    generation = PlanGeneration.objects.filter(user=user, is_active=True).first()
+    if generation is None:
+        generation = activate_generation(PlanGeneration.objects.create(user=user))
+    return generation
+
+def materialize_plan(user, tasks_data, job=None):
+    """
+    Validate tasks_data and save it for user as a new plan generation in one
+    batch, then flip the user's active generation to it in the same
+    transaction. Older generations are left for compact_plan_generations.
+    Returns the created Task objects.
+    """
+    generation = PlanGeneration(user=user)
+    tasks = build_plan_tasks(user, tasks_data, generation=generation)
+    with transaction.atomic():
+        generation.save()
+        save_plan_tasks(tasks)
+        activate_generation(generation)
+        if job is not None:
+            job.generation = generation
+            job.save(update_fields=['generation'])
+    return tasks
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import ScoringRule
+from .scoring import scoring_engine
+
+
+@receiver(post_save, sender=ScoringRule)
+@receiver(post_delete, sender=ScoringRule)
+def reload_scoring_rules(sender, **kwargs):
+    scoring_engine.invalidate()
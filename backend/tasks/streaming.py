@@ -0,0 +1,205 @@
+from collections import Counter
+from django.conf import settings
+from django.utils import timezone
+from datetime import datetime
+from .llm import get_llm_client
+from .models import PlanGeneration, PlanJob
+from .plan_cache import plan_cache
+from .serializers import TaskSerializer, PlanJobSerializer
+from .services import activate_generation, build_plan_prompt, build_plan_tasks, save_plan_tasks, validate_plan
+from .synthesizer import synthesize_plan
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TaskArrayParser:
+    """
+    Incremental parser for a JSON array of task objects arriving in chunks.
+    feed() returns every object completed by the chunk; anything before the
+    opening bracket (such as a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self._buffer = ''
+        self._pos = 0
+        self._started = False
+        self._finished = False
+        # Scanner state for the object currently being read
+        self._obj_start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def finished(self):
+        return self._finished
+
+    def feed(self, chunk):
+        self._buffer += chunk
+        objects = []
+
+        while not self._finished and self._pos < len(self._buffer):
+            char = self._buffer[self._pos]
+
+            if not self._started:
+                if char == '[':
+                    self._started = True
+                self._pos += 1
+                continue
+
+            if self._obj_start is None:
+                if char == '{':
+                    self._obj_start = self._pos
+                    self._depth = 1
+                elif char == ']':
+                    self._finished = True
+                elif char not in ' \t\r\n,':
+                    raise ValueError(f"Unexpected character in plan array: {char!r}")
+                self._pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    objects.append(json.loads(self._buffer[self._obj_start:self._pos + 1]))
+                    self._obj_start = None
+            self._pos += 1
+
+        # Drop consumed text so the buffer only holds the unfinished object
+        keep_from = self._obj_start if self._obj_start is not None else self._pos
+        self._buffer = self._buffer[keep_from:]
+        self._pos -= keep_from
+        if self._obj_start is not None:
+            self._obj_start = 0
+        return objects
+
+
+def _line(payload):
+    return json.dumps(payload) + '\n'
+
+
+def _missing_tasks(tasks, fallback_data):
+    """
+    Entries of fallback_data that bring each of its days up to the same
+    number of tasks, skipping titles the plan already has.
+    """
+    wanted = Counter(task_data['due_date'] for task_data in fallback_data)
+    have = Counter(str(task.due_date) for task in tasks)
+    titles = {task.title for task in tasks}
+    missing = []
+    for task_data in fallback_data:
+        day = task_data['due_date']
+        if have[day] < wanted[day] and task_data['title'] not in titles:
+            missing.append(task_data)
+            have[day] += 1
+    return missing
+
+
+def stream_fitness_plan(fitness_input, premium=False):
+    """
+    Generate a plan and yield NDJSON lines: {"type": "task"} lines for the
+    validated tasks, then a final {"type": "done"} line. Premium plans use
+    Gemini's streaming API; others come from the local synthesizer. Tasks
+    are saved in batches of PLAN_STREAM_BATCH_SIZE as they are parsed and
+    each batch is sent once saved, so the lines carry the stored rows. If
+    Gemini fails after tasks were sent, the days it left short are filled
+    from the synthesizer before the plan is activated. If the client
+    disconnects or saving fails, the job is marked failed and the
+    unfinished generation is never activated.
+    """
+    user = fitness_input.user
+    today = datetime.now().date()
+    # The new generation stays inactive, so the task list keeps showing the
+    # previous plan until the stream completes
+    generation = PlanGeneration.objects.create(user=user)
+    job = PlanJob.objects.create(
+        user=user,
+        premium=premium,
+        generation=generation,
+        status=PlanJob.STATUS_RUNNING
+    )
+
+    batch_size = settings.PLAN_STREAM_BATCH_SIZE
+    pending = []
+    streamed = []
+
+    def flush():
+        save_plan_tasks(pending)
+        streamed.extend(pending)
+        lines = [_line({'type': 'task', 'task': TaskSerializer(task).data}) for task in pending]
+        pending.clear()
+        yield from lines
+
+    def emit(tasks_data):
+        for task in build_plan_tasks(user, tasks_data, generation=generation):
+            pending.append(task)
+            if len(pending) >= batch_size:
+                yield from flush()
+
+    try:
+        try:
+            cached_tasks = plan_cache.get(fitness_input, today) if premium else None
+            if not premium:
+                yield from emit(synthesize_plan(fitness_input, today))
+            elif cached_tasks is not None:
+                yield from emit(cached_tasks)
+            else:
+                chunks = get_llm_client().stream(build_plan_prompt(fitness_input, today.strftime('%Y-%m-%d')))
+
+                parser = TaskArrayParser()
+                for chunk in chunks:
+                    for task_data in parser.feed(chunk):
+                        yield from emit(validate_plan([task_data]))
+                if not parser.finished:
+                    raise ValueError("Plan stream ended before the JSON array was closed")
+
+                plan_cache.put(fitness_input, [
+                    {'title': task.title, 'category': task.category, 'due_date': str(task.due_date)}
+                    for task in streamed + pending
+                ], today)
+        except Exception as e:
+            logger.warning(f"Streaming plan error for {user.email}: {str(e)}")
+            if not streamed:
+                logger.info(f"Falling back to synthesized tasks for {user.email}")
+                job.error = str(e)
+                pending.clear()
+                yield from emit(synthesize_plan(fitness_input, today))
+            else:
+                # Sent tasks cannot be taken back, so complete the plan
+                # around them rather than activating a truncated one
+                logger.info(f"Filling the rest of the plan with synthesized tasks for {user.email}")
+                job.error = str(e)
+                yield from emit(_missing_tasks(streamed + pending, synthesize_plan(fitness_input, today)))
+
+        if pending:
+            yield from flush()
+        activate_generation(generation)
+        job.status = PlanJob.STATUS_DONE
+    except GeneratorExit:
+        logger.warning(f"Client disconnected from plan stream for {user.email}")
+        job.status = PlanJob.STATUS_FAILED
+        job.error = 'Client disconnected before the plan was complete'
+        raise
+    except Exception as e:
+        logger.error(f"Streaming plan failed for {user.email}: {str(e)}")
+        job.status = PlanJob.STATUS_FAILED
+        job.error = str(e)
+    finally:
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+
+    logger.info(f"Streamed {len(streamed)} tasks for user {user.email}")
+    yield _line({'type': 'done', 'job': PlanJobSerializer(job).data})
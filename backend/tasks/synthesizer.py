@@ -0,0 +1,128 @@
+from datetime import timedelta
+from .plan_cache import profile_bucket
+import random
+import zlib
+
+INTENSITY_LEVELS = {'low': 0, 'moderate': 1, 'high': 2}
+
+# Highest intensity offered per age band and BMI band
+MAX_INTENSITY_BY_AGE = {
+    'under_18': 'moderate',
+    '18_29': 'high',
+    '30_44': 'high',
+    '45_59': 'moderate',
+    '60_plus': 'low',
+}
+MAX_INTENSITY_BY_BMI = {
+    'underweight': 'moderate',
+    'normal': 'high',
+    'overweight': 'high',
+    'obese': 'moderate',
+}
+
+ANY = None
+
+# (title, category, goal, sex, intensity, choices for {n})
+# goal and sex are ANY when the template suits everyone.
+TEMPLATES = [
+    # Exercise
+    ("Brisk walk for {n} minutes", 'exercise', ANY, ANY, 'low', (20, 30, 40)),
+    ("Gentle stretching routine, {n} minutes", 'exercise', ANY, ANY, 'low', (10, 15, 20)),
+    ("Chair squats, 3 sets of {n}", 'exercise', ANY, ANY, 'low', (8, 10, 12)),
+    ("Beginner yoga flow, {n} minutes", 'exercise', ANY, ANY, 'low', (15, 20, 30)),
+    ("Light cycling, {n} minutes", 'exercise', 'dieting', ANY, 'low', (20, 30)),
+    ("Cardio intervals, {n} rounds of 1 min fast / 1 min easy", 'exercise', 'dieting', ANY, 'moderate', (6, 8, 10)),
+    ("Bodyweight circuit, {n} rounds", 'exercise', ANY, ANY, 'moderate', (3, 4)),
+    ("Jog for {n} minutes", 'exercise', 'dieting', ANY, 'moderate', (20, 25, 30)),
+    ("Push-ups, 4 sets of {n}", 'exercise', 'bulking', ANY, 'moderate', (8, 10, 12, 15)),
+    ("Dumbbell lunges, 3 sets of {n} per leg", 'exercise', ANY, ANY, 'moderate', (8, 10, 12)),
+    ("Glute bridge training, 4 sets of {n}", 'exercise', ANY, 'female', 'moderate', (12, 15)),
+    ("Resistance band rows, 4 sets of {n}", 'exercise', 'bulking', ANY, 'moderate', (10, 12)),
+    ("Swim laps for {n} minutes", 'exercise', ANY, ANY, 'moderate', (20, 30)),
+    ("Strength training: squats and deadlifts, {n} sets each", 'exercise', 'bulking', ANY, 'high', (4, 5)),
+    ("Bench press training, 5 sets of {n}", 'exercise', 'bulking', 'male', 'high', (5, 6, 8)),
+    ("Pull-up training, {n} sets to near failure", 'exercise', 'bulking', ANY, 'high', (3, 4, 5)),
+    ("Intense HIIT session, {n} minutes", 'exercise', 'dieting', ANY, 'high', (15, 20, 25)),
+    ("Hill sprints, {n} repeats", 'exercise', 'dieting', ANY, 'high', (6, 8, 10)),
+    ("Kettlebell swings, {n} sets of 20", 'exercise', ANY, ANY, 'high', (4, 5)),
+    # Nutrition
+    ("Drink {n} glasses of water", 'nutrition', ANY, ANY, 'low', (6, 8)),
+    ("Eat {n} servings of vegetables", 'nutrition', ANY, ANY, 'low', (3, 4, 5)),
+    ("Swap sugary drinks for water or tea", 'nutrition', 'dieting', ANY, 'low', ()),
+    ("Meal prep {n} balanced lunches", 'nutrition', ANY, ANY, 'moderate', (2, 3, 4)),
+    ("Keep dinner under {n} kcal", 'nutrition', 'dieting', ANY, 'moderate', (500, 600, 700)),
+    ("High-fiber breakfast with oats and fruit", 'nutrition', 'dieting', ANY, 'low', ()),
+    ("Track calories for every meal today", 'nutrition', 'dieting', ANY, 'moderate', ()),
+    ("Skip late-night snacks after {n}:00", 'nutrition', 'dieting', ANY, 'low', (20, 21)),
+    ("Reach {n}g of protein today", 'nutrition', 'bulking', 'male', 'moderate', (140, 160, 180)),
+    ("Reach {n}g of protein today", 'nutrition', 'bulking', 'female', 'moderate', (90, 100, 120)),
+    ("Post-workout shake within {n} minutes of training", 'nutrition', 'bulking', ANY, 'moderate', (30, 45)),
+    ("Add a calorie-dense snack: nuts and Greek yogurt", 'nutrition', 'bulking', ANY, 'low', ()),
+    ("Eat {n} protein-rich meals today", 'nutrition', 'bulking', ANY, 'moderate', (4, 5)),
+    ("Cook an organic whole-food dinner", 'nutrition', ANY, ANY, 'low', ()),
+    ("Add calcium-rich foods to {n} meals", 'nutrition', ANY, 'female', 'low', (2, 3)),
+    # Sustainability
+    ("Use a reusable water bottle all day", 'sustainability', ANY, ANY, 'low', ()),
+    ("Bike or walk instead of driving for one trip", 'sustainability', ANY, ANY, 'moderate', ()),
+    ("Take public transport for your commute", 'sustainability', ANY, ANY, 'low', ()),
+    ("Recycle plastic and paper waste", 'sustainability', ANY, ANY, 'low', ()),
+    ("Have a fully plant-based lunch", 'sustainability', ANY, ANY, 'low', ()),
+    ("Take a shower under {n} minutes", 'sustainability', ANY, ANY, 'low', (5, 7)),
+    ("Bring your own bags for grocery shopping", 'sustainability', ANY, ANY, 'low', ()),
+    ("Buy local seasonal produce", 'sustainability', ANY, ANY, 'low', ()),
+    ("Unplug idle electronics before bed", 'sustainability', ANY, ANY, 'low', ()),
+    ("Pick up litter on a {n}-minute walk", 'sustainability', ANY, ANY, 'moderate', (15, 20)),
+    ("Compost your food scraps", 'sustainability', ANY, ANY, 'low', ()),
+]
+
+# Category mix per day; shuffled so days do not all look alike
+DAILY_MIX = ['exercise', 'exercise', 'nutrition', 'nutrition', 'sustainability']
+
+
+def _candidates(fitness_input):
+    sex, goal, age_band, bmi_band = profile_bucket(fitness_input)
+    max_level = min(
+        INTENSITY_LEVELS[MAX_INTENSITY_BY_AGE[age_band]],
+        INTENSITY_LEVELS[MAX_INTENSITY_BY_BMI[bmi_band]],
+    )
+    pools = {'exercise': [], 'nutrition': [], 'sustainability': []}
+    for template in TEMPLATES:
+        title, category, template_goal, template_sex, intensity, choices = template
+        if template_goal not in (ANY, goal) or template_sex not in (ANY, sex):
+            continue
+        if INTENSITY_LEVELS[intensity] > max_level:
+            continue
+        pools[category].append(template)
+    return pools
+
+
+def synthesize_plan(fitness_input, start_date, days=5, seed=None):
+    """
+    Build a personalized days x 5 plan from TEMPLATES without any network call.
+    Selection is seeded by user and start date, so the same request always
+    yields the same plan. Returns tasks_data ready for materialize_plan.
+    """
+    if seed is None:
+        seed = f"{fitness_input.user_id}:{start_date.isoformat()}"
+    rng = random.Random(zlib.crc32(str(seed).encode()))
+
+    pools = _candidates(fitness_input)
+    # Draw without replacement so titles repeat as little as possible across the plan
+    decks = {category: [] for category in pools}
+
+    def draw(category):
+        if not decks[category]:
+            decks[category] = rng.sample(pools[category], len(pools[category]))
+        return decks[category].pop()
+
+    tasks_data = []
+    for day in range(days):
+        due_date = (start_date + timedelta(days=day)).strftime('%Y-%m-%d')
+        mix = DAILY_MIX[:]
+        rng.shuffle(mix)
+        for category in mix:
+            title, category, _, _, _, choices = draw(category)
+            if choices:
+                title = title.format(n=rng.choice(choices))
+            tasks_data.append({'title': title, 'category': category, 'due_date': due_date})
+    return tasks_data
@@ -1,3 +1,813 @@
-from django.test import TestCase
+from datetime import datetime, timedelta
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from io import StringIO
+from gamification.models import OutboxEvent, UserPoints
+from gamification.signals import update_points_from_tasks
+from rest_framework.test import APIClient
+from unittest import mock
+from users.models import FitnessInput, User
+from .batching import PlanBatcher
+from .jobs import PlanQueueFull, _run_plan_job, submit_plan_job
+from .llm import FakeModel, FakeResponse, LLMClient, LLMUnavailable, set_llm_client
+from .models import PlanGeneration, PlanJob, ScoringRule, Task
+from .synthesizer import ANY, INTENSITY_LEVELS, TEMPLATES, synthesize_plan
+from .plan_cache import PlanCache, plan_cache, profile_bucket
+from .scoring import MAX_POINTS, ScoringEngine, scoring_engine
+from .services import build_plan_tasks, generate_fitness_plan, materialize_plan, validate_plan
+from .streaming import TaskArrayParser, stream_fitness_plan
+import json
+import re
+import threading
+import time
+import uuid
 
-# Create your tests here.
+
+def make_user(name):
+    return User.objects.create_user(email=f'{name}@example.com', username=name, password='pass')
+
+
+def make_fitness_input(user):
+    return FitnessInput.objects.create(user=user, weight=80, height=180, sex='male', age=30, goal='bulking')
+
+
+class ScriptedModel:
+    """Streams fixed chunks instead of a generated plan, then raises error if given."""
+
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        for chunk in self.chunks:
+            yield FakeResponse(chunk)
+        if self.error is not None:
+            raise self.error
+
+
+class TaskArrayParserTests(TestCase):
+    tasks = [
+        {'title': 'Say "hi" to {braces}, [brackets] and \\ slashes', 'category': 'exercise', 'due_date': '2026-01-01'},
+        {'title': 'Escaped \\"quote', 'category': 'nutrition', 'due_date': '2026-01-02'},
+    ]
+
+    def feed_all(self, parser, text, size):
+        objects = []
+        for i in range(0, len(text), size):
+            objects.extend(parser.feed(text[i:i + size]))
+        return objects
+
+    def test_any_chunking_gives_the_same_objects(self):
+        text = json.dumps(self.tasks)
+        for size in (1, 2, 3, 7, len(text)):
+            parser = TaskArrayParser()
+            self.assertEqual(self.feed_all(parser, text, size), self.tasks)
+            self.assertTrue(parser.finished)
+
+    def test_text_before_the_array_is_ignored(self):
+        parser = TaskArrayParser()
+        text = '```json\n' + json.dumps(self.tasks, indent=2) + '\n```'
+        self.assertEqual(self.feed_all(parser, text, 5), self.tasks)
+        self.assertTrue(parser.finished)
+
+    def test_unclosed_array_returns_complete_objects_only(self):
+        parser = TaskArrayParser()
+        text = json.dumps(self.tasks)[:-30]
+        self.assertEqual(self.feed_all(parser, text, 4), self.tasks[:1])
+        self.assertFalse(parser.finished)
+
+    def test_garbage_between_objects_is_rejected(self):
+        with self.assertRaises(ValueError):
+            TaskArrayParser().feed('[{"title": "a"}, oops]')
+
+
+class ScoringEngineTests(TestCase):
+    def base(self, title, category='nutrition'):
+        return ScoringEngine.base_points(category, title)
+
+    def test_scores_are_deterministic(self):
+        titles = ['Morning jog', 'Eat oats', 'Morning jog', 'Recycle bottles']
+        categories = ['exercise', 'nutrition', 'exercise', 'sustainability']
+        scores = scoring_engine.score_many(titles, categories)
+        self.assertEqual(scores, scoring_engine.score_many(titles, categories))
+        self.assertEqual(scores[0], scores[2])
+        self.assertEqual(scores, [scoring_engine.score(title, category) for title, category in zip(titles, categories)])
+        self.assertEqual(scores[0], min(self.base('Morning jog', 'exercise'), MAX_POINTS))
+
+    def test_every_contained_keyword_counts_once(self):
+        ScoringRule.objects.create(keyword='prep', bonus=5)
+        ScoringRule.objects.create(keyword='meal', bonus=3)
+        title = 'Meal prep, then more meal prep'
+        # The seeded 'meal prep' rule is worth 10
+        self.assertEqual(scoring_engine.score(title, 'nutrition'), self.base(title) + 18)
+
+    def test_rule_changes_are_picked_up(self):
+        title = 'Zumba with friends'
+        self.assertEqual(scoring_engine.score(title, 'nutrition'), self.base(title))
+
+        rule = ScoringRule.objects.create(keyword='Zumba', bonus=15)
+        self.assertEqual(scoring_engine.score(title, 'nutrition'), self.base(title) + 15)
+
+        rule.bonus = 5
+        rule.save()
+        self.assertEqual(scoring_engine.score(title, 'nutrition'), self.base(title) + 5)
+
+        rule.is_active = False
+        rule.save()
+        self.assertEqual(scoring_engine.score(title, 'nutrition'), self.base(title))
+
+        rule.delete()
+        ScoringRule.objects.create(keyword='friends', bonus=7)
+        self.assertEqual(scoring_engine.score(title, 'nutrition'), self.base(title) + 7)
+
+
+class ValidatePlanTests(TestCase):
+    def test_model_supplied_points_are_ignored(self):
+        user = make_user('validate')
+        tasks_data = [
+            {'title': 'Run 5k', 'category': 'exercise', 'due_date': '2026-01-01', 'points_rewarded': 10 ** 6},
+            {'title': 'Eat oats', 'category': 'nutrition', 'due_date': '2026-01-01', 'points_rewarded': -5},
+        ]
+        self.assertEqual(validate_plan(tasks_data), [
+            {'title': 'Run 5k', 'category': 'exercise', 'due_date': '2026-01-01'},
+            {'title': 'Eat oats', 'category': 'nutrition', 'due_date': '2026-01-01'},
+        ])
+        tasks = build_plan_tasks(user, tasks_data)
+        self.assertEqual(
+            [task.points_rewarded for task in tasks],
+            [scoring_engine.score('Run 5k', 'exercise'), scoring_engine.score('Eat oats', 'nutrition')]
+        )
+
+    def test_bad_entries_are_rejected(self):
+        for task in (
+            {'title': ' ', 'category': 'exercise', 'due_date': '2026-01-01'},
+            {'title': 'Nap', 'category': 'sleep', 'due_date': '2026-01-01'},
+            {'title': 'Run', 'category': 'exercise', 'due_date': '01/01/2026'},
+            {'title': 'Run', 'category': 'exercise'},
+        ):
+            with self.assertRaises(ValueError):
+                validate_plan([task])
+
+
+class PlanCacheTests(TestCase):
+    start = datetime(2026, 3, 2).date()
+
+    def setUp(self):
+        self.now = 0
+        self.cache = PlanCache(maxsize=2, ttl=60, timer=lambda: self.now)
+        self.user = make_user('cached')
+        self.fitness_input = make_fitness_input(self.user)
+
+    def profile(self, **fields):
+        values = {'weight': 80, 'height': 180, 'sex': 'male', 'age': 30, 'goal': 'bulking', **fields}
+        return FitnessInput(user=self.user, **values)
+
+    def plan(self, start):
+        return FakeModel().plan_for(f'starting from {start.isoformat()}')
+
+    def test_profiles_are_normalized_into_buckets(self):
+        self.assertEqual(profile_bucket(self.profile()), ('male', 'bulking', '30_44', 'normal'))
+        # Nearby ages and weights share the bucket, band edges do not
+        self.assertEqual(profile_bucket(self.profile(age=44, weight=78)), profile_bucket(self.profile()))
+        self.assertEqual(profile_bucket(self.profile(age=45))[2], '45_59')
+        self.assertEqual(profile_bucket(self.profile(age=17))[2], 'under_18')
+        self.assertEqual(profile_bucket(self.profile(weight=59))[3], 'underweight')
+        self.assertEqual(profile_bucket(self.profile(weight=90))[3], 'overweight')
+        self.assertEqual(profile_bucket(self.profile(weight=120))[3], 'obese')
+        self.assertEqual(profile_bucket(self.profile(height=0))[3], 'underweight')
+
+    def test_hit_is_redated_to_the_new_start(self):
+        self.cache.put(self.fitness_input, self.plan(self.start), self.start)
+        later = self.start + timedelta(days=10)
+        hit = self.cache.get(self.profile(age=31), later)
+        self.assertEqual(hit, self.plan(later))
+
+    def test_entries_expire_after_ttl(self):
+        self.cache.put(self.fitness_input, self.plan(self.start), self.start)
+        self.now = 59
+        self.assertIsNotNone(self.cache.get(self.fitness_input, self.start))
+        self.now = 60
+        self.assertIsNone(self.cache.get(self.fitness_input, self.start))
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_least_recently_used_bucket_is_evicted(self):
+        first, second, third = self.profile(), self.profile(goal='dieting'), self.profile(sex='female')
+        self.cache.put(first, self.plan(self.start), self.start)
+        self.cache.put(second, self.plan(self.start), self.start)
+        self.cache.get(first, self.start)
+        self.cache.put(third, self.plan(self.start), self.start)
+
+        self.assertIsNotNone(self.cache.get(first, self.start))
+        self.assertIsNone(self.cache.get(second, self.start))
+        self.assertIsNotNone(self.cache.get(third, self.start))
+
+    def test_hits_and_misses_are_counted(self):
+        self.assertIsNone(self.cache.get(self.fitness_input, self.start))
+        self.cache.put(self.fitness_input, self.plan(self.start), self.start)
+        self.cache.get(self.fitness_input, self.start)
+        self.cache.get(self.fitness_input, self.start)
+        self.assertEqual(self.cache.stats(), {'size': 1, 'hits': 2, 'misses': 1})
+
+        self.cache.clear()
+        self.assertEqual(self.cache.stats(), {'size': 0, 'hits': 0, 'misses': 0})
+
+    @override_settings(PLAN_BATCH_WINDOW=0)
+    def test_cached_premium_plan_makes_no_llm_call(self):
+        plan_cache.clear()
+        self.addCleanup(plan_cache.clear)
+        model = FakeModel()
+        set_llm_client(LLMClient(model=model))
+        self.addCleanup(set_llm_client, None)
+        today = datetime.now().date()
+        plan_cache.put(self.fitness_input, self.plan(today), today)
+
+        tasks = generate_fitness_plan(self.fitness_input, premium=True)
+        self.assertEqual(model.calls, 0)
+        self.assertEqual(len(tasks), 25)
+        self.assertTrue(all(task.title.startswith('Fake') for task in tasks))
+        self.assertEqual(plan_cache.stats()['hits'], 1)
+
+
+class SynthesizerTests(TestCase):
+    start = datetime(2026, 3, 2).date()
+
+    def setUp(self):
+        self.user = make_user('synth')
+
+    def profile(self, **fields):
+        values = {'weight': 80, 'height': 180, 'sex': 'male', 'age': 30, 'goal': 'bulking', **fields}
+        return FitnessInput(user=self.user, **values)
+
+    def templates_of(self, plan):
+        """The TEMPLATES entry each synthesized task was drawn from."""
+        patterns = [
+            (re.compile(re.escape(template[0]).replace(re.escape('{n}'), r'\d+') + '$'), template)
+            for template in TEMPLATES
+        ]
+        return [next(template for pattern, template in patterns if pattern.match(task['title'])) for task in plan]
+
+    def test_same_user_and_date_give_the_same_plan(self):
+        plan = synthesize_plan(self.profile(), self.start)
+        self.assertEqual(synthesize_plan(self.profile(), self.start), plan)
+        self.assertNotEqual(synthesize_plan(self.profile(), self.start + timedelta(days=1)), plan)
+
+    def test_plan_has_five_tasks_on_each_of_five_days(self):
+        plan = synthesize_plan(self.profile(), self.start)
+        self.assertEqual(len(plan), 25)
+        days = sorted({task['due_date'] for task in plan})
+        self.assertEqual(days, [(self.start + timedelta(days=n)).strftime('%Y-%m-%d') for n in range(5)])
+        for day in days:
+            categories = sorted(task['category'] for task in plan if task['due_date'] == day)
+            self.assertEqual(categories, ['exercise', 'exercise', 'nutrition', 'nutrition', 'sustainability'])
+        self.assertEqual(validate_plan(plan), plan)
+
+    def test_goal_changes_the_selection(self):
+        bulking = synthesize_plan(self.profile(goal='bulking'), self.start)
+        dieting = synthesize_plan(self.profile(goal='dieting'), self.start)
+        self.assertNotEqual(bulking, dieting)
+        for goal, plan in (('bulking', bulking), ('dieting', dieting)):
+            goals = {template[2] for template in self.templates_of(plan)}
+            self.assertTrue(goals <= {ANY, goal})
+            self.assertIn(goal, goals)
+
+    def test_age_and_bmi_cap_the_intensity(self):
+        def intensities(plan):
+            return {INTENSITY_LEVELS[template[4]] for template in self.templates_of(plan)}
+
+        self.assertEqual(max(intensities(synthesize_plan(self.profile(), self.start))), INTENSITY_LEVELS['high'])
+        self.assertEqual(intensities(synthesize_plan(self.profile(age=65), self.start)), {INTENSITY_LEVELS['low']})
+        self.assertLessEqual(max(intensities(synthesize_plan(self.profile(weight=120), self.start))), INTENSITY_LEVELS['moderate'])
+
+
+class PerProfileModel(FakeModel):
+    """Answers batched prompts with a plan per profile, titled with its age; ages in skip get none."""
+
+    def __init__(self, skip=(), **kwargs):
+        super().__init__(**kwargs)
+        self.skip = set(skip)
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        plans = json.loads(super().generate_content(prompt).text)
+        profiles = json.loads(re.search(r'Profiles: (\[.*\])', prompt).group(1))
+        return FakeResponse(json.dumps({
+            profile['id']: [{**task, 'title': f"Age {profile['age']}: {task['title']}"} for task in plans[profile['id']]]
+            for profile in profiles if profile['age'] not in self.skip
+        }))
+
+
+class PlanBatcherTests(TestCase):
+    start = datetime(2026, 3, 2).date()
+
+    def make_batcher(self, model, max_batch=3):
+        # A long window, so each batch closes on max_batch rather than on timing
+        batcher = PlanBatcher(window=5, max_batch=max_batch, client=LLMClient(model=model))
+        self.addCleanup(batcher._dispatcher.shutdown)
+        return batcher
+
+    def profiles(self, *ages):
+        return [FitnessInput(user=make_user(f'batched{age}'), weight=80, height=180, sex='male', age=age, goal='bulking') for age in ages]
+
+    def test_batched_response_is_split_per_profile(self):
+        model = PerProfileModel()
+        batcher = self.make_batcher(model)
+        futures = {profile.age: batcher.submit(profile, self.start) for profile in self.profiles(21, 35, 50)}
+
+        for age, future in futures.items():
+            plan = future.result(timeout=5)
+            self.assertEqual(len(plan), 25)
+            self.assertTrue(all(task['title'].startswith(f'Age {age}: ') for task in plan))
+        self.assertEqual((model.calls, batcher.batches), (1, 1))
+
+    @override_settings(PLAN_BATCH_WINDOW=5)
+    def test_profile_missing_from_the_response_falls_back_alone(self):
+        plan_cache.clear()
+        self.addCleanup(plan_cache.clear)
+        model = PerProfileModel(skip={35})
+        batcher = self.make_batcher(model, max_batch=2)
+        other, missing = self.profiles(21, 35)
+        missing.save()
+
+        other_future = batcher.submit(other, datetime.now().date())
+        with mock.patch('tasks.services.plan_batcher', batcher):
+            tasks = generate_fitness_plan(missing, premium=True)
+
+        self.assertEqual(len(other_future.result(timeout=5)), 25)
+        self.assertEqual(model.calls, 1)
+        # The missing user got a synthesized plan instead of someone else's
+        self.assertEqual(len(tasks), 25)
+        self.assertFalse(any(task.title.startswith('Age') or task.title.startswith('Fake') for task in tasks))
+
+    def test_failed_batch_fails_every_waiter(self):
+        batcher = self.make_batcher(FakeModel(fail=True))
+        futures = [batcher.submit(profile, self.start) for profile in self.profiles(21, 35, 50)]
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+
+    @override_settings(PLAN_BATCH_WINDOW=5)
+    def test_failed_batch_falls_back_for_the_waiting_user(self):
+        plan_cache.clear()
+        batcher = self.make_batcher(FakeModel(fail=True), max_batch=1)
+        fitness_input = make_fitness_input(make_user('batchfail'))
+        with mock.patch('tasks.services.plan_batcher', batcher):
+            tasks = generate_fitness_plan(fitness_input, premium=True)
+        self.assertEqual(len(tasks), 25)
+        self.assertTrue(PlanGeneration.objects.get(user=fitness_input.user).is_active)
+
+
+class LLMClientTests(TestCase):
+    def test_breaker_opens_after_threshold(self):
+        model = FakeModel(fail=True)
+        client = LLMClient(model=model, failure_threshold=3, reset_timeout=60)
+        for _ in range(3):
+            with self.assertRaises(RuntimeError):
+                client.generate('plan')
+        self.assertEqual(client.breaker.state, 'open')
+
+        with self.assertRaises(LLMUnavailable):
+            client.generate('plan')
+        self.assertEqual(model.calls, 3)
+
+    def test_breaker_half_opens_after_reset_timeout(self):
+        model = FakeModel(fail=True)
+        client = LLMClient(model=model, failure_threshold=1, reset_timeout=0.05)
+        with self.assertRaises(RuntimeError):
+            client.generate('plan')
+        time.sleep(0.06)
+        self.assertEqual(client.breaker.state, 'half_open')
+
+        # A failed trial re-opens the circuit straight away
+        with self.assertRaises(RuntimeError):
+            client.generate('plan')
+        self.assertEqual(client.breaker.state, 'open')
+
+        time.sleep(0.06)
+        model.fail = False
+        self.assertTrue(client.breaker.allow())
+        # Only one trial call is let through while half-open
+        self.assertFalse(client.breaker.allow())
+        client.breaker.record_success()
+        self.assertEqual(client.breaker.state, 'closed')
+        client.generate('plan')
+        self.assertEqual(model.calls, 3)
+
+    def test_saturated_client_raises_unavailable(self):
+        model = FakeModel()
+        client = LLMClient(model=model, timeout=0.01, max_concurrency=1)
+        # An open stream holds its slot until it is exhausted or closed
+        chunks = client.stream('plan')
+        next(chunks)
+        for _ in range(client.breaker.failure_threshold):
+            with self.assertRaises(LLMUnavailable):
+                client.generate('plan')
+        self.assertEqual(model.calls, 1)
+        self.assertEqual(client.breaker.state, 'closed')
+
+        chunks.close()
+        client.generate('plan')
+        self.assertEqual(model.calls, 2)
+
+    @override_settings(PLAN_BATCH_WINDOW=0)
+    def test_premium_plan_falls_back_while_circuit_is_open(self):
+        plan_cache.clear()
+        model = FakeModel()
+        client = LLMClient(model=model, failure_threshold=2, reset_timeout=60)
+        set_llm_client(client)
+        self.addCleanup(set_llm_client, None)
+        client.breaker.record_failure()
+        client.breaker.record_failure()
+
+        user = make_user('breaker')
+        tasks = generate_fitness_plan(make_fitness_input(user), premium=True)
+        self.assertEqual(model.calls, 0)
+        self.assertTrue(tasks)
+        self.assertFalse(any(task.title.startswith('Fake') for task in tasks))
+        self.assertEqual(PlanGeneration.objects.get(user=user, is_active=True).tasks.count(), len(tasks))
+
+
+class FitnessPlanStreamTests(TestCase):
+    fitness_input = {'weight': '80', 'height': '180', 'age': '30', 'sex': 'male', 'goal': 'bulking'}
+
+    def setUp(self):
+        cache.clear()
+        plan_cache.clear()
+        self.model = FakeModel(chunk_size=7)
+        set_llm_client(LLMClient(model=self.model))
+        self.addCleanup(set_llm_client, None)
+        self.user = make_user('stream')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def stream(self, data):
+        response = self.client.post('/api/tasks/plan/stream/', data, format='json')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        return response, [json.loads(line) for line in lines]
+
+    def test_form_strings_are_converted_before_streaming(self):
+        response, lines = self.stream({**self.fitness_input, 'premium': 'true'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.model.calls, 1)
+        self.assertEqual([line['type'] for line in lines], ['task'] * 25 + ['done'])
+        self.assertEqual(lines[-1]['job']['status'], PlanJob.STATUS_DONE)
+        self.assertTrue(PlanGeneration.objects.get(user=self.user).is_active)
+
+    def test_invalid_input_is_rejected_before_any_job(self):
+        response = self.client.post('/api/tasks/plan/stream/', {**self.fitness_input, 'weight': 'heavy'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('weight', response.data)
+        self.assertFalse(PlanJob.objects.exists())
+        self.assertFalse(PlanGeneration.objects.exists())
+
+
+class InlineExecutor:
+    """Runs submitted plan jobs straight away on the test's connection."""
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+class PlanJobQueueTests(TestCase):
+    fitness_input = {'weight': '80', 'height': '180', 'age': '30', 'sex': 'male', 'goal': 'bulking'}
+
+    def setUp(self):
+        cache.clear()
+        self.slots = threading.BoundedSemaphore(2)
+        for target, value in (
+            ('tasks.jobs._slots', self.slots),
+            ('tasks.jobs._get_executor', lambda: InlineExecutor()),
+            # The worker's connection cleanup would close the test transaction
+            ('tasks.jobs.close_old_connections', lambda: None),
+        ):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = make_user('queued')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/tasks/plan/', self.fitness_input, format='json')
+
+    def assertSlotsFree(self, count):
+        taken = 0
+        while self.slots.acquire(blocking=False):
+            taken += 1
+        self.assertEqual(taken, count)
+
+    def test_plan_request_is_accepted_then_polled(self):
+        response = self.post()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['job']['status'], PlanJob.STATUS_PENDING)
+        self.assertEqual(response.data['fitness_input']['goal'], 'bulking')
+
+        status_response = self.client.get(f"/api/tasks/plan/{response.data['job']['id']}/")
+        self.assertEqual(status_response.status_code, 200)
+        self.assertEqual(status_response.data['job']['status'], PlanJob.STATUS_DONE)
+        self.assertEqual(len(status_response.data['tasks']), 25)
+        self.assertSlotsFree(2)
+
+    @override_settings(PLAN_BATCH_WINDOW=0)
+    def test_premium_fallback_is_reported_on_the_done_job(self):
+        plan_cache.clear()
+        set_llm_client(LLMClient(model=FakeModel(fail=True)))
+        self.addCleanup(set_llm_client, None)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/tasks/plan/', {**self.fitness_input, 'premium': 'true'}, format='json')
+
+        job = self.client.get(f"/api/tasks/plan/{response.data['job']['id']}/").data['job']
+        self.assertEqual(job['status'], PlanJob.STATUS_DONE)
+        self.assertEqual(job['error'], 'Fake model failure')
+
+    def test_full_queue_returns_503(self):
+        for _ in range(2):
+            self.slots.acquire()
+        with self.assertRaises(PlanQueueFull):
+            submit_plan_job(make_fitness_input(make_user('other')))
+
+        response = self.client.post('/api/tasks/plan/', self.fitness_input, format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('error', response.data)
+        self.assertFalse(PlanJob.objects.exists())
+
+    def test_failed_submit_fails_the_job_and_frees_its_slot(self):
+        broken = mock.Mock()
+        broken.submit.side_effect = RuntimeError('cannot schedule new futures after shutdown')
+        with mock.patch('tasks.jobs._get_executor', return_value=broken):
+            response = self.post()
+
+        self.assertEqual(response.status_code, 202)
+        job = PlanJob.objects.get(id=response.data['job']['id'])
+        self.assertEqual(job.status, PlanJob.STATUS_FAILED)
+        self.assertIn('shutdown', job.error)
+        self.assertSlotsFree(2)
+
+    def test_job_without_fitness_input_fails(self):
+        job = PlanJob.objects.create(user=self.user)
+        self.slots.acquire()
+        _run_plan_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, PlanJob.STATUS_FAILED)
+        self.assertTrue(job.error)
+        self.assertIsNotNone(job.finished_at)
+        self.assertSlotsFree(2)
+
+    @override_settings(PLAN_JOB_STALE_AFTER=60)
+    def test_stale_job_is_failed_when_polled_and_never_run(self):
+        make_fitness_input(self.user)
+        job = PlanJob.objects.create(user=self.user)
+        PlanJob.objects.filter(id=job.id).update(created_at=timezone.now() - timedelta(minutes=5))
+
+        response = self.client.get(f'/api/tasks/plan/{job.id}/')
+        self.assertEqual(response.data['job']['status'], PlanJob.STATUS_FAILED)
+        self.assertNotIn('tasks', response.data)
+
+        # A worker reaching the job afterwards leaves it alone
+        self.slots.acquire()
+        _run_plan_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, PlanJob.STATUS_FAILED)
+        self.assertFalse(PlanGeneration.objects.filter(user=self.user).exists())
+
+    def test_other_users_job_is_not_found(self):
+        job = PlanJob.objects.create(user=make_user('someone'))
+        response = self.client.get(f'/api/tasks/plan/{job.id}/')
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('error', response.data)
+
+
+@override_settings(PLAN_STREAM_BATCH_SIZE=5)
+class StreamFitnessPlanTests(TestCase):
+    def setUp(self):
+        plan_cache.clear()
+        self.user = make_user('streamer')
+        self.fitness_input = make_fitness_input(self.user)
+        self.addCleanup(set_llm_client, None)
+
+    def use_model(self, model):
+        set_llm_client(LLMClient(model=model))
+
+    def test_tasks_are_sent_in_saved_batches(self):
+        self.use_model(FakeModel(chunk_size=16))
+        lines = stream_fitness_plan(self.fitness_input, premium=True)
+        first = json.loads(next(lines))
+        generation = PlanGeneration.objects.get(user=self.user)
+        self.assertEqual(Task.objects.filter(generation=generation).count(), 5)
+        self.assertIsNotNone(first['task']['created_at'])
+
+        rest = [json.loads(line) for line in lines]
+        self.assertEqual(Task.objects.filter(generation=generation).count(), 25)
+        self.assertTrue(all(line['task']['created_at'] for line in rest[:-1]))
+        self.assertEqual(rest[-1]['job']['status'], PlanJob.STATUS_DONE)
+
+    def test_client_disconnect_fails_the_job(self):
+        self.use_model(FakeModel(chunk_size=16))
+        lines = stream_fitness_plan(self.fitness_input, premium=True)
+        next(lines)
+        lines.close()
+
+        job = PlanJob.objects.get(user=self.user)
+        self.assertEqual(job.status, PlanJob.STATUS_FAILED)
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(job.generation.is_active)
+
+    def test_unclosed_array_falls_back_before_anything_is_sent(self):
+        plan = json.dumps(FakeModel().plan_for('starting from 2026-01-01')[:3])
+        self.use_model(ScriptedModel([plan[:40], plan[40:-1]]))
+        lines = [json.loads(line) for line in stream_fitness_plan(self.fitness_input, premium=True)]
+
+        titles = [line['task']['title'] for line in lines[:-1]]
+        self.assertTrue(titles)
+        self.assertFalse(any(title.startswith('Fake') for title in titles))
+        self.assertEqual(lines[-1]['job']['status'], PlanJob.STATUS_DONE)
+        self.assertEqual(Task.objects.filter(generation__is_active=True).count(), len(titles))
+
+    def test_failure_after_first_batch_fills_the_plan(self):
+        previous = generate_fitness_plan(self.fitness_input)[0].generation
+        plan = FakeModel().plan_for(f"starting from {datetime.now().date().isoformat()}")
+        # The first day and one task of the second arrive before Gemini fails
+        text = json.dumps(plan)
+        cut = text.index('}', text.index(plan[5]['title'])) + 1
+        self.use_model(ScriptedModel([text[:cut]], error=RuntimeError('Gemini stream reset')))
+        lines = [json.loads(line) for line in stream_fitness_plan(self.fitness_input, premium=True)]
+
+        done = lines[-1]['job']
+        self.assertEqual(done['status'], PlanJob.STATUS_DONE)
+        self.assertEqual(done['error'], 'Gemini stream reset')
+        generation = PlanJob.objects.get(pk=done['id']).generation
+        previous.refresh_from_db()
+        self.assertTrue(generation.is_active)
+        self.assertFalse(previous.is_active)
+
+        tasks = Task.objects.filter(generation=generation)
+        self.assertEqual(tasks.count(), 25)
+        self.assertEqual(tasks.filter(title__startswith='Fake').count(), 6)
+        per_day = {task.due_date for task in tasks}
+        self.assertEqual(len(per_day), 5)
+        for due_date in per_day:
+            self.assertEqual(tasks.filter(due_date=due_date).count(), 5)
+        self.assertEqual(len(lines) - 1, 25)
+
+
+class PlanGenerationTests(TestCase):
+    def setUp(self):
+        self.user = make_user('generations')
+        self.fitness_input = make_fitness_input(self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_new_plan_replaces_the_listed_one(self):
+        first = generate_fitness_plan(self.fitness_input)
+        second = generate_fitness_plan(self.fitness_input)
+
+        self.assertEqual(PlanGeneration.objects.filter(user=self.user).count(), 2)
+        active = PlanGeneration.objects.get(user=self.user, is_active=True)
+        self.assertEqual(active, second[0].generation)
+        self.assertNotEqual(active, first[0].generation)
+
+        listed = self.client.get('/api/tasks/list/').data
+        self.assertEqual({task['id'] for task in listed}, {str(task.id) for task in second})
+
+    def test_failed_plan_keeps_the_previous_one_active(self):
+        plan = generate_fitness_plan(self.fitness_input)
+        with self.assertRaises(ValueError):
+            materialize_plan(self.user, [{'title': 'Nap', 'category': 'sleep', 'due_date': '2026-01-01'}])
+        self.assertEqual(PlanGeneration.objects.get(user=self.user, is_active=True), plan[0].generation)
+
+
+class CompactPlanGenerationsTests(TestCase):
+    def setUp(self):
+        self.user = make_user('compact')
+        today = timezone.now().date()
+        materialize_plan(self.user, synthesize_plan(make_fitness_input(self.user), today))
+        self.inactive = {}
+        for days in (1, 2, 40, 50, 60):
+            generation = PlanGeneration.objects.create(user=self.user)
+            Task.objects.create(user=self.user, generation=generation, title='Old', category='exercise', due_date=today)
+            PlanGeneration.objects.filter(id=generation.id).update(created_at=timezone.now() - timedelta(days=days))
+            self.inactive[days] = generation.id
+
+    def compact(self, *args):
+        out = StringIO()
+        call_command('compact_plan_generations', '--keep=2', '--older-than-days=30', *args, stdout=out)
+        return out.getvalue()
+
+    def test_keeps_the_newest_inactive_generations_and_the_active_one(self):
+        self.assertIn('3 plan generations would be deleted', self.compact('--dry-run'))
+        self.assertEqual(PlanGeneration.objects.filter(user=self.user).count(), 6)
+
+        self.compact()
+        self.assertEqual(
+            set(PlanGeneration.objects.filter(user=self.user, is_active=False).values_list('id', flat=True)),
+            {self.inactive[1], self.inactive[2]}
+        )
+        self.assertTrue(PlanGeneration.objects.filter(user=self.user, is_active=True).exists())
+        self.assertFalse(Task.objects.filter(generation__isnull=True).exists())
+        self.assertEqual(Task.objects.filter(title='Old').count(), 2)
+
+
+class GroupExistingTasksMigrationTests(TransactionTestCase):
+    migrate_from = [('tasks', '0003_planjob_premium')]
+    migrate_to = [('tasks', '0004_plangeneration')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_each_user_gets_one_active_generation_with_their_tasks(self):
+        apps = self.migrate(self.migrate_from)
+        User = apps.get_model('users', 'User')
+        OldTask = apps.get_model('tasks', 'Task')
+        OldPlanJob = apps.get_model('tasks', 'PlanJob')
+        users = [User.objects.create(email=f'legacy{n}@example.com', username=f'legacy{n}') for n in range(2)]
+        User.objects.create(email='idle@example.com', username='idle')
+        older_job = OldPlanJob.objects.create(user=users[0])
+        latest_job = OldPlanJob.objects.create(user=users[0])
+        OldPlanJob.objects.filter(id=older_job.id).update(created_at=timezone.now() - timedelta(days=1))
+        for n in range(3):
+            OldTask.objects.create(user=users[0], job=latest_job if n else older_job, title=f'T{n}', category='exercise', due_date='2026-01-01')
+        OldTask.objects.create(user=users[1], title='Solo', category='nutrition', due_date='2026-01-01')
+
+        apps = self.migrate(self.migrate_to)
+        PlanGeneration = apps.get_model('tasks', 'PlanGeneration')
+        NewTask = apps.get_model('tasks', 'Task')
+        NewPlanJob = apps.get_model('tasks', 'PlanJob')
+
+        self.assertEqual(PlanGeneration.objects.count(), 2)
+        for user in users:
+            generation = PlanGeneration.objects.get(user_id=user.id)
+            self.assertTrue(generation.is_active)
+            self.assertFalse(NewTask.objects.filter(user_id=user.id).exclude(generation=generation).exists())
+        self.assertEqual(NewPlanJob.objects.get(id=latest_job.id).generation, PlanGeneration.objects.get(user_id=users[0].id))
+        self.assertIsNone(NewPlanJob.objects.get(id=older_job.id).generation)
+
+
+class TaskBulkCompleteTests(TestCase):
+    def setUp(self):
+        self.user = make_user('bulk')
+        self.other = make_user('other')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def make_tasks(self, user, count, **fields):
+        return [
+            Task.objects.create(user=user, title=f'Task {n}', category='exercise', due_date='2026-01-01', points_rewarded=10, **fields)
+            for n in range(count)
+        ]
+
+    def complete(self, tasks):
+        return self.client.post('/api/tasks/list/complete/', {'task_ids': [str(task.id) for task in tasks]}, format='json')
+
+    @override_settings(GAMIFICATION_OUTBOX=False)
+    def test_only_own_open_tasks_are_completed(self):
+        mine = self.make_tasks(self.user, 3)
+        done = self.make_tasks(self.user, 1, is_completed=True, points_processed=True)
+        theirs = self.make_tasks(self.other, 2)
+
+        with mock.patch('tasks.views.update_points_from_tasks', wraps=update_points_from_tasks) as credit:
+            response = self.complete(mine + done + theirs)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({task['id'] for task in response.data['completed']}, {str(task.id) for task in mine})
+        self.assertEqual(response.data['points_awarded'], 30)
+        credit.assert_called_once()
+
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, 30)
+        self.assertFalse(Task.objects.filter(id__in=[task.id for task in theirs], is_completed=True).exists())
+        self.assertEqual(UserPoints.objects.get(user=self.other).total_points, 0)
+
+    @override_settings(GAMIFICATION_OUTBOX=True)
+    def test_one_outbox_write_per_call(self):
+        tasks = self.make_tasks(self.user, 20)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.complete(tasks)
+        self.assertEqual(len(response.data['completed']), 20)
+        outbox_table = OutboxEvent._meta.db_table
+        inserts = [query for query in queries if query['sql'].startswith('INSERT') and f'"{outbox_table}"' in query['sql']]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(OutboxEvent.objects.filter(user=self.user).count(), 20)
+
+        # A replay finds nothing left to complete and writes nothing
+        self.complete(tasks)
+        self.assertEqual(OutboxEvent.objects.filter(user=self.user).count(), 20)
+
+    def test_at_most_100_ids(self):
+        response = self.client.post(
+            '/api/tasks/list/complete/',
+            {'task_ids': [str(uuid.uuid4()) for _ in range(101)]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('task_ids', response.data)
+        response = self.client.post('/api/tasks/list/complete/', {'task_ids': []}, format='json')
+        self.assertEqual(response.status_code, 400)
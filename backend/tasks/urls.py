@@ -1,9 +1,12 @@
 # backend/tasks/urls.py
 from django.urls import path
-from .views import FitnessPlanView, TaskListView, TaskUpdateView, TaskDeleteView
+from .views import FitnessPlanView, FitnessPlanStreamView, PlanJobStatusView, TaskListView, TaskUpdateView, TaskBulkCompleteView, TaskDeleteView
 
 urlpatterns = [
     path('plan/', FitnessPlanView.as_view(), name='fitness-plan'),       # /api/tasks/plan/
+    path('plan/stream/', FitnessPlanStreamView.as_view(), name='fitness-plan-stream'),  # /api/tasks/plan/stream/
+    path('plan/<uuid:job_id>/', PlanJobStatusView.as_view(), name='plan-job-status'),  # /api/tasks/plan/{job_id}/
     path('list/', TaskListView.as_view(), name='task-list'),             # /api/tasks/list/
+    path('list/complete/', TaskBulkCompleteView.as_view(), name='task-bulk-complete'),  # /api/tasks/list/complete/
     path('list/<uuid:task_id>/', TaskUpdateView.as_view(), name='task-update'),  # /api/tasks/list/{task_id}/
 ]
\ No newline at end of file
@@ -2,66 +2,111 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from users.mixins import RateLimitHeadersMixin
 from users.models import FitnessInput
-from .models import Task
-from .services import generate_fitness_plan
-from .serializers import TaskSerializer, FitnessInputSerializer
+from users.throttling import PlanGenerationThrottle
+from .models import Task, PlanJob
+from .jobs import fail_if_stale, submit_plan_job, PlanQueueFull
+from .services import get_active_generation
+from .streaming import stream_fitness_plan
+from .serializers import TaskSerializer, FitnessInputSerializer, PlanJobSerializer, TaskBulkCompleteSerializer
 import logging
-from django.utils import timezone
-from datetime import timedelta
-from rest_framework.exceptions import NotFound
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from gamification.signals import update_points_from_tasks
+from rest_framework.exceptions import NotFound, ValidationError
 
 logger = logging.getLogger(__name__)
 
-class FitnessPlanView(APIView):
+def save_fitness_input(user, data):
+    """
+    Validate data and store it as user's fitness input. The serializer turns
+    form strings into numbers, so the returned instance is safe to plan from
+    without a reload. Raises ValidationError on missing or bad fields.
+    """
+    serializer = FitnessInputSerializer(FitnessInput.objects.filter(user=user).first(), data=data)
+    serializer.is_valid(raise_exception=True)
+    return serializer.save(user=user)
+
+def is_premium_request(data):
+    """Premium plans are written by Gemini; everyone else gets the local synthesizer."""
+    return str(data.get('premium', '')).lower() in ('1', 'true')
+
+class FitnessPlanView(RateLimitHeadersMixin, APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [PlanGenerationThrottle]
 
     def post(self, request):
         user = request.user
         data = request.data
         try:
-            # Check for recent plan generation (within 60 seconds)
-            recent_tasks = Task.objects.filter(
-                user=user,
-                created_at__gte=timezone.now() - timedelta(seconds=60)
-            )
-            if recent_tasks.exists():
-                logger.warning(f"Duplicate plan generation attempt by {user.email} within 60 seconds")
-                return Response({
-                    'error': 'A fitness plan was recently generated. Please wait a moment before trying again.'
-                }, status=status.HTTP_429_TOO_MANY_REQUESTS)
-
-            fitness_input, created = FitnessInput.objects.update_or_create(
-                user=user,
-                defaults={
-                    'weight': data['weight'],
-                    'height': data['height'],
-                    'sex': data['sex'],
-                    'age': data['age'],
-                    'goal': data['goal'],
-                }
-            )
-            Task.objects.filter(user=user).delete()
-            tasks = generate_fitness_plan(fitness_input)
-            task_data = TaskSerializer(tasks, many=True).data
-            logger.info(f"Generated fitness plan for {user.email}: {len(tasks)} tasks")
+            fitness_input = save_fitness_input(user, data)
+            job = submit_plan_job(fitness_input, premium=is_premium_request(data))
+            logger.info(f"Queued fitness plan job {job.id} for {user.email}")
             return Response({
-                'tasks': task_data,
+                'job': PlanJobSerializer(job).data,
                 'fitness_input': FitnessInputSerializer(fitness_input).data
-            }, status=status.HTTP_201_CREATED)
-        except KeyError as e:
-            logger.error(f"Missing field: {str(e)}")
-            return Response({'error': f'Missing field: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
+            }, status=status.HTTP_202_ACCEPTED)
+        except PlanQueueFull:
+            logger.warning(f"Plan queue full, rejected request from {user.email}")
+            return Response({
+                'error': 'Fitness plan generation is busy. Please try again shortly.'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except ValidationError as e:
+            logger.error(f"Invalid fitness input from {user.email}: {e.detail}")
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Error generating fitness plan: {str(e)}")
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class FitnessPlanStreamView(RateLimitHeadersMixin, APIView):
+    """
+    Stream a freshly generated plan as NDJSON while Gemini produces it.
+    POST /api/tasks/plan/stream/
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [PlanGenerationThrottle]
+
+    def post(self, request):
+        user = request.user
+        try:
+            fitness_input = save_fitness_input(user, request.data)
+        except ValidationError as e:
+            logger.error(f"Invalid fitness input from {user.email}: {e.detail}")
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            stream_fitness_plan(fitness_input, premium=is_premium_request(request.data)),
+            content_type='application/x-ndjson'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+class PlanJobStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        try:
+            job = PlanJob.objects.get(id=job_id, user=request.user)
+        except PlanJob.DoesNotExist:
+            logger.error(f"Plan job not found: {job_id}")
+            return Response({'error': 'Plan job not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        job = fail_if_stale(job)
+        data = {'job': PlanJobSerializer(job).data}
+        if job.status == PlanJob.STATUS_DONE:
+            tasks = job.generation.tasks.all() if job.generation_id else []
+            data['tasks'] = TaskSerializer(tasks, many=True).data
+        return Response(data)
+
 class TaskListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         try:
-            tasks = Task.objects.filter(user=request.user)
+            # Only the active plan generation is listed; older ones await compaction
+            tasks = Task.objects.filter(user=request.user, generation__is_active=True)
             task_data = TaskSerializer(tasks, many=True).data
             logger.info(f"Fetched {len(task_data)} tasks for {request.user.email}")
             return Response(task_data)
@@ -74,6 +119,7 @@ class TaskListView(APIView):
         try:
             task = Task.objects.create(
                 user=request.user,
+                generation=get_active_generation(request.user),
                 title=data['title'],
                 category=data['category'],
                 due_date=data['due_date'],
@@ -110,6 +156,37 @@ class TaskUpdateView(APIView):
 
 
 
+class TaskBulkCompleteView(APIView):
+    """
+    Complete several tasks at once with a single points update and badge check.
+    POST /api/tasks/list/complete/
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = TaskBulkCompleteSerializer(data=request.data)
+        if not serializer.is_valid():
+            logger.error(f"Invalid bulk completion from {request.user.email}: {serializer.errors}")
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            tasks = list(Task.objects.select_for_update().filter(
+                user=request.user,
+                id__in=serializer.validated_data['task_ids'],
+                is_completed=False
+            ))
+            Task.objects.filter(id__in=[task.id for task in tasks]).update(is_completed=True)
+            for task in tasks:
+                task.is_completed = True
+            # update() skips post_save, so credit the whole batch in one go
+            update_points_from_tasks(tasks)
+
+        logger.info(f"Completed {len(tasks)} tasks for {request.user.email}")
+        return Response({
+            'completed': TaskSerializer(tasks, many=True).data,
+            'points_awarded': sum(task.points_rewarded for task in tasks),
+        })
+
 class TaskDeleteView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -6,6 +6,7 @@ from django.core.exceptions import ValidationError
 
 from .utils import get_error_message
 from .models import User
+from .throttling import refund_tokens
 
 
 class ApiAuthMixin:
@@ -18,6 +19,26 @@ class PublicApiMixin:
     permission_classes = ()
 
 
+class RateLimitHeadersMixin:
+    """
+    Adds X-RateLimit-* headers from the quota TokenBucketThrottle records on
+    the request, to successful and throttled responses alike. A request
+    rejected as invalid (400) gets its tokens back first, so a form error
+    does not use up a scarce quota.
+    """
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if response.status_code == 400:
+            refund_tokens(request)
+        quota = getattr(request, 'rate_limit', None)
+        if quota is not None:
+            response['X-RateLimit-Limit'] = str(quota['limit'])
+            response['X-RateLimit-Remaining'] = str(quota['remaining'])
+            response['X-RateLimit-Reset'] = str(quota['reset'])
+        return response
+
+
 class ApiErrorsMixin:
     """
     Mixin that transforms Django and Python exceptions into rest_framework ones.
@@ -1,3 +1,143 @@
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from types import SimpleNamespace
+from unittest import mock
+from .models import User
+from .throttling import TokenBucketThrottle
+import threading
+import time
 
-# Create your tests here.
+
+class ThreePerMinuteThrottle(TokenBucketThrottle):
+    scope = 'test'
+
+    def get_rate(self):
+        return '3/min'
+
+
+class TokenBucketThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = 1000.0
+        patcher = mock.patch.object(TokenBucketThrottle, 'timer', mock.Mock(side_effect=lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.request = SimpleNamespace(user=User.objects.create_user(email='bucket@example.com', username='bucket', password='pass'))
+
+    def allow(self):
+        throttle = ThreePerMinuteThrottle()
+        return throttle.allow_request(self.request, None), throttle
+
+    def test_burst_then_refill_over_time(self):
+        self.assertEqual([self.allow()[0] for _ in range(4)], [True, True, True, False])
+        self.assertAlmostEqual(self.allow()[1].wait(), 20)
+
+        self.now += 10
+        allowed, throttle = self.allow()
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(throttle.wait(), 10)
+
+        self.now += 10
+        self.assertTrue(self.allow()[0])
+        self.assertFalse(self.allow()[0])
+
+        # A full minute refills the bucket, but never beyond its capacity
+        self.now += 600
+        self.assertEqual([self.allow()[0] for _ in range(4)], [True, True, True, False])
+
+    def test_refused_requests_do_not_consume_tokens(self):
+        for _ in range(3):
+            self.allow()
+        for _ in range(50):
+            self.now += 0.1
+            self.assertFalse(self.allow()[0])
+        # 5s of refill were spent refusing; 15s more make a whole token
+        self.now += 15
+        self.assertTrue(self.allow()[0])
+
+    def test_concurrent_requests_cannot_overspend(self):
+        # A pause after each read leaves every thread a window to spend the same tokens
+        def slow_get(*args):
+            value = cache.get(*args)
+            time.sleep(0.01)
+            return value
+
+        slow_cache = mock.Mock(wraps=cache)
+        slow_cache.get.side_effect = slow_get
+        patcher = mock.patch.object(TokenBucketThrottle, 'cache', slow_cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        barrier = threading.Barrier(12)
+        results = []
+
+        def hit():
+            barrier.wait()
+            results.append(self.allow()[0])
+
+        threads = [threading.Thread(target=hit) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 3)
+
+    def test_refund_returns_the_token(self):
+        for _ in range(2):
+            self.allow()
+        allowed, throttle = self.allow()
+        self.assertTrue(allowed)
+        throttle.refund()
+        # A second refund, or one for a refused request, gives nothing back
+        throttle.refund()
+        self.assertEqual([self.allow()[0] for _ in range(2)], [True, False])
+
+    def test_buckets_are_per_user(self):
+        for _ in range(3):
+            self.allow()
+        other = SimpleNamespace(user=User.objects.create_user(email='other@example.com', username='other', password='pass'))
+        self.assertTrue(ThreePerMinuteThrottle().allow_request(other, None))
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'plan_generation': '2/min'},
+})
+class RateLimitHeadersTests(TestCase):
+    fitness_input = {'weight': '80', 'height': '180', 'age': '30', 'sex': 'male', 'goal': 'bulking'}
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(TokenBucketThrottle, 'timer', mock.Mock(return_value=1000.0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(email='headers@example.com', username='headers', password='pass'))
+
+    def post(self, data):
+        response = self.client.post('/api/tasks/plan/stream/', data, format='json')
+        if response.status_code == 200:
+            b''.join(response.streaming_content)
+        return response
+
+    def test_headers_on_allowed_and_throttled_responses(self):
+        first, second, refused = (self.post(self.fitness_input) for _ in range(3))
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(
+            (first['X-RateLimit-Limit'], first['X-RateLimit-Remaining'], first['X-RateLimit-Reset']),
+            ('2', '1', '30')
+        )
+        self.assertEqual((second['X-RateLimit-Remaining'], second['X-RateLimit-Reset']), ('0', '60'))
+
+        self.assertEqual(refused.status_code, 429)
+        self.assertEqual(refused['Retry-After'], '30')
+        self.assertEqual((refused['X-RateLimit-Remaining'], refused['X-RateLimit-Reset']), ('0', '60'))
+
+    def test_invalid_request_keeps_its_token(self):
+        for _ in range(3):
+            invalid = self.post({})
+            self.assertEqual(invalid.status_code, 400)
+            self.assertEqual((invalid['X-RateLimit-Remaining'], invalid['X-RateLimit-Reset']), ('2', '0'))
+
+        self.assertEqual([self.post(self.fitness_input).status_code for _ in range(3)], [200, 200, 429])
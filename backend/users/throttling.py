@@ -0,0 +1,140 @@
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import cache as default_cache
+from rest_framework.throttling import BaseThrottle
+import math
+import time
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket per user (or client IP) and scope, kept in the Django cache.
+    The rate comes from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'][scope] in
+    DRF's "<requests>/<period>" form: the bucket holds <requests> tokens and
+    refills continuously over <period>. The bucket is read and written under
+    a short lock taken with cache.add, so concurrent requests from one user
+    cannot both spend the last token; there is no database access.
+    """
+    cache = default_cache
+    cache_format = 'throttle_bucket:%(scope)s:%(ident)s'
+    scope = None
+    timer = time.time
+    # Seconds before a lock left by a crashed process expires
+    lock_timeout = 1
+
+    def __init__(self):
+        self.capacity, self.refill_rate = self.parse_rate(self.get_rate())
+        self.tokens = None
+        self.key = None
+        self.took_token = False
+
+    def get_rate(self):
+        try:
+            return settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'][self.scope]
+        except KeyError:
+            raise ValueError(f"No throttle rate set for scope '{self.scope}'")
+
+    @staticmethod
+    def parse_rate(rate):
+        """Turn '5/min' into (capacity=5, refill_rate=5/60 tokens per second)."""
+        num, period = rate.split('/')
+        capacity = int(num)
+        duration = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+        return capacity, capacity / duration
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        self.key = self.get_cache_key(request, view)
+        now = self.timer()
+
+        with self._locked():
+            tokens = self._current_tokens(now)
+            self.took_token = tokens >= 1
+            if self.took_token:
+                tokens -= 1
+            self._store(tokens, now)
+
+        self.tokens = tokens
+        # Kept on the request so refund_tokens can give the token back
+        request.token_buckets = getattr(request, 'token_buckets', []) + [self]
+        self._record_quota(request)
+        return self.took_token
+
+    def refund(self):
+        """Put back the token allow_request took, if it took one."""
+        if not self.took_token:
+            return
+        now = self.timer()
+        with self._locked():
+            tokens = min(self.capacity, self._current_tokens(now) + 1)
+            self._store(tokens, now)
+        self.tokens = tokens
+        self.took_token = False
+
+    @contextmanager
+    def _locked(self):
+        lock_key = f'{self.key}:lock'
+        # Spin until the holder deletes the lock, or it expires after lock_timeout
+        while not self.cache.add(lock_key, True, timeout=self.lock_timeout):
+            time.sleep(0.001)
+        try:
+            yield
+        finally:
+            self.cache.delete(lock_key)
+
+    def _current_tokens(self, now):
+        state = self.cache.get(self.key)
+        if state is None:
+            return float(self.capacity)
+        tokens, last = state
+        return min(self.capacity, tokens + (now - last) * self.refill_rate)
+
+    def _store(self, tokens, now):
+        # Expire once the bucket would be full again; a missing key means a full bucket
+        self.cache.set(self.key, (tokens, now), timeout=math.ceil((self.capacity - tokens) / self.refill_rate) + 1)
+
+    def wait(self):
+        if self.tokens is None or self.tokens >= 1:
+            return None
+        return (1 - self.tokens) / self.refill_rate
+
+    def _record_quota(self, request):
+        # Read by RateLimitHeadersMixin; the most restrictive bucket wins
+        quota = {
+            'limit': self.capacity,
+            'remaining': int(self.tokens),
+            'reset': math.ceil((self.capacity - self.tokens) / self.refill_rate),
+        }
+        current = getattr(request, 'rate_limit', None)
+        if current is None or quota['remaining'] < current['remaining']:
+            request.rate_limit = quota
+
+
+def refund_tokens(request):
+    """
+    Give back every token the request's TokenBucketThrottles took and record
+    its quota again, for requests that turned out to be invalid.
+    """
+    buckets = getattr(request, 'token_buckets', [])
+    request.rate_limit = None
+    for bucket in buckets:
+        bucket.refund()
+        bucket._record_quota(request)
+
+
+class PlanGenerationThrottle(TokenBucketThrottle):
+    scope = 'plan_generation'
+
+
+class WearableSyncThrottle(TokenBucketThrottle):
+    scope = 'wearable_sync'
+
+
+class PostCreationThrottle(TokenBucketThrottle):
+    scope = 'post_creation'
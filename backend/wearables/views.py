@@ -2,6 +2,8 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from users.mixins import RateLimitHeadersMixin
+from users.throttling import WearableSyncThrottle
 from .models import Wearable, HealthData
 from .serializers import WearableSerializer, HealthDataSerializer
 from .services import authenticate_wearable, handle_oauth_callback, sync_health_data
@@ -40,8 +42,9 @@ class WearableCallbackView(APIView):
               logger.error(f"Error in wearable callback: {str(e)}")
               return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class WearableSyncView(APIView):
+class WearableSyncView(RateLimitHeadersMixin, APIView):
       permission_classes = [IsAuthenticated]
+      throttle_classes = [WearableSyncThrottle]
 
       def post(self, request):
           try:
@@ -14,12 +14,11 @@ const Comment = ({ comment, currentUser }) => {
   // Safely handle undefined comment
   const safeComment = comment || {};
   const author = safeComment.author || {};
-  const likes = safeComment.likes || [];
 
   useEffect(() => {
-    setIsLiked(likes.some(like => like?.id === currentUser?.id));
+    setIsLiked(safeComment.is_liked || false);
     setLikeCount(safeComment.like_count || 0);
-  }, [safeComment, currentUser, likes]);
+  }, [safeComment, currentUser]);
 
   const handleLike = async () => {
     try {
@@ -29,13 +28,8 @@ const Comment = ({ comment, currentUser }) => {
       if (!safeComment.id) throw new Error('Invalid comment ID');
       if (!currentUser?.id) throw new Error('Please log in to like comments');
 
-      if (isLiked) {
-        await unlikeComment(safeComment.id);
-        setLikeCount(prev => prev - 1);
-      } else {
-        await likeComment(safeComment.id);
-        setLikeCount(prev => prev + 1);
-      }
+      const result = isLiked ? await unlikeComment(safeComment.id) : await likeComment(safeComment.id);
+      setLikeCount(result.like_count);
       setIsLiked(!isLiked);
     } catch (error) {
       console.error('Comment like error:', error);
@@ -41,6 +41,21 @@ const FitnessForm = ({ onPlanGenerated }) => {
     }
   }, [navigate]);
 
+  // Plan generation runs as a background job; poll until it finishes.
+  // A done job that still carries an error fell back to the default tasks
+  const waitForPlan = async (jobId, token) => {
+    for (let attempt = 0; attempt < 60; attempt++) {
+      const response = await axios.get(`${API_HOST}/api/tasks/plan/${jobId}/`, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      const { job, tasks } = response.data;
+      if (job.status === 'done') return { tasks, fellBack: Boolean(job.error) };
+      if (job.status === 'failed') throw new Error(job.error || 'Failed to generate fitness plan');
+      await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+    throw new Error('Fitness plan generation timed out');
+  };
+
   const handleChange = (e) => {
     setFormData({ ...formData, [e.target.name]: e.target.value });
   };
@@ -61,14 +76,15 @@ const FitnessForm = ({ onPlanGenerated }) => {
       const response = await axios.post(`${API_HOST}/api/tasks/plan/`, formData, {
         headers: { Authorization: `Bearer ${token}` },
       });
-      console.log('Generated Plan:', response.data);
+      const { tasks, fellBack } = await waitForPlan(response.data.job.id, token);
+      console.log('Generated Plan:', tasks);
       if (onPlanGenerated) {
         onPlanGenerated({
-          tasks: response.data.tasks,
+          tasks,
           fitness_input: response.data.fitness_input
         });
       }
-      if (response.data.tasks.some(task => task.title.includes('Walk 30 minutes'))) {
+      if (fellBack) {
         setWarning('Fitness plan generation service is unavailable. Using default tasks.');
       }
       navigate('/actions'); // Redirect to /actions after generation
@@ -81,13 +97,14 @@ const FitnessForm = ({ onPlanGenerated }) => {
             const response = await axios.post(`${API_HOST}/api/tasks/plan/`, formData, {
               headers: { Authorization: `Bearer ${newToken}` },
             });
+            const { tasks, fellBack } = await waitForPlan(response.data.job.id, newToken);
             if (onPlanGenerated) {
               onPlanGenerated({
-                tasks: response.data.tasks,
+                tasks,
                 fitness_input: response.data.fitness_input
               });
             }
-            if (response.data.tasks.some(task => task.title.includes('Walk 30 minutes'))) {
+            if (fellBack) {
               setWarning('Fitness plan generation service is unavailable. Using default tasks.');
             }
             navigate('/actions');
@@ -15,7 +15,11 @@ import './Post.css';
 const Post = ({ post, currentUser }) => {
   const [isLiked, setIsLiked] = useState(false);
   const [likeCount, setLikeCount] = useState(0);
-  const [comments, setComments] = useState([]);
+  // Feed pages embed the latest few comments; the full thread is paged in on demand
+  const [comments, setComments] = useState(post?.latest_comments || []);
+  const [commentCount, setCommentCount] = useState(post?.comment_count || 0);
+  const [commentsLoaded, setCommentsLoaded] = useState(false);
+  const [nextCommentsPage, setNextCommentsPage] = useState(null);
   const [showComments, setShowComments] = useState(false);
   const [newComment, setNewComment] = useState('');
   const [isCommenting, setIsCommenting] = useState(false);
@@ -27,14 +31,14 @@ const Post = ({ post, currentUser }) => {
 
   useEffect(() => {
     if (post) {
-      setIsLiked(post.likes?.some(like => like?.id === currentUser?.id) || false);
+      setIsLiked(post.is_liked || false);
       setLikeCount(post.like_count || 0);
 
       if (post.group) {
         fetchGroupName();
       }
 
-      if (showComments && comments.length === 0) {
+      if (showComments && !commentsLoaded) {
         loadComments();
       }
     }
@@ -52,13 +56,15 @@ const Post = ({ post, currentUser }) => {
     }
   };
 
-  const loadComments = async () => {
+  const loadComments = async (pageUrl) => {
     if (!post?.id) return;
 
     setIsLoadingComments(true);
     try {
-      const fetchedComments = await getPostComments(post.id);
-      setComments(fetchedComments);
+      const page = await getPostComments(post.id, pageUrl);
+      setComments(prev => pageUrl ? [...prev, ...page.results] : page.results);
+      setNextCommentsPage(page.next);
+      setCommentsLoaded(true);
     } catch (error) {
       console.error('Failed to load comments:', error);
       setCommentError('Failed to load comments');
@@ -74,13 +80,9 @@ const Post = ({ post, currentUser }) => {
       if (!post?.id) throw new Error('Invalid post');
       if (!currentUser?.id) throw new Error('Please log in to like posts');
 
-      if (isLiked) {
-        await unlikePost(post.id);
-        setLikeCount(prev => prev - 1);
-      } else {
-        await likePost(post.id);
-        setLikeCount(prev => prev + 1);
-      }
+      // The server returns the stored count, so double clicks cannot drift it
+      const result = isLiked ? await unlikePost(post.id) : await likePost(post.id);
+      setLikeCount(result.like_count);
       setIsLiked(!isLiked);
     } catch (error) {
       console.error('Like error:', error);
@@ -102,6 +104,7 @@ const Post = ({ post, currentUser }) => {
     try {
       const createdComment = await createComment(post.id, newComment);
       setComments(prev => [createdComment, ...prev]);
+      setCommentCount(prev => prev + 1);
       setNewComment('');
     } catch (error) {
       console.error('Comment error:', error);
@@ -179,7 +182,7 @@ const Post = ({ post, currentUser }) => {
           className="comments-count"
           onClick={() => setShowComments(!showComments)}
         >
-          <i className="fas fa-comment"></i> {comments.length} comments
+          <i className="fas fa-comment"></i> {commentCount} comments
         </div>
       </div>
 
@@ -209,6 +212,15 @@ const Post = ({ post, currentUser }) => {
         </Alert>
       )}
 
+      {/* Latest comments embedded in the feed page */}
+      {!showComments && comments.length > 0 && (
+        <div className="comments-list">
+          {comments.map(comment => (
+            <Comment key={comment.id} comment={comment} currentUser={currentUser} />
+          ))}
+        </div>
+      )}
+
       {/* Comments Section */}
       {showComments && (
         <motion.div
@@ -299,6 +311,11 @@ const Post = ({ post, currentUser }) => {
                 No comments yet. Be the first to comment!
               </div>
             )}
+            {nextCommentsPage && !isLoadingComments && (
+              <Button variant="link" size="sm" onClick={() => loadComments(nextCommentsPage)}>
+                More comments
+              </Button>
+            )}
           </div>
         </motion.div>
       )}
@@ -49,28 +49,16 @@ const Dashboard = () => {
   const fetchDashboardData = async () => {
     try {
       const token = localStorage.getItem("accessToken");
-      const endpoints = [
-        "/api/points/",
-        "/api/my-badges/",
-        "/api/leaderboard/",
-        "/api/transactions/",
-        "/api/notifications/",
-      ];
-
-      const responses = await Promise.all(
-        endpoints.map((endpoint) =>
-          axios.get(`${API_HOST}${endpoint}`, {
-            headers: { Authorization: `Bearer ${token}` },
-          })
-        )
-      );
+      const { data } = await axios.get(`${API_HOST}/api/dashboard/`, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
 
       setDashboardData({
-        points: responses[0].data.total_points,
-        badges: responses[1].data,
-        leaderboard: responses[2].data,
-        transactions: responses[3].data,
-        notifications: responses[4].data.filter((n) => !n.is_read),
+        points: data.points.total_points,
+        badges: data.badges,
+        leaderboard: data.leaderboard,
+        transactions: data.transactions,
+        notifications: data.notifications.filter((n) => !n.is_read),
       });
     } catch (err) {
       setError("Failed to load dashboard data");
@@ -81,9 +69,64 @@ const Dashboard = () => {
   };
 
   useEffect(() => {
+    let socket = null;
+    let interval = null;
+    let reconnectTimer = null;
+    let refreshTimer = null;
+    let unmounted = false;
+
+    // Poll only while the push socket is down
+    const startPolling = () => {
+      if (!interval) interval = setInterval(fetchDashboardData, 30000);
+    };
+    const stopPolling = () => {
+      clearInterval(interval);
+      interval = null;
+    };
+    // One refetch for a burst of events (points, badge and notification arrive together)
+    const scheduleRefresh = () => {
+      clearTimeout(refreshTimer);
+      refreshTimer = setTimeout(fetchDashboardData, 500);
+    };
+
+    const connect = () => {
+      const token = localStorage.getItem("accessToken");
+      const wsHost = API_HOST.replace(/^http/, "ws");
+      socket = new WebSocket(`${wsHost}/ws/gamification/?token=${token}`);
+
+      socket.onopen = () => {
+        stopPolling();
+        fetchDashboardData();
+      };
+      socket.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        if (message.type === "points") {
+          setDashboardData((prev) => ({ ...prev, points: message.data.total_points }));
+        } else if (message.type === "notification") {
+          setDashboardData((prev) => ({
+            ...prev,
+            notifications: [message.data, ...prev.notifications],
+          }));
+        }
+        scheduleRefresh();
+      };
+      socket.onclose = () => {
+        if (unmounted) return;
+        startPolling();
+        reconnectTimer = setTimeout(connect, 5000);
+      };
+    };
+
     fetchDashboardData();
-    const interval = setInterval(fetchDashboardData, 30000);
-    return () => clearInterval(interval);
+    startPolling();
+    connect();
+    return () => {
+      unmounted = true;
+      stopPolling();
+      clearTimeout(reconnectTimer);
+      clearTimeout(refreshTimer);
+      if (socket) socket.close();
+    };
   }, []);
 
   const markNotificationAsRead = async (notificationId) => {
@@ -33,12 +33,16 @@ const ApiService = {
   joinGroup: (id) => api.post(`/api/groups/${id}/join/`),
   leaveGroup: (id) => api.post(`/api/groups/${id}/leave/`),
   addModerator: (id, userId) => api.post(`/api/groups/${id}/add_moderator/`, { user_id: userId }),
+  // Pages of { results, next, previous }; pass next back in to continue
+  getGroupMembers: (id, pageUrl) => api.get(pageUrl || `/api/groups/${id}/members/`),
   getUserByEmail: (email) => api.get(`/api/users/lookup/?email=${email}`),
-  getGroupPosts: (groupId) => api.get(`/api/groups/${groupId}/posts/`),
+  // Pages of { results, next }; pass next back in to continue
+  getGroupPosts: (groupId, pageUrl) => api.get(pageUrl || `/api/groups/${groupId}/posts/`),
   createGroupPost: (groupId, data) => api.post('/api/posts/', { ...data, group: groupId }),
   likePost: (postId) => api.post(`/api/posts/${postId}/like/`),
   unlikePost: (postId) => api.post(`/api/posts/${postId}/unlike/`),
   createComment: (postId, content) => api.post(`/api/comments/`, { content, post: postId }),
+  // Newest comments first, as { results, next }
   getPostComments: (postId) => api.get(`/api/posts/${postId}/comments/`),
   likeComment: (commentId) => api.post(`/api/comments/${commentId}/like/`),
   unlikeComment: (commentId) => api.post(`/api/comments/${commentId}/unlike/`)
@@ -126,7 +130,7 @@ const Post = ({ post, currentUser, onLike, onCreateComment, onLoadComments, onLi
   const [isLoadingComments, setIsLoadingComments] = useState(false);
   const [comments, setComments] = useState(post.comments || []);
 
-  const isLiked = post.likes?.some(like => like?.id === currentUser?.id);
+  const isLiked = post.is_liked || false;
   const likeCount = post.like_count || 0;
 
   const handleLike = async () => {
@@ -177,13 +181,13 @@ const Post = ({ post, currentUser, onLike, onCreateComment, onLoadComments, onLi
 
   const handleLikeComment = async (commentId) => {
     try {
-      await onLikeComment(commentId);
+      const likeCount = await onLikeComment(commentId);
       setComments(comments.map(comment =>
         comment.id === commentId
           ? {
               ...comment,
-              likes: [...comment.likes, { id: currentUser.id }],
-              like_count: comment.like_count + 1
+              is_liked: true,
+              like_count: likeCount
             }
           : comment
       ));
@@ -194,13 +198,13 @@ const Post = ({ post, currentUser, onLike, onCreateComment, onLoadComments, onLi
 
   const handleUnlikeComment = async (commentId) => {
     try {
-      await onUnlikeComment(commentId);
+      const likeCount = await onUnlikeComment(commentId);
       setComments(comments.map(comment =>
         comment.id === commentId
           ? {
               ...comment,
-              likes: comment.likes.filter(like => like.id !== currentUser.id),
-              like_count: comment.like_count - 1
+              is_liked: false,
+              like_count: likeCount
             }
           : comment
       ));
@@ -444,16 +448,16 @@ const Post = ({ post, currentUser, onLike, onCreateComment, onLoadComments, onLi
                         <Button
                           variant="link"
                           size="sm"
-                          className={`p-0 me-2 text-decoration-none ${comment.likes?.some(like => like.id === currentUser?.id) ? 'text-success' : 'text-muted'}`}
+                          className={`p-0 me-2 text-decoration-none ${comment.is_liked ? 'text-success' : 'text-muted'}`}
                           onClick={() =>
-                            comment.likes?.some(like => like.id === currentUser?.id)
+                            comment.is_liked
                               ? handleUnlikeComment(comment.id)
                               : handleLikeComment(comment.id)
                           }
                           disabled={!currentUser}
                           style={{ fontSize: '0.8rem' }}
                         >
-                          <i className={`fas fa-thumbs-up me-1 ${comment.likes?.some(like => like.id === currentUser?.id) ? 'text-success' : ''}`}></i>
+                          <i className={`fas fa-thumbs-up me-1 ${comment.is_liked ? 'text-success' : ''}`}></i>
                           {comment.like_count || 0}
                         </Button>
                       </div>
@@ -834,7 +838,10 @@ const GroupDetail = ({ user, groupId, onBack, onEdit }) => {
   const [moderatorEmail, setModeratorEmail] = useState('');
   const [actionError, setActionError] = useState(null);
   const [showDeleteModal, setShowDeleteModal] = useState(false);
+  const [members, setMembers] = useState([]);
+  const [nextMembersPage, setNextMembersPage] = useState(null);
   const [posts, setPosts] = useState([]);
+  const [nextPostsPage, setNextPostsPage] = useState(null);
   const [loadingPosts, setLoadingPosts] = useState(false);
   const [postError, setPostError] = useState(null);
   const [newPostContent, setNewPostContent] = useState('');
@@ -849,8 +856,9 @@ const GroupDetail = ({ user, groupId, onBack, onEdit }) => {
         const response = await ApiService.getGroup(groupId);
         setGroup(response.data);
         setLoading(false);
+        fetchMembers();
 
-        if (response.data.members.some(member => member.id === safeUser.id)) {
+        if (response.data.is_member) {
           fetchGroupPosts();
         }
       } catch (error) {
@@ -871,7 +879,8 @@ const GroupDetail = ({ user, groupId, onBack, onEdit }) => {
     setPostError(null);
     try {
       const response = await ApiService.getGroupPosts(groupId);
-      setPosts(response.data);
+      setPosts(response.data.results);
+      setNextPostsPage(response.data.next);
     } catch (error) {
       console.error('Error fetching group posts:', error);
       setPostError(
@@ -883,19 +892,40 @@ const GroupDetail = ({ user, groupId, onBack, onEdit }) => {
     }
   };
 
+  const fetchMembers = async (pageUrl) => {
+    try {
+      const response = await ApiService.getGroupMembers(groupId, pageUrl);
+      setMembers(prevMembers => pageUrl ? [...prevMembers, ...response.data.results] : response.data.results);
+      setNextMembersPage(response.data.next);
+    } catch (error) {
+      console.error('Error fetching group members:', error);
+    }
+  };
+
+  const loadMoreGroupPosts = async () => {
+    try {
+      const response = await ApiService.getGroupPosts(groupId, nextPostsPage);
+      setPosts(prevPosts => [...prevPosts, ...response.data.results]);
+      setNextPostsPage(response.data.next);
+    } catch (error) {
+      console.error('Error fetching more group posts:', error);
+      setPostError('Failed to load posts. Please try again later.');
+    }
+  };
+
   const isGroupMember = () => {
     if (!group || !safeUser.id) return false;
-    return group.members.some(member => member.id === safeUser.id);
+    return group.is_member;
   };
 
   const isGroupCreator = () => {
     if (!group || !safeUser.id) return false;
-    return group.creator === safeUser.id;
+    return group.creator?.id === safeUser.id;
   };
 
   const isGroupModerator = () => {
     if (!group || !safeUser.id) return false;
-    return group.moderators.some(mod => mod.id === safeUser.id);
+    return group.is_moderator;
   };
 
   const handleJoinGroup = async () => {
@@ -904,6 +934,7 @@ const GroupDetail = ({ user, groupId, onBack, onEdit }) => {
       await ApiService.joinGroup(groupId);
       const response = await ApiService.getGroup(groupId);
       setGroup(response.data);
+      fetchMembers();
       fetchGroupPosts();
     } catch (error) {
       console.error('Error joining group:', error);
@@ -920,6 +951,7 @@ const GroupDetail = ({ user, groupId, onBack, onEdit }) => {
       await ApiService.leaveGroup(groupId);
       const response = await ApiService.getGroup(groupId);
       setGroup(response.data);
+      fetchMembers();
     } catch (error) {
       console.error('Error leaving group:', error);
       setActionError(
@@ -943,6 +975,7 @@ const GroupDetail = ({ user, groupId, onBack, onEdit }) => {
       await ApiService.addModerator(groupId, userResponse.data.id);
       const response = await ApiService.getGroup(groupId);
       setGroup(response.data);
+      fetchMembers();
       setShowAddModeratorForm(false);
       setModeratorEmail('');
     } catch (error) {
@@ -1002,13 +1035,13 @@ const GroupDetail = ({ user, groupId, onBack, onEdit }) => {
   const handleLikePost = async (postId) => {
     try {
       const post = posts.find(p => p.id === postId);
-      if (post.likes.some(like => like.id === safeUser.id)) {
+      if (post.is_liked) {
         await ApiService.unlikePost(postId);
         setPosts(posts.map(p =>
           p.id === postId
             ? {
                 ...p,
-                likes: p.likes.filter(like => like.id !== safeUser.id),
+                is_liked: false,
                 like_count: p.like_count - 1
               }
             : p
@@ -1019,7 +1052,7 @@ const GroupDetail = ({ user, groupId, onBack, onEdit }) => {
           p.id === postId
             ? {
                 ...p,
-                likes: [...p.likes, { id: safeUser.id }],
+                is_liked: true,
                 like_count: p.like_count + 1
               }
             : p
@@ -1050,9 +1083,9 @@ const GroupDetail = ({ user, groupId, onBack, onEdit }) => {
     try {
       const response = await ApiService.getPostComments(postId);
       setPosts(posts.map(p =>
-        p.id === postId ? { ...p, comments: response.data } : p
+        p.id === postId ? { ...p, comments: response.data.results } : p
       ));
-      return response.data;
+      return response.data.results;
     } catch (error) {
       console.error('Error loading comments:', error);
       throw new Error('Failed to load comments');
@@ -1061,7 +1094,8 @@ const GroupDetail = ({ user, groupId, onBack, onEdit }) => {
 
   const handleLikeComment = async (commentId) => {
     try {
-      await ApiService.likeComment(commentId);
+      const response = await ApiService.likeComment(commentId);
+      return response.data.like_count;
     } catch (error) {
       console.error('Error liking comment:', error);
       throw new Error('Failed to like comment');
@@ -1070,7 +1104,8 @@ const GroupDetail = ({ user, groupId, onBack, onEdit }) => {
 
   const handleUnlikeComment = async (commentId) => {
     try {
-      await ApiService.unlikeComment(commentId);
+      const response = await ApiService.unlikeComment(commentId);
+      return response.data.like_count;
     } catch (error) {
       console.error('Error unliking comment:', error);
       throw new Error('Failed to unlike comment');
@@ -1205,6 +1240,13 @@ const GroupDetail = ({ user, groupId, onBack, onEdit }) => {
                       onUnlikeComment={handleUnlikeComment}
                     />
                   ))}
+                  {nextPostsPage && (
+                    <div className="text-center my-3">
+                      <Button variant="outline-success" onClick={loadMoreGroupPosts}>
+                        Load more
+                      </Button>
+                    </div>
+                  )}
                 </div>
               ) : (
                 <Alert variant="info">
@@ -1217,10 +1259,10 @@ const GroupDetail = ({ user, groupId, onBack, onEdit }) => {
           <div className="row">
             <div className="col-lg-6 mb-4 mb-lg-0">
               <Card style={styles.card}>
-                <Card.Header className="fw-bold">Members ({group.members.length})</Card.Header>
+                <Card.Header className="fw-bold">Members ({group.member_count})</Card.Header>
                 <Card.Body className="p-0">
                   <ul className="list-group list-group-flush">
-                    {group.members.map(member => (
+                    {members.map(member => (
                       <li key={member.id} className="list-group-item">
                         <div className="d-flex align-items-center">
                           <div className="flex-shrink-0 me-3">
@@ -1232,10 +1274,10 @@ const GroupDetail = ({ user, groupId, onBack, onEdit }) => {
                           <div className="flex-grow-1">
                             <div>{member.username}</div>
                             <div className="d-flex gap-2 mt-1">
-                              {group.moderators.some(mod => mod.id === member.id) && (
+                              {member.is_moderator && (
                                 <Badge bg="info">Moderator</Badge>
                               )}
-                              {group.creator === member.id && (
+                              {group.creator?.id === member.id && (
                                 <Badge bg="success">Creator</Badge>
                               )}
                             </div>
@@ -1244,6 +1286,13 @@ const GroupDetail = ({ user, groupId, onBack, onEdit }) => {
                       </li>
                     ))}
                   </ul>
+                  {nextMembersPage && (
+                    <div className="text-center my-2">
+                      <Button variant="link" onClick={() => fetchMembers(nextMembersPage)}>
+                        Show more members
+                      </Button>
+                    </div>
+                  )}
                 </Card.Body>
               </Card>
             </div>
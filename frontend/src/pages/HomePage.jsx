@@ -11,6 +11,8 @@ import { fetchCurrentUser } from '../services/api';
 const HomePage = ({ user, setUser }) => {
   const Motion = motion.div;
   const [posts, setPosts] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -25,8 +27,9 @@ const HomePage = ({ user, setUser }) => {
   useEffect(() => {
     const loadPosts = async () => {
       try {
-        const postsData = await fetchPosts();
-        setPosts(postsData);
+        const page = await fetchPosts();
+        setPosts(page.results);
+        setNextPage(page.next);
         setLoading(false);
       } catch (error) {
         console.error('Error loading posts:', error);
@@ -36,6 +39,19 @@ const HomePage = ({ user, setUser }) => {
     loadPosts();
   }, []);
 
+  const loadMorePosts = async () => {
+    setLoadingMore(true);
+    try {
+      const page = await fetchPosts(nextPage);
+      setPosts(prevPosts => [...prevPosts, ...page.results]);
+      setNextPage(page.next);
+    } catch (error) {
+      console.error('Error loading more posts:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleNewPost = (newPost) => {
     setPosts(prevPosts => [newPost, ...prevPosts]);
   };
@@ -83,6 +99,13 @@ const HomePage = ({ user, setUser }) => {
                   </Motion>
                 ))
               )}
+              {nextPage && (
+                <div className="text-center my-3">
+                  <Button variant="outline-success" onClick={loadMorePosts} disabled={loadingMore}>
+                    {loadingMore ? <Spinner animation="border" size="sm" /> : 'Load more'}
+                  </Button>
+                </div>
+              )}
             </div>
           </div>
         </div>
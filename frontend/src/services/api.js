@@ -20,9 +20,22 @@ export const fetchCurrentUser = async () => {
   }
 };
 
-export const fetchPosts = async () => {
+// Returns one feed page: { results, next }, where next is the URL of the following page or null
+export const fetchPosts = async (pageUrl = `${API_HOST}/api/posts/?preview_comments=3`) => {
   const token = localStorage.getItem('accessToken');
-  const response = await fetch(`${API_HOST}/api/posts/`, {
+  const response = await fetch(pageUrl, {
+    headers: {
+      'Authorization': `Bearer ${token}`,
+      'Content-Type': 'application/json'
+    }
+  });
+  return await response.json();
+};
+
+// Returns one page of the user's home timeline: { results, next }
+export const fetchTimeline = async (pageUrl = `${API_HOST}/api/posts/timeline/?preview_comments=3`) => {
+  const token = localStorage.getItem('accessToken');
+  const response = await fetch(pageUrl, {
     headers: {
       'Authorization': `Bearer ${token}`,
       'Content-Type': 'application/json'
@@ -261,10 +274,11 @@ export const unlikeComment = async (commentId) => {
     throw error;
   }
 };
-export const getPostComments = async (postId) => {
+// Returns one page of a post's comments, newest first: { results, next }
+export const getPostComments = async (postId, pageUrl = `${API_HOST}/api/posts/${postId}/comments/`) => {
   const token = localStorage.getItem('accessToken');
   try {
-    const response = await fetch(`${API_HOST}/api/posts/${postId}/comments/`, {
+    const response = await fetch(pageUrl, {
       headers: {
         'Authorization': `Bearer ${token}`,
         'Content-Type': 'application/json'
@@ -360,10 +374,11 @@ export const addModerator = async (groupId, userId) => {
   return await response.json();
 };
 
-export const getGroupPosts = async (groupId) => {
+// Returns one page of group posts: { results, next }
+export const getGroupPosts = async (groupId, pageUrl = `${API_HOST}/api/groups/${groupId}/posts/`) => {
   const token = localStorage.getItem('accessToken');
   try {
-    const response = await fetch(`${API_HOST}/api/groups/${groupId}/posts/`, {
+    const response = await fetch(pageUrl, {
       headers: {
         'Authorization': `Bearer ${token}`,
         'Content-Type': 'application/json'